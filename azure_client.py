@@ -39,7 +39,11 @@ baseconfig = getattr(module, class_name)
 
 import nest_asyncio
 import asyncio
+import base64
+import json
 import os
+import struct
+import zlib
 
 
 # Apply nest_asyncio to allow nested event loops (required for Jupyter compatibility)
@@ -49,7 +53,11 @@ nest_asyncio.apply()
 from llama_index.llms.azure_openai import AzureOpenAI
 from llama_index.core.llms import ChatMessage, MessageRole
 from llama_index.core import Settings
-from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
+from llama_index.tools.mcp import McpToolSpec
+from llm_clients import llm_http_clients
+from mcp_http_client import make_mcp_client
+from parallel_agent import DEFAULT_AGENT_MAX_PARALLEL_TOOL_CALLS, ParallelFunctionAgent
+from tool_catalog import CachedMcpToolSpec
 from llama_index.core.agent.workflow import (
     FunctionAgent,
     ToolCallResult,
@@ -58,13 +66,80 @@ from llama_index.core.agent.workflow import (
 
 from llama_index.core.workflow import Context
 
+# MCP server endpoint: .../sse for SSE, .../mcp for streamable HTTP
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://127.0.0.1:8000/sse")
+
 # System prompt to guide the LLM's behavior
 SYSTEM_PROMPT = """\
 You are an AI assistant for Tool Calling.
 
 Before you help a user, you need to work with tools to interact with Our Database
+
+When a question needs counts, ranges or typical values rather than every row,
+call read_data with result_format="summary" instead of reading all rows.
 """
 
+def _decode_column(payload: bytes, position: int, column_type: str, row_count: int) -> tuple:
+    """Decode one column block of a binary result; returns (values, next_position)."""
+    validity = payload[position:position + (row_count + 7) // 8]
+    position += len(validity)
+    if column_type in ("int64", "float64"):
+        code = "q" if column_type == "int64" else "d"
+        values = list(struct.unpack_from(f"<{row_count}{code}", payload, position))
+        position += row_count * 8
+    else:
+        offsets = struct.unpack_from(f"<{row_count + 1}i", payload, position)
+        position += (row_count + 1) * 4
+        data = payload[position:position + offsets[-1]]
+        position += offsets[-1]
+        values = [data[start:end] for start, end in zip(offsets, offsets[1:])]
+        if column_type == "utf8":
+            values = [value.decode("utf-8") for value in values]
+    values = [
+        value if validity[index >> 3] & (1 << (index & 7)) else None
+        for index, value in enumerate(values)
+    ]
+    return values, position
+
+def decode_result(result) -> tuple:
+    """
+    Decode a columnar or binary read_data result into column names and rows.
+
+    Args:
+        result: The tool result as a dict, its JSON text, or the MCP
+            CallToolResult returned by the tool
+
+    Returns:
+        tuple: `(columns, rows)`, or None if the result is not in a
+            columnar format
+    """
+    if hasattr(result, "content"):
+        if len(result.content) != 1 or not hasattr(result.content[0], "text"):
+            return None
+        result = result.content[0].text
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return None
+    if not isinstance(result, dict):
+        return None
+
+    if result.get("format") == "columnar":
+        data = result["data"]
+    elif result.get("format") == "binary":
+        payload = base64.b64decode(result["payload"])
+        if result.get("compression") == "zlib":
+            payload = zlib.decompress(payload)
+        data, position = [], 0
+        for column_type in result["types"]:
+            values, position = _decode_column(payload, position, column_type, result["row_count"])
+            data.append(values)
+    else:
+        return None
+    rows = [tuple(row) for row in zip(*data)] if data else []
+    return result["columns"], rows
+
 def setup_llm() -> AzureOpenAI:
     """
     Set up Azure OpenAI GPT-4 (Chat Mode).
@@ -94,35 +169,52 @@ def setup_llm() -> AzureOpenAI:
             "Optional: AZURE_OPENAI_API_VERSION (defaults to 2024-02-15-preview)"
         )
 
+    # Every LLM for this deployment shares one pooled pair of HTTP clients,
+    # e.g. across Streamlit sessions (see llm_clients.py)
+    http_client, async_http_client = llm_http_clients(
+        f"{baseconfig.AZURE_GPT4o_OPENAI_ENDPOINT}/{baseconfig.AZURE_GPT4o_OPENAI_DEPLOYMENT}"
+    )
     gpt4o_azure_chat_open_ai_llm= AzureOpenAI(
         model='gpt-4o',
         deployment_name=baseconfig.AZURE_GPT4o_OPENAI_DEPLOYMENT,
         api_key=baseconfig.AZURE_GPT4o_OPENAI_API_KEY,
         azure_endpoint=baseconfig.AZURE_GPT4o_OPENAI_ENDPOINT,
         api_version=baseconfig.AZURE_GPT4o_OPENAI_API_VERSION,
+        http_client=http_client,
+        async_http_client=async_http_client,
     )
         
     Settings.llm = gpt4o_azure_chat_open_ai_llm
     return gpt4o_azure_chat_open_ai_llm
 
-async def get_agent(tools: McpToolSpec, llm: AzureOpenAI) -> FunctionAgent:
+async def get_agent(
+    tools: McpToolSpec,
+    llm: AzureOpenAI,
+    max_parallel_tool_calls: int = DEFAULT_AGENT_MAX_PARALLEL_TOOL_CALLS,
+) -> FunctionAgent:
     """
     Create a FunctionAgent with the specified tools and LLM.
 
     Args:
         tools (McpToolSpec): MCP tools specification
         llm (AzureOpenAI): Configured LLM instance
+        max_parallel_tool_calls (int): Tool calls of one LLM turn run at the
+            same time (AGENT_MAX_PARALLEL_TOOL_CALLS); 1 runs them one by one
+            in the order the LLM made them
 
     Returns:
         FunctionAgent: Configured agent instance
     """
     tools_list = await tools.to_tool_list_async()
-    agent = FunctionAgent(
+    # Independent tool calls run concurrently; writes keep their order
+    # (see parallel_agent.py)
+    agent = ParallelFunctionAgent(
         name="Agent",
         description="An agent that can work with Our Database software.",
         tools=tools_list,
         llm=llm,
         system_prompt=SYSTEM_PROMPT,
+        max_parallel_tool_calls=max_parallel_tool_calls,
     )
     return agent
 
@@ -149,7 +241,12 @@ async def handle_user_message(
         if verbose and isinstance(event, ToolCall):
             print(f"Calling tool {event.tool_name} with kwargs {event.tool_kwargs}")
         elif verbose and isinstance(event, ToolCallResult):
-            print(f"Tool {event.tool_name} returned {event.tool_output}")
+            decoded = decode_result(event.tool_output.raw_output)
+            if decoded is not None:
+                columns, rows = decoded
+                print(f"Tool {event.tool_name} returned {len(rows)} rows of {columns}: {rows}")
+            else:
+                print(f"Tool {event.tool_name} returned {event.tool_output}")
 
     response = await handler
     return str(response)
@@ -163,8 +260,10 @@ async def main():
         llm = setup_llm()
 
         # Initialize MCP client and tools
-        mcp_client = BasicMCPClient("http://127.0.0.1:8000/sse")
-        mcp_tool = McpToolSpec(client=mcp_client)
+        mcp_client = make_mcp_client(MCP_SERVER_URL)
+        # The tool catalog is listed once (or loaded from the catalog file)
+        # and shared by the agent and the listing below
+        mcp_tool = CachedMcpToolSpec(client=mcp_client)
 
         # Get the agent and create context
         agent = await get_agent(mcp_tool, llm)
@@ -184,6 +283,12 @@ async def main():
                 if user_input.lower() == "exit":
                     break
                 
+                # The server reported a tool list change since the last message
+                updated = await mcp_tool.updated_tools()
+                if updated is not None:
+                    agent.tools = updated
+                    print(f"Tool list changed: {', '.join(tool.metadata.name for tool in updated)}")
+
                 print("User:", user_input)
                 response = await handle_user_message(
                     user_input, agent, agent_context, verbose=True
@@ -0,0 +1,1087 @@
+#!/usr/bin/env python3
+"""
+Server Benchmarks
+
+Micro and load benchmarks for the SQLite demo server. Every benchmark runs
+against a throw-away database in a temporary directory, so it never touches
+`data/demo.db`.
+
+    python benchmark.py concurrency --clients 16 --calls 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from llama_index.core.agent.workflow import FunctionAgent
+from llama_index.core.llms import ChatMessage
+from llama_index.core.workflow import Context
+from llama_index.llms.azure_openai import AzureOpenAI
+from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+import uvicorn
+
+import server
+from llm_clients import LLMClientRegistry
+from mcp_http_client import make_mcp_client
+from parallel_agent import ParallelFunctionAgent
+from result_cache import ResultCache
+from result_summary import ResultSummarizer
+from slow_query_log import SlowQueryLog
+from sqlite_executor import QueryExecutor
+from sqlite_pool import PEOPLE_INDEXES, SQLitePool
+from sqlite_writer import SQLiteWriter
+from statement_cache import StatementCache
+from storage_profiles import PROFILES, get_profile
+from tool_catalog import CachedMcpToolSpec
+
+PROFESSIONS = ["Engineer", "Developer", "Teacher", "Driver", "Doctor", "Artist"]
+
+
+def seed_people(pool: SQLitePool, rows: int, seed: int = 42) -> None:
+    """Fill the people table with `rows` synthetic records."""
+    rng = random.Random(seed)
+    records = (
+        (f"Person {i}", rng.randint(18, 90), rng.choice(PROFESSIONS))
+        for i in range(rows)
+    )
+    with pool.connection() as conn:
+        conn.executemany(
+            "INSERT INTO people (name, age, profession) VALUES (?, ?, ?)", records
+        )
+        conn.commit()
+
+
+@contextlib.contextmanager
+def temp_server(
+    rows: int,
+    pool_size: int,
+    workers: int,
+    profile: str = "wal",
+    commit_window: float = 0.0,
+    max_batch: int = 64,
+    result_cache_size: int = 0,
+    read_pool: str = "ro",
+    summary_threshold: int = 0,
+):
+    """Point the server module at a seeded temporary database.
+
+    The result cache is disabled unless `result_cache_size` is given, so
+    repeated reads measure the database rather than the cache. Reads use a
+    separate read-only pool of `pool_size` connections unless `read_pool`
+    is "shared". Large results are returned in full unless
+    `summary_threshold` is given.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(
+            os.path.join(tmp, 'bench.db'),
+            size=pool_size,
+            profile=get_profile(profile),
+            statement_cache=StatementCache(),
+        )
+        seed_people(pool, rows)
+        previous = (
+            server._pool, server._read_pool, server._executor, server._writer,
+            server._result_cache, server._summarizer, server._query_log,
+        )
+        server._pool = pool
+        server._read_pool = pool if read_pool == "shared" else SQLitePool(
+            pool.db_path,
+            size=pool_size,
+            profile=pool.profile,
+            statement_cache=pool.statement_cache,
+            read_only=True,
+            immutable=read_pool == "immutable",
+        )
+        server._executor = QueryExecutor(workers=workers)
+        server._result_cache = ResultCache(capacity=result_cache_size)
+        server._summarizer = ResultSummarizer(threshold_bytes=summary_threshold)
+        # Query statistics without a slow query file
+        server._query_log = SlowQueryLog(path="")
+        server._writer = SQLiteWriter(
+            pool.db_path,
+            profile=pool.profile,
+            commit_window=commit_window,
+            max_batch=max_batch,
+            on_commit=server._result_cache.invalidate,
+        )
+        try:
+            yield pool
+        finally:
+            server._writer.close()
+            server._executor.shutdown()
+            if server._read_pool is not pool:
+                server._read_pool.close()
+            pool.close()
+            (
+                server._pool, server._read_pool, server._executor, server._writer,
+                server._result_cache, server._summarizer, server._query_log,
+            ) = previous
+
+
+def report(label: str, latencies: list, elapsed: float) -> None:
+    """Print throughput and latency percentiles for one run."""
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    # Nearest rank: the smallest latency at or above 95% of the calls
+    p95 = latencies[max(0, math.ceil(len(latencies) * 0.95) - 1)] * 1000
+    worst = latencies[-1] * 1000
+    print(
+        f"{label:<36} {len(latencies) / elapsed:>9.1f} calls/s   "
+        f"p50={p50:>8.2f}ms   p95={p95:>8.2f}ms   max={worst:>8.2f}ms"
+    )
+
+
+async def run_clients(app: FastMCP, tool: str, arguments: dict, clients: int, calls: int):
+    """Simulate concurrent MCP clients calling one tool through FastMCP."""
+    latencies = []
+
+    async def client():
+        for _ in range(calls):
+            started = time.perf_counter()
+            await app.call_tool(tool, arguments)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies, time.perf_counter() - started
+
+
+async def run_probe(app: FastMCP, tool: str, arguments: dict, interval: float, done: asyncio.Event):
+    """
+    Issue cheap calls on a fixed schedule until `done` is set.
+
+    Latency is measured from the scheduled send time, so time spent waiting
+    for a blocked event loop is counted even when the call itself is fast.
+    A call that finishes late moves the schedule forward instead of letting
+    a backlog build up.
+    """
+    latencies = []
+    scheduled = time.perf_counter()
+    while not done.is_set():
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        await app.call_tool(tool, arguments)
+        latencies.append(time.perf_counter() - scheduled)
+        scheduled = max(scheduled + interval, time.perf_counter())
+    return latencies
+
+
+async def run_mixed(app: FastMCP, heavy: dict, light: dict, clients: int, calls: int, interval: float):
+    """Heavy clients plus one interactive probe client sharing the server."""
+    done = asyncio.Event()
+    probe = asyncio.create_task(run_probe(app, "read_data", light, interval, done))
+    latencies, elapsed = await run_clients(app, "read_data", heavy, clients, calls)
+    done.set()
+    return latencies, elapsed, await probe
+
+
+def bench_concurrency(args) -> None:
+    """Blocking sync tools vs. executor-backed async tools."""
+    heavy = {"query": "SELECT profession, COUNT(*), AVG(age) FROM people GROUP BY profession"}
+    light = {"query": "SELECT * FROM people WHERE id = 1"}
+
+    # The previous behaviour: a synchronous tool doing sqlite3 I/O on the loop
+    blocking = FastMCP('blocking-baseline')
+
+    @blocking.tool()
+    def read_data(query: str) -> list:
+        return server._execute_read(query)
+
+    with temp_server(args.rows, args.pool_size, args.workers):
+        print(
+            f"{args.clients} heavy clients x {args.calls} calls + 1 interactive client, "
+            f"{args.rows} rows, {args.workers} workers"
+        )
+        for label, app in (("sync tool (event loop)", blocking), ("async tool (executor)", server.mcp)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, elapsed, probe = asyncio.run(
+                    run_mixed(app, heavy, light, args.clients, args.calls, args.interval)
+                )
+            report(f"{label} heavy", latencies, elapsed)
+            report(f"{label} interactive", probe, elapsed)
+        print(f"executor: {server._executor.stats().as_dict()}")
+
+
+def bench_storage(args) -> None:
+    """Concurrent readers and writers under each storage profile."""
+    read = {"query": "SELECT COUNT(*), AVG(age) FROM people WHERE age > 40"}
+    insert = {"query": "INSERT INTO people (name, age, profession) VALUES ('Bench', 33, 'Tester')"}
+
+    async def mixed():
+        async def reader():
+            results = []
+            for _ in range(args.calls):
+                results.append(await server.read_data(**read))
+            return results
+
+        async def writer():
+            return [await server.add_data(**insert) for _ in range(args.calls)]
+
+        started = time.perf_counter()
+        reads, writes = await asyncio.gather(
+            asyncio.gather(*(reader() for _ in range(args.readers))),
+            asyncio.gather(*(writer() for _ in range(args.writers))),
+        )
+        elapsed = time.perf_counter() - started
+        failed_reads = sum(1 for batch in reads for rows in batch if not rows)
+        failed_writes = sum(1 for batch in writes for ok in batch if not ok)
+        return elapsed, failed_reads, failed_writes
+
+    print(
+        f"{args.readers} readers + {args.writers} writers x {args.calls} calls, "
+        f"{args.rows} rows"
+    )
+    for name in PROFILES:
+        with temp_server(args.rows, args.pool_size, args.workers, profile=name):
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, failed_reads, failed_writes = asyncio.run(mixed())
+            total = (args.readers + args.writers) * args.calls
+            print(
+                f"{name:<12} {total / elapsed:>9.1f} calls/s   "
+                f"failed reads={failed_reads}   failed writes={failed_writes}   "
+                f"writer={server._writer.stats().commits} commits"
+            )
+
+
+def bench_group_commit(args) -> None:
+    """Concurrent add_data calls with one commit per row vs. group commit."""
+    good = {"query": "INSERT INTO people (name, age, profession) VALUES ('Bench', 33, 'Tester')"}
+    bad = {"query": "INSERT INTO people (name) VALUES ('Missing columns')"}
+
+    async def writers():
+        async def writer(index):
+            results = []
+            for call in range(args.calls):
+                # Every 10th call fails, to show per-caller results in a batch
+                arguments = bad if (index + call) % 10 == 0 else good
+                results.append(await server.add_data(**arguments))
+            return results
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(writer(i) for i in range(args.writers)))
+        return time.perf_counter() - started, [ok for batch in results for ok in batch]
+
+    print(f"{args.writers} writers x {args.calls} inserts, profile {args.profile}")
+    runs = (
+        ("commit per row", 0.0, 1),
+        (f"group commit {args.window_ms}ms/{args.batch_size}", args.window_ms / 1000, args.batch_size),
+    )
+    for label, window, batch in runs:
+        with temp_server(0, 2, 2, profile=args.profile, commit_window=window, max_batch=batch):
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, results = asyncio.run(writers())
+            stats = server._writer.stats()
+            with server._pool.connection() as conn:
+                stored = conn.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+            print(
+                f"{label:<28} {len(results) / elapsed:>9.1f} inserts/s   "
+                f"ok={sum(results)} failed={len(results) - sum(results)} stored={stored}   "
+                f"commits={stats.commits}"
+            )
+            print(f"{'':<28} batch sizes: {stats.batch_size_histogram}")
+
+
+def bench_statements(args) -> None:
+    """Literal-heavy read_data queries with and without the statement cache."""
+    rng = random.Random(7)
+    shapes = {
+        "point lookup": lambda: f"SELECT * FROM people WHERE id = {rng.randint(1, args.rows)}",
+        "filtered scan": lambda: (
+            f"SELECT name, age FROM people WHERE profession = '{rng.choice(PROFESSIONS)}' "
+            f"AND age > {rng.randint(18, 90)} LIMIT 5"
+        ),
+        "id range aggregate": lambda: (
+            f"SELECT profession, COUNT(*), AVG(age) FROM people "
+            f"WHERE id BETWEEN {rng.randint(1, 1000)} AND {rng.randint(1001, 1100)} "
+            f"GROUP BY profession ORDER BY 2 DESC"
+        ),
+        "banded lookup": lambda: (
+            "SELECT name, age, profession, "
+            "CASE WHEN age < 30 THEN 'young' WHEN age < 60 THEN 'adult' ELSE 'senior' END AS band, "
+            "upper(substr(name, 1, 3)) || '-' || profession AS tag "
+            f"FROM people WHERE id IN ({', '.join(str(rng.randint(1, args.rows)) for _ in range(5))})"
+        ),
+        "ranked self-join": lambda: (
+            "WITH ranked AS (SELECT id, name, age, profession, "
+            "rank() OVER (PARTITION BY profession ORDER BY age DESC) AS r FROM people "
+            f"WHERE id BETWEEN {(start := rng.randint(1, args.rows - 200))} AND {start + 200}) "
+            "SELECT a.name, b.name, a.profession FROM ranked a JOIN ranked b "
+            "ON a.profession = b.profession AND b.r = a.r + 1 WHERE a.r <= 3"
+        ),
+        "repeated latest": lambda: "SELECT * FROM people ORDER BY id DESC LIMIT 1",
+    }
+    workload = {shape: [make() for _ in range(args.queries)] for shape, make in shapes.items()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        seed = SQLitePool(db_path, size=1, profile=get_profile("wal"))
+        seed_people(seed, args.rows)
+        seed.close()
+        print(f"{args.queries} queries per shape, {args.rows} rows, capacity {args.capacity}")
+
+        for shape, queries in workload.items():
+            timings = {}
+            for label, capacity in (("cold", 0), ("cached", args.capacity)):
+                cache = StatementCache(capacity=capacity)
+                pool = SQLitePool(db_path, size=1, profile=get_profile("wal"), statement_cache=cache)
+                with pool.connection() as conn:
+                    started = time.perf_counter()
+                    for query in queries:
+                        cache.execute(conn, query).fetchall()
+                    timings[label] = (time.perf_counter() - started) / len(queries) * 1e6
+                pool.close()
+            print(
+                f"{shape:<20} cold={timings['cold']:>9.1f} us/query   "
+                f"cached={timings['cached']:>9.1f} us/query   "
+                f"hit_rate={cache.stats().hit_rate:.3f}"
+            )
+
+
+def bench_result_cache(args) -> None:
+    """A conversation-like mix of repeated reads and occasional writes."""
+    rng = random.Random(11)
+    reads = [
+        "SELECT * FROM people ORDER BY id DESC LIMIT 1",
+        "SELECT profession, COUNT(*), AVG(age) FROM people GROUP BY profession",
+        "SELECT name, age FROM people WHERE profession = 'Doctor' AND age > 80",
+        "SELECT COUNT(*) FROM people WHERE age BETWEEN 30 AND 40",
+    ]
+    insert = {"query": "INSERT INTO people (name, age, profession) VALUES ('Bench', 33, 'Tester')"}
+    # One shuffled sequence, shared by both runs
+    calls = [
+        insert if rng.random() < args.write_ratio else {"query": rng.choice(reads)}
+        for _ in range(args.calls)
+    ]
+
+    async def conversation():
+        latencies = []
+        started = time.perf_counter()
+        for arguments in calls:
+            call_started = time.perf_counter()
+            if arguments is insert:
+                await server.add_data(**arguments)
+            else:
+                await server.read_data(**arguments)
+            latencies.append(time.perf_counter() - call_started)
+        return latencies, time.perf_counter() - started
+
+    print(f"{args.calls} calls, {args.write_ratio:.0%} writes, {args.rows} rows")
+    for label, capacity in (("no result cache", 0), (f"result cache {args.capacity}", args.capacity)):
+        with temp_server(args.rows, 4, 4, result_cache_size=capacity):
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, elapsed = asyncio.run(conversation())
+            report(label, latencies, elapsed)
+            if capacity:
+                print(f"{'':<36} {server._result_cache.stats().as_dict()}")
+
+
+def bench_indexes(args) -> None:
+    """The documented read_data examples without and with the default indexes."""
+    queries = [
+        "SELECT name, age FROM people WHERE age > 85",
+        "SELECT * FROM people ORDER BY age DESC LIMIT 10",
+        "SELECT * FROM people WHERE profession = 'Doctor' AND age > 88",
+        "SELECT id FROM people WHERE name = 'Person 4242'",
+    ]
+
+    async def run(query):
+        started = time.perf_counter()
+        for _ in range(args.calls):
+            await server.read_data(query)
+        return (time.perf_counter() - started) / args.calls * 1000
+
+    print(f"{args.calls} calls per query, {args.rows} rows")
+    with temp_server(args.rows, 1, 1):
+        timings = {}
+        with server._pool.connection() as conn:
+            for statement in PEOPLE_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {statement.split()[5]}")
+            conn.commit()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for query in queries:
+                timings[query] = [asyncio.run(run(query))]
+        with server._pool.connection() as conn:
+            for statement in PEOPLE_INDEXES:
+                conn.execute(statement)
+            conn.commit()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for query in queries:
+                timings[query].append(asyncio.run(run(query)))
+        for query, (unindexed, indexed) in timings.items():
+            print(f"{query:<62} no index={unindexed:>8.2f}ms   indexed={indexed:>8.2f}ms")
+
+
+def bench_read_pool(args) -> None:
+    """N concurrent readers and one steady writer, reading through each pool mode."""
+    read = {"query": "SELECT profession, COUNT(*), AVG(age) FROM people WHERE age > 30 GROUP BY profession"}
+    insert = {"query": "INSERT INTO people (name, age, profession) VALUES ('Bench', 33, 'Tester')"}
+
+    async def mixed():
+        done = asyncio.Event()
+        read_latencies, write_latencies = [], []
+
+        async def reader():
+            while not done.is_set():
+                started = time.perf_counter()
+                await server.read_data(**read)
+                read_latencies.append(time.perf_counter() - started)
+
+        async def writer():
+            # One insert per interval, measured from its scheduled time
+            scheduled = time.perf_counter()
+            for _ in range(args.writes):
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                await server.add_data(**insert)
+                write_latencies.append(time.perf_counter() - scheduled)
+                scheduled = max(scheduled + args.interval, time.perf_counter())
+            done.set()
+
+        started = time.perf_counter()
+        await asyncio.gather(writer(), *(reader() for _ in range(args.readers)))
+        return read_latencies, write_latencies, time.perf_counter() - started
+
+    print(
+        f"{args.readers} readers + 1 writer ({args.writes} inserts every "
+        f"{args.interval * 1000:.0f}ms), {args.rows} rows"
+    )
+    for profile in ("rollback", "wal"):
+        for mode in ("shared", "ro"):
+            with temp_server(args.rows, args.pool_size, args.readers + 1, profile=profile, read_pool=mode):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    reads, writes, elapsed = asyncio.run(mixed())
+                report(f"{profile}/{mode} reads", reads, elapsed)
+                report(f"{profile}/{mode} writes", writes, elapsed)
+
+
+def bench_serialization(args) -> None:
+    """Serialization time and wire size of read_data results per result format."""
+
+    async def measure(arguments):
+        # The first call fills the result cache, so the loop measures serialization
+        await server.mcp.call_tool("read_data", arguments)
+        started = time.perf_counter()
+        for _ in range(args.calls):
+            content = await server.mcp.call_tool("read_data", arguments)
+            wire = CallToolResult(content=list(content), isError=False).model_dump_json(
+                by_alias=True, exclude_none=True
+            )
+        elapsed = (time.perf_counter() - started) / args.calls * 1000
+        return elapsed, len(wire.encode("utf-8")), len(content)
+
+    for rows in args.rows:
+        with temp_server(rows, 1, 1, result_cache_size=8):
+            print(f"{rows} rows")
+            for result_format in ("rows", "columnar", "binary", "summary"):
+                arguments = {"query": "SELECT * FROM people", "result_format": result_format}
+                with contextlib.redirect_stdout(io.StringIO()):
+                    elapsed, size, items = asyncio.run(measure(arguments))
+                print(
+                    f"  {result_format:<10} {elapsed:>9.2f} ms/call   "
+                    f"{size:>11,} bytes   {items:>7} content items"
+                )
+
+
+@contextlib.contextmanager
+def server_process(rows: int, processes: int, port: int, extra: list = (), server_type: str = "sse"):
+    """Run `server.py` as a subprocess on a seeded temporary database; yields its base URL."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLitePool(os.path.join(tmp, 'data', 'demo.db'), size=1)
+        seed_people(pool, rows)
+        pool.close()
+        process = subprocess.Popen(
+            [
+                sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py'),
+                "--server_type", server_type, "--host", "127.0.0.1", "--port", str(port),
+                "--processes", str(processes), *extra,
+            ],
+            cwd=tmp,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 60
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"server.py exited with code {process.returncode}")
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError("server.py did not start within 60s")
+                    time.sleep(0.2)
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            # SIGINT lets the router stop its workers
+            process.send_signal(signal.SIGINT)
+            try:
+                process.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def run_sse_clients(url: str, tool: str, arguments: dict, clients: int, calls: int):
+    """Concurrent MCP clients, each with its own SSE session, calling one tool.
+
+    The clock starts once every session is connected and initialized.
+    """
+    latencies = []
+    connected = 0
+    ready = asyncio.Event()
+
+    async def client():
+        nonlocal connected
+        async with sse_client(url) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                connected += 1
+                if connected == clients:
+                    ready.set()
+                await ready.wait()
+                for _ in range(calls):
+                    started = time.perf_counter()
+                    result = await session.call_tool(tool, arguments)
+                    if result.isError:
+                        raise RuntimeError(result.content[0].text)
+                    latencies.append(time.perf_counter() - started)
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    waiter = asyncio.create_task(ready.wait())
+    await asyncio.wait(tasks + [waiter], return_when=asyncio.FIRST_COMPLETED)
+    if not ready.is_set():
+        # A client failed to connect; surface its error
+        waiter.cancel()
+        await asyncio.gather(*tasks)
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return latencies, time.perf_counter() - started
+
+
+def bench_processes(args) -> None:
+    """Throughput of SSE clients against 1..N server processes behind the session router."""
+    arguments = {"query": f"SELECT * FROM people LIMIT {args.limit}"}
+    # Every SSE connection and POST is logged at INFO otherwise
+    for name in ("httpx", "mcp.client.sse"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    print(
+        f"{args.clients} SSE clients x {args.calls} read_data calls ({args.limit} rows each), "
+        f"{args.rows} rows, {os.cpu_count()} CPUs"
+    )
+    for processes in args.processes:
+        with server_process(args.rows, processes, args.port, ["--no_result_cache"]) as url:
+            latencies, elapsed = asyncio.run(
+                run_sse_clients(url + "/sse", "read_data", arguments, args.clients, args.calls)
+            )
+        report(f"{processes} process(es)", latencies, elapsed)
+
+
+def bench_transports(args) -> None:
+    """Per-call latency of a session per call vs. a persistent SSE session vs. streamable HTTP."""
+    arguments = {"query": "SELECT COUNT(*) FROM people"}
+    for name in ("httpx", "mcp.client.sse"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    async def measure(client):
+        latencies = []
+
+        async def caller():
+            for _ in range(args.calls):
+                started = time.perf_counter()
+                result = await client.call_tool("read_data", arguments)
+                if result.isError:
+                    raise RuntimeError(result.content[0].text)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+        if hasattr(client, "aclose"):
+            await client.aclose()
+        return latencies, elapsed
+
+    print(f"{args.clients} clients x {args.calls} read_data calls")
+    for server_type, path, label, make_client in (
+        ("sse", "/sse", "sse (BasicMCPClient)", BasicMCPClient),
+        ("sse", "/sse", "sse (persistent session)", make_mcp_client),
+        ("streamable-http", "/mcp", "streamable-http (pooled)", make_mcp_client),
+    ):
+        with server_process(args.rows, 1, args.port, [], server_type) as url:
+            client = make_client(url + path)
+            latencies, elapsed = asyncio.run(measure(client))
+        report(label, latencies, elapsed)
+
+
+def openai_standin_app(reply, delay: float = 0.0) -> Starlette:
+    """
+    Stand-in for an OpenAI-compatible chat completions endpoint.
+
+    `reply(body)` returns the assistant message (a dict with `content`
+    and/or `tool_calls`) for a request body. Answers plain and streamed
+    requests at `/openai/deployments/{deployment}/chat/completions` (Azure)
+    and `/v1/chat/completions`, after `delay` seconds. `app.state.connections`
+    collects the client address of every request, one per TCP connection.
+    """
+
+    async def completions(request: Request) -> Response:
+        body = await request.json()
+        request.app.state.connections.add(request.client)
+        request.app.state.requests += 1
+        if delay:
+            await asyncio.sleep(delay)
+        message = {"role": "assistant", "content": None, **reply(body)}
+        finish = "tool_calls" if message.get("tool_calls") else "stop"
+        created = int(time.time())
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": "chatcmpl-standin", "object": "chat.completion", "created": created,
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            })
+
+        def chunk(delta: dict, finish_reason=None) -> str:
+            return "data: " + json.dumps({
+                "id": "chatcmpl-standin", "object": "chat.completion.chunk", "created": created,
+                "model": body.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": message["content"] or ""})
+            for index, call in enumerate(message.get("tool_calls") or []):
+                yield chunk({"tool_calls": [{"index": index, **call}]})
+            yield chunk({}, finish)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app = Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", completions, methods=["POST"]),
+        Route("/v1/chat/completions", completions, methods=["POST"]),
+    ])
+    app.state.connections = set()
+    app.state.requests = 0
+    return app
+
+
+@contextlib.contextmanager
+def serve_in_thread(app, port: int):
+    """Run an ASGI app with uvicorn on a background thread; yields its base URL."""
+    uvicorn_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not uvicorn_server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError(f"Stand-in server did not start on port {port}")
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        uvicorn_server.should_exit = True
+        thread.join(timeout=10)
+
+
+def bench_llm_clients(args) -> None:
+    """Per-session LLM clients vs. the shared client registry against a stand-in endpoint."""
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app = openai_standin_app(lambda body: {"content": "ok"}, delay=args.delay_ms / 1000)
+    messages = [ChatMessage(role="user", content="Hello")]
+
+    def run(url: str, registry) -> tuple:
+        latencies = []
+
+        def session():
+            # What each Streamlit session does: setup_llm() once, then chat
+            if registry is not None:
+                http_client, async_http_client = registry.clients(f"{url}/gpt-4o")
+            else:
+                http_client = async_http_client = None
+            llm = AzureOpenAI(
+                model="gpt-4o", deployment_name="gpt-4o", api_key="standin",
+                azure_endpoint=url, api_version="2024-02-15-preview",
+                http_client=http_client, async_http_client=async_http_client,
+            )
+
+            async def chat():
+                for _ in range(args.calls):
+                    started = time.perf_counter()
+                    response = await llm.achat(messages)
+                    if response.message.content != "ok":
+                        raise RuntimeError(f"Unexpected reply: {response.message.content!r}")
+                    latencies.append(time.perf_counter() - started)
+
+            # Its own event loop, like every browser session
+            asyncio.run(chat())
+
+        app.state.connections.clear()
+        threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, time.perf_counter() - started
+
+    print(
+        f"{args.sessions} sessions x {args.calls} chat calls, "
+        f"{args.delay_ms:g} ms stand-in latency"
+    )
+    with serve_in_thread(app, args.port) as url:
+        latencies, elapsed = run(url, None)
+        report("client per session", latencies, elapsed)
+        print(f"{'':<36} {len(app.state.connections)} connections")
+        registry = LLMClientRegistry(max_connections=args.max_connections)
+        latencies, elapsed = run(url, registry)
+        report("shared registry", latencies, elapsed)
+        print(f"{'':<36} {len(app.state.connections)} connections, {registry.stats()[f'{url}/gpt-4o']}")
+
+
+def bench_parallel_tools(args) -> None:
+    """Agent turn latency with sequential vs. parallel tool calls, using a stand-in LLM."""
+    for name in ("httpx", "mcp.client.sse"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    def tool_calls(workload: str) -> list:
+        reads = [
+            ("read_data", {"query": f"SELECT * FROM people WHERE id = {i + 1}"})
+            for i in range(args.calls)
+        ]
+        writes = [
+            ("add_data", {"query": f"INSERT INTO people (name, age, profession) VALUES ('Bench {i}', 30, 'Engineer')"})
+            for i in range(args.calls)
+        ]
+        if workload == "reads":
+            calls = reads
+        elif workload == "writes":
+            calls = writes
+        else:
+            # Writes, then reads that must see them
+            calls = writes[: args.calls // 2] + reads[: args.calls - args.calls // 2]
+        return [
+            {"id": f"call_{i}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+            for i, (name, arguments) in enumerate(calls)
+        ]
+
+    workload = {"name": "reads"}
+
+    def reply(body: dict) -> dict:
+        # One turn: all tool calls at once, then a final answer
+        if body["messages"][-1]["role"] == "tool":
+            return {"content": "done"}
+        return {"tool_calls": tool_calls(workload["name"])}
+
+    app = openai_standin_app(reply, delay=args.llm_delay_ms / 1000)
+
+    class RemoteClient:
+        """MCP client adding a network round-trip to every tool call and logging its start and end."""
+
+        def __init__(self, client, rtt: float):
+            self.client = client
+            self.rtt = rtt
+            self.log = []
+
+        async def list_tools(self):
+            return await self.client.list_tools()
+
+        async def call_tool(self, tool_name: str, arguments: dict):
+            self.log.append(("start", arguments["query"]))
+            await asyncio.sleep(self.rtt)
+            try:
+                return await self.client.call_tool(tool_name, arguments)
+            finally:
+                self.log.append(("end", arguments["query"]))
+
+    def out_of_order(log: list, calls: list) -> int:
+        """Reads started before an earlier write had finished, or writes before an earlier read."""
+        position = {json.loads(call["function"]["arguments"])["query"]: index for index, call in enumerate(calls)}
+        writes = {index for index, call in enumerate(calls) if call["function"]["name"] == "add_data"}
+        running, violations = set(range(len(calls))), 0
+        for event, query in log:
+            index = position[query]
+            if event == "end":
+                running.discard(index)
+            elif any(earlier < index and (earlier in writes) != (index in writes) for earlier in running):
+                violations += 1
+        return violations
+
+    registry = LLMClientRegistry()
+
+    async def turns(url: str, mcp_url: str, rtt: float, make_agent) -> tuple:
+        client = make_mcp_client(mcp_url)
+        remote = RemoteClient(client, rtt)
+        tools = await McpToolSpec(client=remote).to_tool_list_async()
+        # The registry's clients outlive this asyncio.run() loop
+        http_client, async_http_client = registry.clients(url)
+        llm = AzureOpenAI(
+            model="gpt-4o", deployment_name="gpt-4o", api_key="standin",
+            azure_endpoint=url, api_version="2024-02-15-preview",
+            http_client=http_client, async_http_client=async_http_client,
+        )
+        agent = make_agent(tools, llm)
+        calls = tool_calls(workload["name"])
+        latencies, violations = [], 0
+        for _ in range(args.turns):
+            remote.log = []
+            started = time.perf_counter()
+            response = await agent.run("Run the tools", ctx=Context(agent))
+            if str(response) != "done":
+                raise RuntimeError(f"Unexpected reply: {response}")
+            latencies.append(time.perf_counter() - started)
+            violations += out_of_order(remote.log, calls) > 0
+        await client.aclose()
+        return latencies, violations
+
+    agents = (
+        (
+            "sequential",
+            lambda tools, llm: ParallelFunctionAgent(tools=tools, llm=llm, max_parallel_tool_calls=1),
+        ),
+        ("FunctionAgent", lambda tools, llm: FunctionAgent(tools=tools, llm=llm)),
+        (
+            f"x{args.max_parallel} grouped",
+            lambda tools, llm: ParallelFunctionAgent(
+                tools=tools, llm=llm, max_parallel_tool_calls=args.max_parallel, write_order="grouped"
+            ),
+        ),
+        (
+            f"x{args.max_parallel} serial",
+            lambda tools, llm: ParallelFunctionAgent(
+                tools=tools, llm=llm, max_parallel_tool_calls=args.max_parallel, write_order="serial"
+            ),
+        ),
+    )
+    print(
+        f"{args.turns} turns of {args.calls} tool calls, {args.rows} rows, "
+        f"{args.llm_delay_ms:g} ms stand-in LLM latency, turns/s below"
+    )
+    with serve_in_thread(app, args.llm_port) as url, server_process(
+        args.rows, 1, args.port, ["--no_result_cache"]
+    ) as mcp_url:
+        for rtt_ms in args.rtt_ms:
+            for name in args.workloads:
+                workload["name"] = name
+                for label, make_agent in agents:
+                    latencies, violations = asyncio.run(
+                        turns(url, mcp_url + "/sse", rtt_ms / 1000, make_agent)
+                    )
+                    report(f"{name}, {rtt_ms:g} ms RTT: {label}", latencies, sum(latencies))
+                    if violations:
+                        print(f"{'':<36} {violations}/{args.turns} turns ran a read and a write out of order")
+
+
+def bench_tool_catalog(args) -> None:
+    """Client start-up: building the agent's tools and listing them, with and without the catalog cache."""
+    for name in ("httpx", "mcp.client.sse"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    async def start(make_spec):
+        # What azure_client.main() does before the first message
+        started = time.perf_counter()
+        client = make_mcp_client(url + path)
+        spec = make_spec(client)
+        await spec.to_tool_list_async()
+        await spec.to_tool_list_async()
+        elapsed = time.perf_counter() - started
+        if hasattr(spec, "wait_revalidation"):
+            # The catalog file is checked against the server in the background
+            await spec.wait_revalidation()
+        if hasattr(client, "aclose"):
+            await client.aclose()
+        return elapsed
+
+    def measure(make_spec, before=None):
+        latencies = []
+        for _ in range(args.starts):
+            if before is not None:
+                before()
+            latencies.append(asyncio.run(start(make_spec)))
+        return latencies, sum(latencies)
+
+    print(f"{args.starts} client starts against {args.server_type}, tool list fetched for the agent and the listing")
+    path = "/sse" if args.server_type == "sse" else "/mcp"
+    with tempfile.TemporaryDirectory() as tmp, server_process(
+        args.rows, 1, args.port, [], args.server_type
+    ) as url:
+        catalog = os.path.join(tmp, "tool_catalog.json")
+
+        def clear():
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(catalog)
+
+        report("McpToolSpec", *measure(lambda client: McpToolSpec(client=client)))
+        report(
+            "cached, no catalog file",
+            *measure(lambda client: CachedMcpToolSpec(client=client, path=catalog), clear),
+        )
+        report(
+            "cached, catalog file",
+            *measure(lambda client: CachedMcpToolSpec(client=client, path=catalog)),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    concurrency = subparsers.add_parser(
+        "concurrency", help="Concurrent-client throughput of blocking vs. async tools"
+    )
+    concurrency.add_argument("--rows", type=int, default=200_000)
+    concurrency.add_argument("--clients", type=int, default=16)
+    concurrency.add_argument("--calls", type=int, default=10)
+    concurrency.add_argument("--pool_size", type=int, default=4)
+    concurrency.add_argument("--workers", type=int, default=4)
+    concurrency.add_argument(
+        "--interval", type=float, default=0.02,
+        help="Seconds between calls of the interactive client",
+    )
+    concurrency.set_defaults(func=bench_concurrency)
+
+    storage = subparsers.add_parser(
+        "storage", help="Concurrent readers and writers under each storage profile"
+    )
+    storage.add_argument("--rows", type=int, default=100_000)
+    storage.add_argument("--readers", type=int, default=8)
+    storage.add_argument("--writers", type=int, default=4)
+    storage.add_argument("--calls", type=int, default=25)
+    storage.add_argument("--pool_size", type=int, default=8)
+    storage.add_argument("--workers", type=int, default=8)
+    storage.set_defaults(func=bench_storage)
+
+    group_commit = subparsers.add_parser(
+        "group_commit", help="add_data throughput with and without group commit"
+    )
+    group_commit.add_argument("--writers", type=int, default=32)
+    group_commit.add_argument("--calls", type=int, default=20)
+    group_commit.add_argument("--window_ms", type=float, default=2.0)
+    group_commit.add_argument("--batch_size", type=int, default=64)
+    group_commit.add_argument("--profile", default="wal_durable", choices=list(PROFILES))
+    group_commit.set_defaults(func=bench_group_commit)
+
+    statements = subparsers.add_parser(
+        "statements", help="Cold vs. cached execution of repeated query shapes"
+    )
+    statements.add_argument("--rows", type=int, default=1_000_000)
+    statements.add_argument("--queries", type=int, default=5_000)
+    statements.add_argument("--capacity", type=int, default=128)
+    statements.set_defaults(func=bench_statements)
+
+    result_cache = subparsers.add_parser(
+        "result_cache", help="Repeated read_data calls with and without the result cache"
+    )
+    result_cache.add_argument("--rows", type=int, default=200_000)
+    result_cache.add_argument("--calls", type=int, default=2_000)
+    result_cache.add_argument("--write_ratio", type=float, default=0.05)
+    result_cache.add_argument("--capacity", type=int, default=256)
+    result_cache.set_defaults(func=bench_result_cache)
+
+    indexes = subparsers.add_parser(
+        "indexes", help="Example read_data queries with and without the default indexes"
+    )
+    indexes.add_argument("--rows", type=int, default=500_000)
+    indexes.add_argument("--calls", type=int, default=20)
+    indexes.set_defaults(func=bench_indexes)
+
+    read_pool = subparsers.add_parser(
+        "read_pool", help="Concurrent readers and one writer with shared vs. read-only pools"
+    )
+    read_pool.add_argument("--rows", type=int, default=100_000)
+    read_pool.add_argument("--readers", type=int, default=8)
+    read_pool.add_argument("--writes", type=int, default=50)
+    read_pool.add_argument("--interval", type=float, default=0.02)
+    read_pool.add_argument("--pool_size", type=int, default=8)
+    read_pool.set_defaults(func=bench_read_pool)
+
+    serialization = subparsers.add_parser(
+        "serialization", help="read_data serialization time and payload size per result format"
+    )
+    serialization.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000])
+    serialization.add_argument("--calls", type=int, default=20)
+    serialization.set_defaults(func=bench_serialization)
+
+    processes = subparsers.add_parser(
+        "processes", help="SSE clients against 1..N server processes behind the session router"
+    )
+    processes.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    processes.add_argument("--clients", type=int, default=16)
+    processes.add_argument("--calls", type=int, default=20)
+    processes.add_argument("--rows", type=int, default=10_000)
+    processes.add_argument("--limit", type=int, default=100)
+    processes.add_argument("--port", type=int, default=8750)
+    processes.set_defaults(func=bench_processes)
+
+    transports = subparsers.add_parser(
+        "transports", help="SSE client vs. pooled streamable HTTP client latency"
+    )
+    transports.add_argument("--clients", type=int, default=4)
+    transports.add_argument("--calls", type=int, default=50)
+    transports.add_argument("--rows", type=int, default=1_000)
+    transports.add_argument("--port", type=int, default=8750)
+    transports.set_defaults(func=bench_transports)
+
+    tool_catalog = subparsers.add_parser(
+        "tool_catalog", help="Client start-up time with and without the tool catalog cache"
+    )
+    tool_catalog.add_argument("--starts", type=int, default=20)
+    tool_catalog.add_argument("--server_type", default="sse", choices=["sse", "streamable-http"])
+    tool_catalog.add_argument("--rows", type=int, default=1_000)
+    tool_catalog.add_argument("--port", type=int, default=8750)
+    tool_catalog.set_defaults(func=bench_tool_catalog)
+
+    parallel_tools = subparsers.add_parser(
+        "parallel_tools", help="Agent turn latency with sequential vs. parallel tool calls"
+    )
+    parallel_tools.add_argument("--calls", type=int, default=6, help="Tool calls per LLM turn")
+    parallel_tools.add_argument("--turns", type=int, default=10)
+    parallel_tools.add_argument("--max_parallel", type=int, default=4)
+    parallel_tools.add_argument(
+        "--workloads", nargs="+", default=["reads", "writes", "mixed"], choices=["reads", "writes", "mixed"]
+    )
+    parallel_tools.add_argument("--rows", type=int, default=50_000)
+    parallel_tools.add_argument("--llm_delay_ms", type=float, default=20.0)
+    parallel_tools.add_argument(
+        "--rtt_ms", type=float, nargs="+", default=[0.0, 20.0],
+        help="Simulated network round-trip added to each tool call",
+    )
+    parallel_tools.add_argument("--llm_port", type=int, default=8761)
+    parallel_tools.add_argument("--port", type=int, default=8750)
+    parallel_tools.set_defaults(func=bench_parallel_tools)
+
+    llm_clients = subparsers.add_parser(
+        "llm_clients", help="LLM HTTP clients per session vs. shared, against a stand-in endpoint"
+    )
+    llm_clients.add_argument("--sessions", type=int, default=20)
+    llm_clients.add_argument("--calls", type=int, default=10)
+    llm_clients.add_argument("--delay_ms", type=float, default=20.0)
+    llm_clients.add_argument("--max_connections", type=int, default=8)
+    llm_clients.add_argument("--port", type=int, default=8760)
+    llm_clients.set_defaults(func=bench_llm_clients)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
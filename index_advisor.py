@@ -0,0 +1,287 @@
+"""
+Index Advisor
+
+Records the `EXPLAIN QUERY PLAN` of the queries that pass through
+`read_data`, grouped by their normalized SQL, and flags the ones that scan a
+whole table once that table has grown past a row threshold. For flagged
+queries it suggests an index built from the scanned table's columns used in
+the WHERE clause (equality comparisons first, then one range comparison) or,
+failing that, in the ORDER BY clause.
+
+Plans are explained once per query shape and again after the schema
+changes, so recording a query that was already seen only costs a schema
+version check and a dict lookup.
+
+    advisor = IndexAdvisor(min_rows=1000)
+    advisor.record(conn, "SELECT * FROM people WHERE profession = 'Doctor' ORDER BY age")
+    for entry in advisor.report(conn):
+        print(entry["query"], entry["recommendation"])
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from statement_cache import normalize_sql
+
+__all__ = [
+    "DEFAULT_INDEX_ADVISOR_MIN_ROWS",
+    "DEFAULT_INDEX_ADVISOR_SIZE",
+    "IndexAdvisor",
+    "QueryPlan",
+]
+
+# Full scans of tables smaller than this are not worth an index
+DEFAULT_INDEX_ADVISOR_MIN_ROWS = int(os.getenv("INDEX_ADVISOR_MIN_ROWS", "1000"))
+
+# Number of distinct query shapes remembered, least recently seen evicted first
+DEFAULT_INDEX_ADVISOR_SIZE = int(os.getenv("INDEX_ADVISOR_SIZE", "500"))
+
+# "SCAN people", "SCAN p USING INDEX idx", "SEARCH people USING INDEX idx (age>?)"
+_PLAN_STEP = re.compile(
+    r"^(?P<op>SCAN|SEARCH) (?:TABLE )?(?P<name>\S+)(?: AS \S+)?"
+    r"(?: USING (?P<using>COVERING INDEX|INDEX|INTEGER PRIMARY KEY|PRIMARY KEY|AUTOMATIC))?"
+)
+
+_TABLE_REFERENCE = re.compile(
+    r"\b(?:FROM|JOIN)\s+[\"`\[]?(?P<table>\w+)[\"`\]]?"
+    r"(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|USING|GROUP|ORDER|LIMIT|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|UNION|EXCEPT|INTERSECT|WINDOW|HAVING)\b)(?P<alias>\w+))?",
+    re.IGNORECASE,
+)
+
+_WHERE_CLAUSE = re.compile(
+    r"\bWHERE\b(?P<clause>.*?)(?=\b(?:GROUP\s+BY|ORDER\s+BY|LIMIT|HAVING|WINDOW|UNION|EXCEPT|INTERSECT)\b|\)|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+_ORDER_BY_CLAUSE = re.compile(
+    r"\bORDER\s+BY\b(?P<clause>.*?)(?=\bLIMIT\b|\)|$)", re.IGNORECASE | re.DOTALL
+)
+
+_COMPARISON = re.compile(
+    r"(?:\b\w+\.)?\b(?P<column>\w+)\b\s*(?P<op>==|=|\bIS\b|\bIN\b|<=|>=|<|>|\bBETWEEN\b)",
+    re.IGNORECASE,
+)
+
+_EQUALITY_OPERATORS = {"=", "==", "IS", "IN"}
+
+
+@dataclass
+class QueryPlan:
+    """What the advisor knows about one query shape."""
+
+    query: str
+    calls: int = 0
+    plan: List[str] = field(default_factory=list)
+    # Real tables that the plan reads in full
+    full_scans: List[str] = field(default_factory=list)
+    recommendation: Optional[str] = None
+    schema_version: int = -1
+
+    def as_dict(self) -> dict:
+        plan = asdict(self)
+        del plan["schema_version"]
+        return plan
+
+
+def _table_aliases(sql: str) -> dict:
+    """Map every table name and alias in `sql` to its table name (lower case)."""
+    aliases = {}
+    for match in _TABLE_REFERENCE.finditer(sql):
+        table = match.group("table").lower()
+        aliases[table] = table
+        if match.group("alias"):
+            aliases[match.group("alias").lower()] = table
+    return aliases
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1].lower() for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+
+def _indexed_prefixes(conn: sqlite3.Connection, table: str) -> List[tuple]:
+    """Column lists of the existing indexes on `table`."""
+    prefixes = []
+    for index in conn.execute(f'PRAGMA index_list("{table}")').fetchall():
+        columns = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+        prefixes.append(tuple(str(column[2]).lower() for column in columns))
+    return prefixes
+
+
+def _recommend(conn: sqlite3.Connection, sql: str, table: str) -> Optional[str]:
+    """Suggest a CREATE INDEX statement that would avoid the scan of `table`."""
+    columns = set(_table_columns(conn, table)) - {"id", "rowid"}
+    equality, ranges = [], []
+    where = _WHERE_CLAUSE.search(sql)
+    if where:
+        for match in _COMPARISON.finditer(where.group("clause")):
+            column = match.group("column").lower()
+            if column not in columns or column in equality or column in ranges:
+                continue
+            if match.group("op").upper() in _EQUALITY_OPERATORS:
+                equality.append(column)
+            else:
+                ranges.append(column)
+    # An OR of conditions cannot use one composite index
+    if where and re.search(r"\bOR\b", where.group("clause"), re.IGNORECASE):
+        equality, ranges = [], []
+
+    key = equality + ranges[:1]
+    if not ranges:
+        order_by = _ORDER_BY_CLAUSE.search(sql)
+        if order_by:
+            # Only the leading sort column; "p.age DESC" -> "age"
+            first_term = order_by.group("clause").split(",")[0]
+            words = [
+                word.lower() for word in re.findall(r"\w+", first_term)
+                if word.upper() not in ("ASC", "DESC", "NULLS", "FIRST", "LAST")
+            ]
+            if words and words[-1] in columns and words[-1] not in key:
+                key.append(words[-1])
+    if not key:
+        return None
+
+    if any(prefix[: len(key)] == tuple(key) for prefix in _indexed_prefixes(conn, table)):
+        # An index already starts with these columns; the planner chose not to use it
+        return None
+    return f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(key)} ON {table} ({', '.join(key)})"
+
+
+class IndexAdvisor:
+    """
+    Collects query plans and recommends indexes for repeated full scans.
+
+    Args:
+        min_rows (int): Full scans of smaller tables are not flagged
+        capacity (int): Number of query shapes remembered. 0 disables the advisor.
+    """
+
+    def __init__(
+        self,
+        min_rows: int = DEFAULT_INDEX_ADVISOR_MIN_ROWS,
+        capacity: int = DEFAULT_INDEX_ADVISOR_SIZE,
+    ):
+        self.min_rows = min_rows
+        self.capacity = capacity
+        self._plans: "OrderedDict[str, QueryPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(
+        self, conn: sqlite3.Connection, sql: str, params: tuple = (), normalized: bool = False
+    ) -> Optional[QueryPlan]:
+        """
+        Count one execution of `sql` and explain it if its plan is not known.
+
+        Statements with inline literals are normalized first, unless
+        `normalized` says `sql` and `params` already come from
+        `normalize_sql`; already parameterized ones are explained with
+        `params`. Errors from EXPLAIN are ignored; the query itself reports
+        them.
+
+        Returns:
+            QueryPlan: The query shape's entry, or None if the advisor is disabled
+        """
+        if self.capacity == 0:
+            return None
+        if not params and not normalized:
+            sql, params = normalize_sql(sql)
+        normalized = " ".join(sql.split())
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with self._lock:
+            entry = self._plans.get(normalized)
+            if entry is None:
+                entry = self._plans[normalized] = QueryPlan(query=normalized)
+                if len(self._plans) > self.capacity:
+                    self._plans.popitem(last=False)
+            self._plans.move_to_end(normalized)
+            entry.calls += 1
+            if entry.schema_version == schema_version:
+                return entry
+            entry.schema_version = schema_version
+
+        try:
+            # sqlite3 caches compiled statements by text and a cached EXPLAIN
+            # is not recompiled after a schema change, so make the text unique
+            explain = f"EXPLAIN QUERY PLAN {normalized} /* schema {schema_version} */"
+            steps = [row[3] for row in conn.execute(explain, params)]
+            tables = {
+                row[0].lower()
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            aliases = _table_aliases(normalized)
+            full_scans = []
+            for step in steps:
+                match = _PLAN_STEP.match(step)
+                if not match or match.group("op") != "SCAN":
+                    continue
+                if match.group("using") == "COVERING INDEX":
+                    continue
+                table = aliases.get(match.group("name").lower())
+                if table in tables and table not in full_scans:
+                    full_scans.append(table)
+            recommendation = None
+            for table in full_scans:
+                recommendation = _recommend(conn, normalized, table)
+                if recommendation:
+                    break
+        except sqlite3.Error:
+            return entry
+
+        with self._lock:
+            entry.plan, entry.full_scans, entry.recommendation = steps, full_scans, recommendation
+        return entry
+
+    def report(
+        self,
+        conn: sqlite3.Connection,
+        flagged_only: bool = True,
+        min_rows: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Query shapes ordered by number of calls, with their plans.
+
+        Args:
+            conn (sqlite3.Connection): Connection used to size the scanned tables
+            flagged_only (bool): Only include full scans of tables with at
+                least `min_rows` rows
+            min_rows (int, optional): Overrides the advisor's threshold
+
+        Returns:
+            list: Dicts with query, calls, plan, full_scans, table_rows,
+                flagged and recommendation
+        """
+        min_rows = self.min_rows if min_rows is None else min_rows
+        with self._lock:
+            entries = [entry.as_dict() for entry in self._plans.values()]
+
+        row_counts = {}
+        for entry in entries:
+            for table in entry["full_scans"]:
+                if table not in row_counts:
+                    try:
+                        # max(rowid) is an O(log n) estimate of the table size
+                        row_counts[table] = conn.execute(
+                            f'SELECT max(rowid) FROM "{table}"'
+                        ).fetchone()[0] or 0
+                    except sqlite3.Error:
+                        row_counts[table] = 0
+            entry["table_rows"] = {table: row_counts[table] for table in entry["full_scans"]}
+            entry["flagged"] = any(rows >= min_rows for rows in entry["table_rows"].values())
+
+        if flagged_only:
+            entries = [entry for entry in entries if entry["flagged"]]
+        return sorted(entries, key=lambda entry: entry["calls"], reverse=True)
+
+    def recommendations(
+        self, conn: sqlite3.Connection, min_rows: Optional[int] = None
+    ) -> List[str]:
+        """Distinct CREATE INDEX statements for the flagged query shapes."""
+        statements = []
+        for entry in self.report(conn, min_rows=min_rows):
+            if entry["recommendation"] and entry["recommendation"] not in statements:
+                statements.append(entry["recommendation"])
+        return statements
@@ -0,0 +1,261 @@
+"""
+Shared LLM HTTP Clients
+
+`AzureOpenAI` creates its own httpx clients, so every `setup_llm()` call
+(one per Streamlit browser session) opens its own connections to the model
+endpoint. `LLMClientRegistry` keeps one sync and one async httpx client per
+deployment for the whole process and hands the same pair to every LLM
+built for that deployment:
+
+    http_client, async_http_client = llm_http_clients(f"{endpoint}/{deployment}")
+    llm = AzureOpenAI(..., http_client=http_client, async_http_client=async_http_client)
+
+- Connection limits and keep-alive come from `LLM_MAX_CONNECTIONS`
+  (default 20), `LLM_MAX_KEEPALIVE_CONNECTIONS` (default 20) and
+  `LLM_KEEPALIVE_EXPIRY` (seconds, default 30).
+- `LLM_HTTP2=auto` (default) negotiates HTTP/2 when the `h2` package is
+  installed (`pip install httpx[http2]`), so concurrent requests share one
+  TLS connection; `1` requires it and `0` turns it off.
+- An httpx async connection belongs to the event loop that opened it, and
+  every Streamlit session has its own loop. Async requests therefore run on
+  one background event-loop thread per registry, which owns the pool;
+  callers on any loop await them there.
+- Per deployment, `stats()` reports requests, connections opened, TLS
+  handshakes, HTTP/2 requests and the share of requests that reused a
+  connection.
+"""
+
+import asyncio
+import importlib.util
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+__all__ = [
+    "DEFAULT_LLM_HTTP2",
+    "DEFAULT_LLM_KEEPALIVE_EXPIRY",
+    "DEFAULT_LLM_MAX_CONNECTIONS",
+    "DEFAULT_LLM_MAX_KEEPALIVE_CONNECTIONS",
+    "DEFAULT_LLM_TIMEOUT",
+    "LLMClientRegistry",
+    "get_llm_registry",
+    "llm_http_clients",
+]
+
+DEFAULT_LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+DEFAULT_LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+DEFAULT_LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+# "auto": HTTP/2 if h2 is installed, "1": always, "0": never
+DEFAULT_LLM_HTTP2 = os.getenv("LLM_HTTP2", "auto").lower()
+DEFAULT_LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+_registry: Optional["LLMClientRegistry"] = None
+_registry_lock = threading.Lock()
+
+
+def _use_http2(setting: str) -> bool:
+    if setting == "auto":
+        return importlib.util.find_spec("h2") is not None
+    return setting in ("1", "true", "yes", "on")
+
+
+class _Counters:
+    """Connection reuse counters of one deployment, fed by httpcore trace events."""
+
+    def __init__(self):
+        self.values = {"requests": 0, "connections": 0, "tls_handshakes": 0, "http2_requests": 0}
+        self._lock = threading.Lock()
+
+    def event(self, name: str) -> None:
+        if name == "connection.connect_tcp.complete":
+            key = "connections"
+        elif name == "connection.start_tls.complete":
+            key = "tls_handshakes"
+        elif name == "http11.send_request_headers.started":
+            key = "requests"
+        elif name == "http2.send_request_headers.started":
+            with self._lock:
+                self.values["requests"] += 1
+                self.values["http2_requests"] += 1
+            return
+        else:
+            return
+        with self._lock:
+            self.values[key] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = dict(self.values)
+        requests = values["requests"]
+        values["reused"] = max(0, requests - values["connections"])
+        values["reuse_ratio"] = round(values["reused"] / requests, 3) if requests else 0.0
+        return values
+
+
+class _TracedTransport(httpx.HTTPTransport):
+    """Sync transport that counts connections and requests."""
+
+    def __init__(self, counters: _Counters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+
+    def _trace(self, name: str, info: dict) -> None:
+        self.counters.event(name)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions = {**request.extensions, "trace": self._trace}
+        return super().handle_request(request)
+
+
+class _LoopStream(httpx.AsyncByteStream):
+    """Response body read on the registry's loop, chunk by chunk, from any caller loop."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "_SharedLoopTransport"):
+        self.stream = stream
+        self.transport = transport
+
+    async def __aiter__(self):
+        iterator = self.stream.__aiter__()
+
+        async def next_chunk():
+            try:
+                return await iterator.__anext__()
+            except StopAsyncIteration:
+                return None
+
+        while True:
+            chunk = await self.transport.run(next_chunk())
+            if chunk is None:
+                return
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.transport.run(self.stream.aclose())
+
+
+class _SharedLoopTransport(httpx.AsyncBaseTransport):
+    """Async transport whose connection pool lives on one background event loop."""
+
+    def __init__(self, counters: _Counters, loop: asyncio.AbstractEventLoop, **kwargs):
+        self.counters = counters
+        self.loop = loop
+        self._kwargs = kwargs
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+
+    async def _trace(self, name: str, info: dict) -> None:
+        self.counters.event(name)
+
+    async def run(self, coroutine):
+        """Await `coroutine` on the registry's loop."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self.loop))
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        if self._transport is None:
+            # Created on the registry's loop, which then owns its connections
+            self._transport = httpx.AsyncHTTPTransport(**self._kwargs)
+        request.extensions = {**request.extensions, "trace": self._trace}
+        return await self._transport.handle_async_request(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.run(self._send(request))
+        response.stream = _LoopStream(response.stream, self)
+        return response
+
+    async def aclose(self) -> None:
+        if self._transport is not None:
+            await self.run(self._transport.aclose())
+
+
+class LLMClientRegistry:
+    """
+    One pooled sync and async httpx client per LLM deployment.
+
+    Args:
+        max_connections (int): Connections per deployment and client
+        max_keepalive_connections (int): Idle connections kept open
+        keepalive_expiry (float): Seconds an idle connection is kept
+        http2 (str): "auto", "1" or "0"
+        timeout (float): Request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_LLM_MAX_CONNECTIONS,
+        max_keepalive_connections: int = DEFAULT_LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = DEFAULT_LLM_KEEPALIVE_EXPIRY,
+        http2: str = DEFAULT_LLM_HTTP2,
+        timeout: float = DEFAULT_LLM_TIMEOUT,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = _use_http2(str(http2).lower())
+        self.timeout = timeout
+        self._clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._counters: Dict[str, _Counters] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="llm-http", daemon=True).start()
+        return self._loop
+
+    def clients(self, key: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        """
+        The shared sync and async clients of deployment `key`.
+
+        Args:
+            key (str): Deployment identity, e.g. "<endpoint>/<deployment>"
+
+        Returns:
+            tuple: `(httpx.Client, httpx.AsyncClient)` to pass to the LLM
+        """
+        with self._lock:
+            clients = self._clients.get(key)
+            if clients is None:
+                counters = self._counters[key] = _Counters()
+                transport_kwargs = {"http2": self.http2, "limits": self.limits}
+                clients = self._clients[key] = (
+                    httpx.Client(
+                        transport=_TracedTransport(counters, **transport_kwargs), timeout=self.timeout
+                    ),
+                    httpx.AsyncClient(
+                        transport=_SharedLoopTransport(counters, self._background_loop(), **transport_kwargs),
+                        timeout=self.timeout,
+                    ),
+                )
+            return clients
+
+    def stats(self) -> dict:
+        """Connection reuse per deployment."""
+        with self._lock:
+            counters = dict(self._counters)
+        return {key: value.snapshot() for key, value in counters.items()}
+
+    async def aclose(self) -> None:
+        """Close every client; `clients()` creates new ones afterwards."""
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client, async_client in clients:
+            client.close()
+            await async_client.aclose()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """The process-wide registry, created on first use from the LLM_* settings."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMClientRegistry()
+        return _registry
+
+
+def llm_http_clients(key: str) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Shared `(http_client, async_http_client)` of deployment `key`."""
+    return get_llm_registry().clients(key)
@@ -0,0 +1,217 @@
+"""
+Streamable HTTP MCP Client
+
+Client for the server's stateless streamable HTTP transport
+(`server.py --server_type=streamable-http`). Every call is a single POST on
+a pooled keep-alive connection, where `BasicMCPClient` opens a new SSE
+stream and session per call. It implements the methods `McpToolSpec` uses,
+so it can be passed in place of `BasicMCPClient`:
+
+    client = make_mcp_client("http://127.0.0.1:8000/mcp")
+    tools = McpToolSpec(client=client)
+
+`make_mcp_client` picks the transport from `MCP_TRANSPORT`, or from the URL
+when that is not set: URLs ending in `/sse` use SSE, other http(s) URLs
+streamable HTTP, and anything else is started as a stdio server command.
+SSE and stdio servers are reached through a `PersistentMCPClient`
+(`mcp_session.py`), which keeps one session open instead of one per call.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import weakref
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+import httpx
+from mcp import types
+from mcp.shared.exceptions import McpError
+
+from mcp_session import PersistentMCPClient
+
+__all__ = [
+    "MCP_TRANSPORT",
+    "MCP_TRANSPORTS",
+    "StreamableHTTPMCPClient",
+    "make_mcp_client",
+    "transport_for",
+]
+
+MCP_TRANSPORTS = ("sse", "streamable-http", "stdio")
+
+# Empty: choose from the server URL
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "")
+
+
+class StreamableHTTPMCPClient:
+    """
+    MCP client for the stateless streamable HTTP transport.
+
+    Args:
+        url (str): Endpoint URL, e.g. "http://127.0.0.1:8000/mcp"
+        timeout (float): Seconds to wait for a response
+        max_connections (int): Keep-alive connections kept to the server
+        headers (dict, optional): Extra headers sent with every request
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 120.0,
+        max_connections: int = 10,
+        headers: Optional[dict] = None,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.headers = {
+            "Accept": "application/json, text/event-stream",
+            "Content-Type": "application/json",
+            **(headers or {}),
+        }
+        self._ids = itertools.count(1)
+        # httpx connections belong to the event loop that opened them
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return client
+
+    async def request(
+        self,
+        method: str,
+        params: Optional[dict] = None,
+        on_notification: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """
+        Send one JSON-RPC request and return its result.
+
+        Args:
+            method (str): JSON-RPC method, e.g. "tools/call"
+            params (dict, optional): Method parameters
+            on_notification (callable, optional): Called with each
+                notification the server sends before the response, e.g.
+                `stream_data` chunks
+
+        Raises:
+            McpError: If the server answers with a JSON-RPC error
+            httpx.HTTPError: If the request fails
+        """
+        request_id = next(self._ids)
+        payload = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            payload["params"] = params
+
+        message = None
+        async with self._http().stream("POST", self.url, json=payload) as response:
+            response.raise_for_status()
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                data = []
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        data.append(line[5:].lstrip())
+                    elif not line and data:
+                        event, data = json.loads("\n".join(data)), []
+                        if event.get("id") == request_id and "method" not in event:
+                            message = event
+                        elif on_notification is not None:
+                            on_notification(event)
+            else:
+                message = json.loads(await response.aread())
+
+        if message is None:
+            raise McpError(types.ErrorData(code=types.INTERNAL_ERROR, message="No response from server"))
+        if "error" in message:
+            raise McpError(types.ErrorData.model_validate(message["error"]))
+        return message["result"]
+
+    async def initialize(self) -> types.InitializeResult:
+        result = await self.request(
+            "initialize",
+            {
+                "protocolVersion": types.LATEST_PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "mcp-http-client", "version": "1.0"},
+            },
+        )
+        return types.InitializeResult.model_validate(result)
+
+    async def list_tools(self) -> types.ListToolsResult:
+        return types.ListToolsResult.model_validate(await self.request("tools/list"))
+
+    async def call_tool(
+        self,
+        tool_name: str,
+        arguments: dict,
+        on_notification: Optional[Callable[[dict], None]] = None,
+    ) -> types.CallToolResult:
+        result = await self.request(
+            "tools/call", {"name": tool_name, "arguments": arguments}, on_notification
+        )
+        return types.CallToolResult.model_validate(result)
+
+    async def list_resources(self) -> types.ListResourcesResult:
+        return types.ListResourcesResult.model_validate(await self.request("resources/list"))
+
+    async def read_resource(self, uri: str) -> types.ReadResourceResult:
+        return types.ReadResourceResult.model_validate(
+            await self.request("resources/read", {"uri": uri})
+        )
+
+    async def aclose(self) -> None:
+        """Close the connections opened from the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+def transport_for(url: str, transport: str = MCP_TRANSPORT) -> str:
+    """
+    The transport to reach `url` with: `transport`, or inferred from the URL.
+
+    Raises:
+        ValueError: If the transport is unknown
+    """
+    if not transport:
+        if urlparse(url).scheme not in ("http", "https"):
+            transport = "stdio"
+        elif urlparse(url).path.rstrip("/").endswith("/sse"):
+            transport = "sse"
+        else:
+            transport = "streamable-http"
+    if transport not in MCP_TRANSPORTS:
+        raise ValueError(f"Unknown MCP transport '{transport}'. Choose one of: {', '.join(MCP_TRANSPORTS)}")
+    return transport
+
+
+def make_mcp_client(url: str, transport: str = MCP_TRANSPORT):
+    """
+    MCP client for `url` over the given or inferred transport.
+
+    Args:
+        url (str): Server URL, or a server command for stdio
+        transport (str): "sse", "streamable-http", "stdio", or "" to infer
+
+    Returns:
+        StreamableHTTPMCPClient | PersistentMCPClient: The client
+
+    Raises:
+        ValueError: If the transport is unknown
+    """
+    if transport_for(url, transport) == "streamable-http":
+        return StreamableHTTPMCPClient(url)
+    return PersistentMCPClient(url)
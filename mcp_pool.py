@@ -0,0 +1,302 @@
+"""
+Process-wide MCP Connection Pool
+
+Streamlit runs every browser session with its own event loop, so a client
+per session means one SSE connection per user. `MCPConnectionPool` owns a
+bounded set of connections on a background event-loop thread and serves
+every session from them; the server sees at most `max_connections`
+connections however many users there are.
+
+- SSE and stdio connections are persistent MCP sessions (`mcp_session.py`)
+  carrying up to `max_streams` concurrent requests each. Streamable HTTP
+  connections are keep-alive HTTP connections carrying one request at a
+  time.
+- A request takes an idle connection, opens a new one while there are fewer
+  than `max_connections`, or shares the least busy one. When all are full it
+  queues. Queued requests are served round-robin across the keys given to
+  `client()` (one per browser session) and in order within a key, so one
+  user's burst of tool calls cannot starve the others.
+- Connections unused for `idle_timeout` seconds are closed, and reopened
+  when needed again; dropped connections are replaced on the next request.
+
+    pool = MCPConnectionPool("http://127.0.0.1:8000/sse", max_connections=4)
+    tools = McpToolSpec(client=pool.client(key=session_id))
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from mcp_http_client import MCP_TRANSPORT, StreamableHTTPMCPClient, transport_for
+from mcp_session import DEFAULT_MCP_CALL_TIMEOUT, PersistentMCPClient, _Connection
+
+__all__ = [
+    "DEFAULT_MCP_POOL_IDLE_TIMEOUT",
+    "DEFAULT_MCP_POOL_SIZE",
+    "DEFAULT_MCP_POOL_STREAMS",
+    "MCPConnectionPool",
+    "PooledMCPClient",
+]
+
+DEFAULT_MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "8"))
+# Concurrent requests per SSE/stdio session
+DEFAULT_MCP_POOL_STREAMS = int(os.getenv("MCP_POOL_STREAMS", "4"))
+# Seconds an unused connection stays open (0 keeps it)
+DEFAULT_MCP_POOL_IDLE_TIMEOUT = float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "300"))
+
+# Fairness key of the request being acquired, set on the pool's loop
+_fair_key: contextvars.ContextVar[Any] = contextvars.ContextVar("mcp_pool_key", default=None)
+
+# Grant meaning "open a new connection", counted against the limit
+_OPEN = object()
+
+
+class _HTTPConnection:
+    """One keep-alive streamable HTTP connection, used by one request at a time."""
+
+    def __init__(self, url: str, timeout: float):
+        self.session = StreamableHTTPMCPClient(url, timeout=timeout, max_connections=1)
+        self.in_flight = 0
+        self.alive = True
+
+    async def open(self) -> None:
+        # Connected by the first request
+        pass
+
+    async def close(self) -> None:
+        self.alive = False
+        await self.session.aclose()
+
+
+class MCPConnectionPool(PersistentMCPClient):
+    """
+    MCP client shared by all threads and event loops of a process.
+
+    Args:
+        command_or_url (str): Server URL, or a stdio server command
+        args (list, optional): Arguments of the stdio server command
+        env (dict, optional): Environment of the stdio server
+        max_connections (int): Connections open to the server at most
+        max_streams (int): Concurrent requests per SSE/stdio session
+        idle_timeout (float): Seconds before an unused connection is closed,
+            0 to keep connections open
+        timeout (float): Seconds to wait for the response to a request
+        transport (str): "sse", "streamable-http", "stdio", or "" to infer
+            from the URL
+    """
+
+    def __init__(
+        self,
+        command_or_url: str,
+        args: Optional[List[str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        max_connections: int = DEFAULT_MCP_POOL_SIZE,
+        max_streams: int = DEFAULT_MCP_POOL_STREAMS,
+        idle_timeout: float = DEFAULT_MCP_POOL_IDLE_TIMEOUT,
+        timeout: float = DEFAULT_MCP_CALL_TIMEOUT,
+        transport: str = MCP_TRANSPORT,
+    ):
+        super().__init__(command_or_url, args, env, timeout)
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        self.transport = transport_for(command_or_url, transport)
+        self.max_connections = max_connections
+        self.max_streams = 1 if self.transport == "streamable-http" else max(1, max_streams)
+        self.idle_timeout = idle_timeout
+        # Dropped connections are replaced through `_grant`, not reconnected
+        del self.stats["reconnects"]
+        self.stats.update({"closed_idle": 0, "queued": 0, "queued_seconds": 0.0})
+        self._pool: List[Any] = []
+        self._opening = 0
+        self._waiters: "OrderedDict[Any, Deque[asyncio.Future]]" = OrderedDict()
+        self._clients: "weakref.WeakSet[PooledMCPClient]" = weakref.WeakSet()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-pool", daemon=True)
+        self._thread.start()
+        if idle_timeout > 0:
+            asyncio.run_coroutine_threadsafe(self._reap_idle(), self._loop)
+
+    def client(self, key: Any = None) -> "PooledMCPClient":
+        """
+        Client view for one user of the pool.
+
+        Args:
+            key: Fairness key, e.g. the Streamlit session id; queued requests
+                are served round-robin across keys
+
+        Returns:
+            PooledMCPClient: Client usable from any event loop
+        """
+        client = PooledMCPClient(self, key)
+        self._clients.add(client)
+        return client
+
+    def _notify(self, message: dict) -> None:
+        super()._notify(message)
+        for client in list(self._clients):
+            client._notify(message)
+
+    def _grant(self):
+        """An available connection (now in use), `_OPEN`, or None if all are full."""
+        self._pool = [connection for connection in self._pool if connection.alive]
+        idle = [connection for connection in self._pool if not connection.in_flight]
+        if idle:
+            connection = idle[0]
+        elif len(self._pool) + self._opening < self.max_connections:
+            self._opening += 1
+            return _OPEN
+        else:
+            spare = [connection for connection in self._pool if connection.in_flight < self.max_streams]
+            if not spare:
+                return None
+            connection = min(spare, key=lambda connection: connection.in_flight)
+        connection.in_flight += 1
+        return connection
+
+    def _dispatch(self) -> None:
+        """Hand freed capacity to queued requests, round-robin across keys."""
+        while self._waiters:
+            key, waiters = next(iter(self._waiters.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            if waiter.done():
+                # Cancelled while queued
+                continue
+            grant = self._grant()
+            if grant is None:
+                self._waiters.setdefault(key, deque()).appendleft(waiter)
+                self._waiters.move_to_end(key, last=False)
+                return
+            waiter.set_result(grant)
+
+    def _ungrant(self, grant) -> None:
+        if grant is _OPEN:
+            self._opening -= 1
+            self._dispatch()
+        else:
+            self._release(grant)
+
+    async def _open(self):
+        if self.transport == "streamable-http":
+            connection = _HTTPConnection(self.command_or_url, self.timeout)
+        else:
+            connection = _Connection(
+                self.command_or_url, self.args, self.env, self.timeout, self._notify
+            )
+        try:
+            await connection.open()
+        finally:
+            self._opening -= 1
+        self.stats["connects"] += 1
+        connection.in_flight = 1
+        self._pool.append(connection)
+        return connection
+
+    async def _acquire(self):
+        grant = None if self._waiters else self._grant()
+        if grant is None:
+            key = _fair_key.get()
+            waiter = self._loop.create_future()
+            self._waiters.setdefault(key, deque()).append(waiter)
+            self.stats["queued"] += 1
+            started = time.monotonic()
+            try:
+                grant = await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._ungrant(waiter.result())
+                raise
+            finally:
+                self.stats["queued_seconds"] += time.monotonic() - started
+        if grant is _OPEN:
+            try:
+                return await self._open()
+            except BaseException:
+                self._dispatch()
+                raise
+        return grant
+
+    def _release(self, connection) -> None:
+        connection.in_flight -= 1
+        connection.last_used = time.monotonic()
+        self._dispatch()
+
+    async def _reap_idle(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 30.0))
+            now = time.monotonic()
+            for connection in list(self._pool):
+                if not connection.in_flight and now - getattr(connection, "last_used", now) >= self.idle_timeout:
+                    self._pool.remove(connection)
+                    self.stats["closed_idle"] += 1
+                    await connection.close()
+
+    async def _keyed(self, key: Any, send: Callable, repeatable: bool):
+        _fair_key.set(key)
+        return await PersistentMCPClient._request(self, send, repeatable)
+
+    async def _submit(self, key: Any, send: Callable, repeatable: bool):
+        """Run the request on the pool's loop and wait for it from the caller's loop."""
+        future = asyncio.run_coroutine_threadsafe(self._keyed(key, send, repeatable), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def _request(self, send: Callable[[Any], Awaitable], repeatable: bool = False):
+        return await self._submit(None, send, repeatable)
+
+    def pool_stats(self) -> dict:
+        """Open connections, requests in flight and queued, and pool counters.
+
+        Call it from outside the pool's thread; it reads the pool on its loop.
+        """
+
+        async def snapshot():
+            return {
+                "connections": len([connection for connection in self._pool if connection.alive]),
+                "max_connections": self.max_connections,
+                "in_flight": sum(connection.in_flight for connection in self._pool),
+                "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+                **self.stats,
+            }
+
+        return asyncio.run_coroutine_threadsafe(snapshot(), self._loop).result()
+
+    async def aclose(self) -> None:
+        """Close every pooled connection; the pool reopens them if used again."""
+
+        async def close_all():
+            pool, self._pool = self._pool, []
+            await asyncio.gather(*(connection.close() for connection in pool), return_exceptions=True)
+
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(close_all(), self._loop))
+
+
+class PooledMCPClient(PersistentMCPClient):
+    """
+    One user's view of an `MCPConnectionPool`.
+
+    It has the `BasicMCPClient` methods `McpToolSpec` uses and its own
+    notification handlers; requests go through the shared pool under this
+    client's fairness key.
+    """
+
+    def __init__(self, pool: MCPConnectionPool, key: Any = None):
+        super().__init__(pool.command_or_url, pool.args, pool.env, pool.timeout)
+        self.pool = pool
+        self.key = key
+
+    async def _request(self, send: Callable[[Any], Awaitable], repeatable: bool = False):
+        self.stats["requests"] += 1
+        return await self.pool._submit(self.key, send, repeatable)
+
+    async def aclose(self) -> None:
+        # The connections belong to the pool
+        pass
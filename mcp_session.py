@@ -0,0 +1,289 @@
+"""
+Persistent MCP Sessions
+
+`BasicMCPClient` opens a new SSE stream (or starts a new stdio server) and
+runs the MCP `initialize` handshake for every `call_tool` and `list_tools`.
+`PersistentMCPClient` implements the same methods over one long-lived,
+initialized session per server:
+
+- The session is opened on first use and kept until `aclose()`. Concurrent
+  calls are multiplexed over it by JSON-RPC request id.
+- When the server closes the stream (restart, idle timeout), the session is
+  marked dead and the next call opens a new one. A call whose request never
+  reached the server is retried on the new session; calls already sent when
+  the connection dropped fail with "Connection closed" instead of waiting
+  forever, except listings, which are safe to repeat and are retried.
+- Notifications the server sends at any time (e.g.
+  `notifications/tools/list_changed`) are passed to the handlers registered
+  with `add_notification_handler()`.
+
+Sessions belong to the event loop that opened them, so a client used from
+several event loops keeps one session per loop.
+
+    client = PersistentMCPClient("http://127.0.0.1:8000/sse")
+    tools = McpToolSpec(client=client)
+"""
+
+import asyncio
+import logging
+import os
+import weakref
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import anyio
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.shared.exceptions import McpError
+
+__all__ = [
+    "CONNECTION_CLOSED",
+    "DEFAULT_MCP_CALL_TIMEOUT",
+    "PersistentMCPClient",
+]
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the response to one request
+DEFAULT_MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "120"))
+
+# JSON-RPC error code of requests lost with their connection
+CONNECTION_CLOSED = -32000
+
+# Finished requests whose response streams are released at once
+_RELEASE_EVERY = 256
+
+
+def _connection_closed() -> McpError:
+    return McpError(types.ErrorData(code=CONNECTION_CLOSED, message="Connection closed"))
+
+
+class _Session(ClientSession):
+    """
+    ClientSession that fails pending requests when its connection ends.
+
+    The stock session leaves callers waiting for responses that can no
+    longer arrive, and keeps every finished request's response streams
+    until it exits; this one releases them whenever no request is pending.
+    """
+
+    def __init__(self, *args, closed: asyncio.Event, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.closed = closed
+        self._pending = 0
+        self._finished = 0
+
+    async def send_request(self, request, result_type):
+        self._pending += 1
+        try:
+            return await super().send_request(request, result_type)
+        finally:
+            self._pending -= 1
+            self._finished += 1
+            if not self._pending and self._finished >= _RELEASE_EVERY:
+                self._finished = 0
+                stack, self._exit_stack = self._exit_stack, AsyncExitStack()
+                await stack.aclose()
+
+    async def _receive_loop(self) -> None:
+        try:
+            await super()._receive_loop()
+        finally:
+            self.closed.set()
+            for request_id, stream in list(self._response_streams.items()):
+                error = types.JSONRPCError(
+                    jsonrpc="2.0", id=request_id, error=_connection_closed().error
+                )
+                try:
+                    stream.send_nowait(error)
+                except (anyio.WouldBlock, anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    pass
+            self._response_streams.clear()
+
+
+class _Connection:
+    """One initialized MCP session, held open by a task of the loop that opened it."""
+
+    def __init__(
+        self,
+        command_or_url: str,
+        args: List[str],
+        env: Optional[Dict[str, str]],
+        timeout: float,
+        on_notification: Callable[[dict], None],
+    ):
+        self.command_or_url = command_or_url
+        self.args = args
+        self.env = env
+        self.timeout = timeout
+        self.on_notification = on_notification
+        self.session: Optional[_Session] = None
+        self.in_flight = 0
+        self._closed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and not self._closed.is_set()
+
+    def _transport(self):
+        if urlparse(self.command_or_url).scheme in ("http", "https"):
+            return sse_client(self.command_or_url)
+        return stdio_client(
+            StdioServerParameters(command=self.command_or_url, args=self.args, env=self.env)
+        )
+
+    async def _handle_message(self, message) -> None:
+        if isinstance(message, types.ServerNotification):
+            self.on_notification(message.root.model_dump(by_alias=True, mode="json", exclude_none=True))
+
+    async def _run(self, ready: asyncio.Future) -> None:
+        try:
+            async with self._transport() as streams:
+                async with _Session(
+                    *streams,
+                    closed=self._closed,
+                    read_timeout_seconds=timedelta(seconds=self.timeout),
+                    message_handler=self._handle_message,
+                ) as session:
+                    await session.initialize()
+                    self.session = session
+                    ready.set_result(None)
+                    await self._closed.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                # The transport often fails while closing a dropped connection
+                logger.debug("MCP session to %s ended: %r", self.command_or_url, e)
+        finally:
+            self._closed.set()
+            if not ready.done():
+                ready.set_exception(_connection_closed())
+
+    async def open(self) -> None:
+        """Connect and initialize; raises the connection error if that fails."""
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        await ready
+
+    async def close(self) -> None:
+        self._closed.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class PersistentMCPClient:
+    """
+    MCP client that keeps one initialized session per server and event loop.
+
+    Args:
+        command_or_url (str): SSE URL, e.g. "http://127.0.0.1:8000/sse", or a
+            stdio server command
+        args (list, optional): Arguments of the stdio server command
+        env (dict, optional): Environment of the stdio server
+        timeout (float): Seconds to wait for the response to a request
+    """
+
+    def __init__(
+        self,
+        command_or_url: str,
+        args: Optional[List[str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        timeout: float = DEFAULT_MCP_CALL_TIMEOUT,
+    ):
+        self.command_or_url = command_or_url
+        self.args = list(args or [])
+        self.env = env
+        self.timeout = timeout
+        self.stats = {"requests": 0, "connects": 0, "reconnects": 0, "retries": 0}
+        self._handlers: List[Callable[[dict], None]] = []
+        self._connections: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Connection]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def add_notification_handler(self, handler: Callable[[dict], None]) -> None:
+        """Call `handler` with every notification the server sends, as a JSON-RPC dict."""
+        self._handlers.append(handler)
+
+    def _notify(self, message: dict) -> None:
+        for handler in self._handlers:
+            handler(message)
+
+    async def _connection(self) -> _Connection:
+        loop = asyncio.get_running_loop()
+        connection = self._connections.get(loop)
+        if connection is not None and connection.alive:
+            return connection
+        lock = self._locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            connection = self._connections.get(loop)
+            if connection is not None and connection.alive:
+                return connection
+            if connection is not None:
+                await connection.close()
+                self.stats["reconnects"] += 1
+                logger.info("Reconnecting to MCP server %s", self.command_or_url)
+            connection = _Connection(
+                self.command_or_url, self.args, self.env, self.timeout, self._notify
+            )
+            await connection.open()
+            self.stats["connects"] += 1
+            self._connections[loop] = connection
+            return connection
+
+    async def _acquire(self) -> _Connection:
+        """The connection to send the next request on."""
+        connection = await self._connection()
+        connection.in_flight += 1
+        return connection
+
+    def _release(self, connection: _Connection) -> None:
+        connection.in_flight -= 1
+
+    async def _request(self, send: Callable[[_Session], Awaitable], repeatable: bool = False):
+        """
+        Run `send` on the session, reconnecting once if the connection is gone.
+
+        A request the closed transport refused was never sent and is always
+        retried; one lost with its connection is retried only if `repeatable`.
+        """
+        self.stats["requests"] += 1
+        for attempt in range(2):
+            connection = await self._acquire()
+            try:
+                return await send(connection.session)
+            except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                if attempt:
+                    raise _connection_closed()
+            except McpError as e:
+                if e.error.code != CONNECTION_CLOSED or not repeatable or attempt:
+                    raise
+            finally:
+                self._release(connection)
+            self.stats["retries"] += 1
+            await connection.close()
+
+    async def call_tool(self, tool_name: str, arguments: dict) -> types.CallToolResult:
+        return await self._request(lambda session: session.call_tool(tool_name, arguments))
+
+    async def list_tools(self) -> types.ListToolsResult:
+        return await self._request(lambda session: session.list_tools(), repeatable=True)
+
+    async def list_resources(self) -> types.ListResourcesResult:
+        return await self._request(lambda session: session.list_resources(), repeatable=True)
+
+    async def read_resource(self, uri: str) -> types.ReadResourceResult:
+        return await self._request(lambda session: session.read_resource(uri), repeatable=True)
+
+    async def aclose(self) -> None:
+        """Close the session opened from the running event loop."""
+        connection = self._connections.pop(asyncio.get_running_loop(), None)
+        if connection is not None:
+            await connection.close()
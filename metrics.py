@@ -0,0 +1,338 @@
+"""
+Tool Metrics
+
+Per-tool request metrics for the FastMCP server, rendered in the Prometheus
+text exposition format without a client library:
+
+- `mcp_tool_duration_seconds{tool, phase}`: histogram per phase. `connect`
+  is waiting for a pooled connection, `execute` running the statement (or
+  the queued write), `fetch` reading its rows, `serialize` shaping the
+  result and converting it to MCP content, and `total` the whole call.
+- `mcp_tool_in_flight{tool}`: calls currently running
+- `mcp_tool_calls_total{tool, outcome}`: finished calls, `ok` or `error`
+- `mcp_tool_errors_total{tool, error}`: errors by exception class, e.g.
+  `OperationalError`, `IntegrityError`, `BudgetExceeded`
+- `mcp_tool_rows_returned_total{tool}`: rows returned by read tools
+
+`InstrumentedFastMCP` wraps every tool call; code running inside a call,
+including on executor threads (the executor copies the caller's context),
+reports phases with `phase()` and rows with `add_rows()`. These are no-ops
+outside a tool call.
+
+    mcp = InstrumentedFastMCP("sqlite-demo")
+    with phase("execute"):
+        cursor = conn.execute(query)
+    print(mcp.metrics.render())
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.server.fastmcp.server import _convert_to_content
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "PHASES",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "InstrumentedFastMCP",
+    "ToolMetrics",
+    "add_phase",
+    "add_rows",
+    "phase",
+    "record_error",
+]
+
+PHASES = ("connect", "execute", "fetch", "serialize", "total")
+
+# Seconds; the +Inf bucket is implicit
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_current: contextvars.ContextVar[Optional["_ToolCall"]] = contextvars.ContextVar(
+    "tool_call", default=None
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum, count and max per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count, max]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+            series[3] = max(series[3], value)
+
+    def series(self) -> Dict[Tuple[str, ...], dict]:
+        """Sum, count and max per label set."""
+        with self._lock:
+            return {
+                labels: {"count": count, "sum": total, "max": largest}
+                for labels, (_, total, count, largest) in self._series.items()
+            }
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            series = {labels: [list(values[0])] + values[1:] for labels, values in self._series.items()}
+        for labels, (counts, total, count, _) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class _ToolCall:
+    """Phase timings, rows and errors of one running tool call."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.phases: Dict[str, float] = {}
+        self.rows = 0
+        self.errors: List[BaseException] = []
+        self._lock = threading.Lock()
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_error(self, error: BaseException) -> None:
+        """Record `error`; it replaces an already recorded error that it wraps."""
+        chain = []
+        cause: Optional[BaseException] = error
+        while cause is not None and len(chain) < 16:
+            chain.append(cause)
+            cause = cause.__cause__ or cause.__context__
+        with self._lock:
+            for index, seen in enumerate(self.errors):
+                if any(seen is wrapped for wrapped in chain):
+                    self.errors[index] = error
+                    return
+            self.errors.append(error)
+
+
+class ToolMetrics:
+    """The metrics of every tool call made through one server."""
+
+    def __init__(self):
+        self.duration = Histogram(
+            "mcp_tool_duration_seconds", "Tool call latency by phase", ("tool", "phase")
+        )
+        self.in_flight = Gauge("mcp_tool_in_flight", "Tool calls currently running", ("tool",))
+        self.calls = Counter("mcp_tool_calls_total", "Finished tool calls by outcome", ("tool", "outcome"))
+        self.errors = Counter(
+            "mcp_tool_errors_total", "Tool errors by exception class", ("tool", "error")
+        )
+        self.rows = Counter("mcp_tool_rows_returned_total", "Rows returned by read tools", ("tool",))
+        self._metrics = (self.duration, self.in_flight, self.calls, self.errors, self.rows)
+
+    @contextmanager
+    def track(self, tool: str) -> Iterator[_ToolCall]:
+        """Measure one call of `tool`; phases inside it are attributed to the call."""
+        call = _ToolCall(tool)
+        token = _current.set(call)
+        self.in_flight.inc((tool,))
+        started = time.perf_counter()
+        try:
+            yield call
+        except BaseException as e:
+            # FastMCP wraps the tool's exception in ToolError; count the original
+            error = e
+            while isinstance(error, ToolError) and error.__cause__ is not None:
+                error = error.__cause__
+            if not any(error is seen for seen in call.errors):
+                call.add_error(error)
+            raise
+        finally:
+            _current.reset(token)
+            self.in_flight.dec((tool,))
+            call.add_phase("total", time.perf_counter() - started)
+            for name, seconds in call.phases.items():
+                self.duration.observe((tool, name), seconds)
+            for error in call.errors:
+                self.errors.inc((tool, type(error).__name__))
+            if call.rows:
+                self.rows.inc((tool,), call.rows)
+            self.calls.inc((tool, "error" if call.errors else "ok"))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Per-tool summary: calls, in flight, rows, errors and phase latencies."""
+        tools: Dict[str, dict] = {}
+
+        def entry(tool: str) -> dict:
+            return tools.setdefault(
+                tool, {"calls": {}, "in_flight": 0, "rows_returned": 0, "errors": {}, "phases": {}}
+            )
+
+        for (tool, outcome), count in self.calls.values().items():
+            entry(tool)["calls"][outcome] = int(count)
+        for (tool,), count in self.in_flight.values().items():
+            entry(tool)["in_flight"] = int(count)
+        for (tool,), count in self.rows.values().items():
+            entry(tool)["rows_returned"] = int(count)
+        for (tool, error), count in self.errors.values().items():
+            entry(tool)["errors"][error] = int(count)
+        for (tool, name), series in self.duration.series().items():
+            entry(tool)["phases"][name] = {
+                "count": series["count"],
+                "mean_ms": round(series["sum"] / series["count"] * 1000, 3),
+                "max_ms": round(series["max"] * 1000, 3),
+            }
+        return tools
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to phase `name` of the current tool call.
+
+    An exception leaving the block is counted as an error of the call, even
+    if the tool handles it.
+    """
+    call = _current.get()
+    if call is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        call.add_error(e)
+        raise
+    finally:
+        call.add_phase(name, time.perf_counter() - started)
+
+
+def add_phase(name: str, seconds: float) -> None:
+    """Add `seconds` measured elsewhere to phase `name` of the current tool call."""
+    call = _current.get()
+    if call is not None:
+        call.add_phase(name, seconds)
+
+
+def record_error(error: BaseException) -> None:
+    """Count `error` as an error of the current tool call, once."""
+    call = _current.get()
+    if call is not None:
+        call.add_error(error)
+
+
+def add_rows(count: int) -> None:
+    """Count rows returned by the current tool call."""
+    call = _current.get()
+    if call is not None:
+        call.rows += count
+
+
+class InstrumentedFastMCP(FastMCP):
+    """FastMCP server that records `ToolMetrics` for every tool call."""
+
+    def __init__(self, *args, **kwargs):
+        self.metrics = ToolMetrics()
+        super().__init__(*args, **kwargs)
+
+    async def call_tool(self, name: str, arguments: dict):
+        with self.metrics.track(name):
+            result = await self._tool_manager.call_tool(
+                name, arguments, context=self.get_context()
+            )
+            with phase("serialize"):
+                return _convert_to_content(result)
@@ -0,0 +1,189 @@
+"""
+Keyset Pagination
+
+Splits the result of a read query into bounded pages ordered by the `id`
+column. The position in the result is handed to clients as an opaque
+continuation token, so a page never requires re-reading the rows before it
+(no OFFSET scans) and pages stay stable while new rows are inserted.
+
+Pages are always ordered by `id` and sized by the caller's page limits, so a
+query with its own top-level ORDER BY, LIMIT or OFFSET is rejected rather
+than silently reordered or cut differently.
+
+    page = fetch_page(conn, "SELECT * FROM people WHERE age > 25", max_rows=100)
+    next_page = fetch_page(conn, query, after_id=decode_cursor(page.next_cursor, query))
+"""
+
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from statement_cache import _TOKEN
+
+__all__ = [
+    "MAX_PAGE_BYTES",
+    "MAX_PAGE_ROWS",
+    "MAX_STREAM_BYTES",
+    "MAX_STREAM_ROWS",
+    "Page",
+    "decode_cursor",
+    "encode_cursor",
+    "fetch_page",
+]
+
+# Hard caps applied to every page, whatever the caller asks for
+MAX_PAGE_ROWS = int(os.getenv("MAX_PAGE_ROWS", "500"))
+MAX_PAGE_BYTES = int(os.getenv("MAX_PAGE_BYTES", str(256 * 1024)))
+
+# Hard caps applied to one streaming response
+MAX_STREAM_ROWS = int(os.getenv("MAX_STREAM_ROWS", "10000"))
+MAX_STREAM_BYTES = int(os.getenv("MAX_STREAM_BYTES", str(4 * 1024 * 1024)))
+
+
+@dataclass
+class Page:
+    """One page of rows plus the token for the next one."""
+
+    columns: list = field(default_factory=list)
+    rows: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    truncated_by: Optional[str] = None
+    last_id: Optional[int] = None
+    size_bytes: int = 0
+
+    def as_dict(self) -> dict:
+        page = asdict(self)
+        del page["last_id"], page["size_bytes"]
+        return page
+
+
+def _query_key(query: str) -> str:
+    return hashlib.sha1(" ".join(query.split()).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(query: str, last_id: int) -> str:
+    """Build an opaque continuation token for `query` after row `last_id`."""
+    payload = json.dumps({"q": _query_key(query), "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, query: str) -> int:
+    """
+    Recover the last returned id from a continuation token.
+
+    Raises:
+        ValueError: If the token is malformed or was issued for another query
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = int(payload["id"])
+        key = payload["q"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor token")
+    if key != _query_key(query):
+        raise ValueError("Cursor token was issued for a different query")
+    return last_id
+
+
+def _check_query(query: str) -> None:
+    """Reject a top-level ORDER BY, LIMIT or OFFSET, which keyset pages would override."""
+    depth = 0
+    previous_word = ""
+    for match in _TOKEN.finditer(query):
+        kind, text = match.lastgroup, match.group()
+        if kind == "other":
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+        elif kind == "word" and depth == 0:
+            word = text.upper()
+            if word in ("LIMIT", "OFFSET") or (word == "BY" and previous_word == "ORDER"):
+                clause = "ORDER BY" if word == "BY" else word
+                raise ValueError(
+                    f"Paginated queries are ordered by id and sized by the page limits; "
+                    f"remove the top-level {clause}"
+                )
+            previous_word = word
+            continue
+        if kind not in ("space", "comment"):
+            previous_word = ""
+
+
+def _keyset_query(query: str) -> str:
+    _check_query(query)
+    return f"SELECT * FROM ({query.strip().rstrip(';')}) WHERE id > ? ORDER BY id LIMIT ?"
+
+
+def fetch_page(
+    conn: sqlite3.Connection,
+    query: str,
+    after_id: Optional[int] = None,
+    max_rows: int = MAX_PAGE_ROWS,
+    max_bytes: int = MAX_PAGE_BYTES,
+) -> Page:
+    """
+    Fetch the rows of `query` that follow `after_id`, ordered by id.
+
+    The query must select the `id` column and must not have its own
+    top-level ORDER BY, LIMIT or OFFSET. A page stops at `max_rows` rows
+    or once its JSON size would exceed `max_bytes` (at least one row is
+    always returned), both capped by MAX_PAGE_ROWS and MAX_PAGE_BYTES.
+
+    Args:
+        conn (sqlite3.Connection): Connection to read from
+        query (str): SQL SELECT query
+        after_id (int, optional): Last id of the previous page
+        max_rows (int): Maximum number of rows in the page
+        max_bytes (int): Maximum JSON size of the page's rows
+
+    Returns:
+        Page: Rows, column names and the next cursor (None on the last page)
+
+    Raises:
+        ValueError: If the query does not select an id column, or has a
+            top-level ORDER BY, LIMIT or OFFSET
+    """
+    max_rows = max(1, min(max_rows, MAX_PAGE_ROWS))
+    max_bytes = max(1, min(max_bytes, MAX_PAGE_BYTES))
+
+    try:
+        cursor = conn.execute(
+            _keyset_query(query),
+            (after_id if after_id is not None else -(2 ** 63), max_rows + 1),
+        )
+    except sqlite3.OperationalError as e:
+        if "no such column: id" in str(e):
+            raise ValueError("Paginated queries must select the id column") from e
+        raise
+    columns = [column[0] for column in cursor.description]
+    # Column names are case-insensitive, so `WHERE id > ?` also matches "ID"
+    id_index = next((i for i, name in enumerate(columns) if name.lower() == "id"), None)
+    if id_index is None:
+        cursor.close()
+        raise ValueError("Paginated queries must select the id column")
+
+    page = Page(columns=columns)
+    size = 0
+    for row in cursor:
+        if len(page.rows) == max_rows:
+            page.truncated_by = "rows"
+            break
+        row_bytes = len(json.dumps(row, default=str))
+        if page.rows and size + row_bytes > max_bytes:
+            page.truncated_by = "bytes"
+            break
+        page.rows.append(list(row))
+        page.last_id = row[id_index]
+        size += row_bytes
+    cursor.close()
+    page.size_bytes = size
+
+    if page.truncated_by:
+        page.next_cursor = encode_cursor(query, page.last_id)
+    return page
@@ -0,0 +1,206 @@
+"""
+Parallel Tool Calls
+
+`FunctionAgent` hands the tool calls of one LLM turn to its workflow's
+`call_tool` step, whose four workers run them in whatever order they pick
+them up: the cap cannot be configured, an `add_data` can run before a
+`read_data` the LLM asked for first, and the results go back to the LLM in
+completion order. `ParallelFunctionAgent` runs the calls concurrently, at
+most `max_parallel_tool_calls` at a time (1 runs them one by one, in call
+order), while keeping the order the LLM asked for wherever it matters:
+
+- Calls of write tools (`write_tools`, by default the server's `add_data`,
+  `add_records` and `create_recommended_indexes`) start only after every
+  read issued before them has finished, so a read never sees a later write.
+  With `write_order="grouped"` (the default) consecutive writes, such as
+  several `add_data` inserts, run together, which lets the server commit
+  them in one group; `"serial"` runs every write after all earlier calls.
+- Other calls start once every earlier write has finished, so they see it;
+  reads between two writes run concurrently.
+- Tool results are handed back to the LLM in the order it made the calls.
+
+    agent = ParallelFunctionAgent(tools=tools, llm=llm, max_parallel_tool_calls=4)
+    response = await agent.run("Add Alice, Bob and Carol", ctx=Context(agent))
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from llama_index.core.agent.workflow import AgentWorkflow, FunctionAgent
+from llama_index.core.agent.workflow.workflow_events import AgentOutput, ToolCall, ToolCallResult
+from llama_index.core.llms import ChatMessage
+from llama_index.core.memory import BaseMemory
+from llama_index.core.tools import ToolSelection
+from llama_index.core.workflow import Context, StopEvent, step
+from llama_index.core.workflow.handler import WorkflowHandler
+from pydantic import Field
+
+__all__ = [
+    "DEFAULT_AGENT_MAX_PARALLEL_TOOL_CALLS",
+    "DEFAULT_AGENT_WRITE_ORDER",
+    "DEFAULT_AGENT_WRITE_TOOLS",
+    "WRITE_ORDERS",
+    "ParallelFunctionAgent",
+    "ToolCallScheduler",
+]
+
+WRITE_ORDERS = ("grouped", "serial")
+
+# 1 runs tool calls one at a time, like FunctionAgent
+DEFAULT_AGENT_MAX_PARALLEL_TOOL_CALLS = int(os.getenv("AGENT_MAX_PARALLEL_TOOL_CALLS", "4"))
+# Comma-separated tools that modify data
+DEFAULT_AGENT_WRITE_TOOLS = [
+    name.strip()
+    for name in os.getenv(
+        "AGENT_WRITE_TOOLS", "add_data,add_records,create_recommended_indexes"
+    ).split(",")
+    if name.strip()
+]
+DEFAULT_AGENT_WRITE_ORDER = os.getenv("AGENT_WRITE_ORDER", "grouped")
+
+# Upper bound on call_tool workers; the scheduler enforces the actual limit
+_MAX_WORKERS = 64
+
+_ORDER_KEY = "parallel_tool_call_order"
+
+
+class ToolCallScheduler:
+    """
+    Orders the tool calls of one LLM turn and caps how many run at once.
+
+    Args:
+        max_concurrency (int): Tool calls running at the same time
+        write_tools (list): Tools whose calls are ordered against all others
+        write_order (str): "grouped" runs consecutive writes together,
+            "serial" one at a time
+
+    Raises:
+        ValueError: If the write order is unknown
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        write_tools: Sequence[str],
+        write_order: str = DEFAULT_AGENT_WRITE_ORDER,
+    ):
+        if write_order not in WRITE_ORDERS:
+            raise ValueError(f"Unknown write order '{write_order}'. Choose one of: {', '.join(WRITE_ORDERS)}")
+        self.write_tools = set(write_tools)
+        self.write_order = write_order
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._waits_for: Dict[str, List[asyncio.Event]] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+
+    def plan(self, tool_calls: Sequence[ToolSelection]) -> None:
+        """Record the calls of a new turn, in the order the LLM made them."""
+        self._waits_for, self._done = {}, {}
+        earlier: List[asyncio.Event] = []
+        writes: List[asyncio.Event] = []
+        barrier: List[asyncio.Event] = []
+        previous_write = False
+        for tool_call in tool_calls:
+            done = self._done[tool_call.tool_id] = asyncio.Event()
+            write = tool_call.tool_name in self.write_tools
+            if self.max_concurrency == 1:
+                self._waits_for[tool_call.tool_id] = list(earlier[-1:])
+            elif write:
+                # A run of consecutive writes shares the calls before it as
+                # its barrier when grouped
+                if self.write_order == "serial" or not previous_write:
+                    barrier = list(earlier)
+                self._waits_for[tool_call.tool_id] = barrier
+                writes.append(done)
+            else:
+                self._waits_for[tool_call.tool_id] = list(writes)
+            earlier.append(done)
+            previous_write = write
+
+    async def run(self, tool_id: str, call: Callable[[], Awaitable]) -> Any:
+        """Run `call` once the calls it is ordered after are done, within the cap."""
+        try:
+            for event in self._waits_for.get(tool_id, ()):
+                await event.wait()
+            async with self._semaphore:
+                return await call()
+        finally:
+            done = self._done.get(tool_id)
+            if done is not None:
+                done.set()
+
+
+class _ParallelAgentWorkflow(AgentWorkflow):
+    """AgentWorkflow whose `call_tool` step runs the calls of a turn concurrently."""
+
+    def __init__(self, *args, scheduler: ToolCallScheduler, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._scheduler = scheduler
+
+    @step
+    async def parse_agent_output(
+        self, ctx: Context, ev: AgentOutput
+    ) -> Union[StopEvent, ToolCall, None]:
+        if ev.tool_calls:
+            self._scheduler.plan(ev.tool_calls)
+            await ctx.set(_ORDER_KEY, [tool_call.tool_id for tool_call in ev.tool_calls])
+        return await super().parse_agent_output(ctx, ev)
+
+    @step(num_workers=_MAX_WORKERS)
+    async def call_tool(self, ctx: Context, ev: ToolCall) -> ToolCallResult:
+        return await self._scheduler.run(
+            ev.tool_id, lambda: super(_ParallelAgentWorkflow, self).call_tool(ctx, ev)
+        )
+
+
+class ParallelFunctionAgent(FunctionAgent):
+    """FunctionAgent that runs independent tool calls of a turn concurrently."""
+
+    max_parallel_tool_calls: int = Field(
+        default=DEFAULT_AGENT_MAX_PARALLEL_TOOL_CALLS,
+        description="Tool calls of one turn running at the same time",
+    )
+    write_tools: List[str] = Field(
+        default_factory=lambda: list(DEFAULT_AGENT_WRITE_TOOLS),
+        description="Tools whose calls run in order with all other calls",
+    )
+    write_order: str = Field(
+        default=DEFAULT_AGENT_WRITE_ORDER,
+        description='"grouped" runs consecutive writes together, "serial" one at a time',
+    )
+
+    def _workflow(self, **workflow_kwargs: Any) -> _ParallelAgentWorkflow:
+        scheduler = ToolCallScheduler(self.max_parallel_tool_calls, self.write_tools, self.write_order)
+        return _ParallelAgentWorkflow(agents=[self], scheduler=scheduler, **workflow_kwargs)
+
+    def _get_steps(self) -> Dict[str, Callable]:
+        return self._workflow()._get_steps()
+
+    def run(
+        self,
+        user_msg: Optional[Union[str, ChatMessage]] = None,
+        chat_history: Optional[List[ChatMessage]] = None,
+        memory: Optional[BaseMemory] = None,
+        ctx: Optional[Context] = None,
+        stepwise: bool = False,
+        checkpoint_callback: Optional[Any] = None,
+        **workflow_kwargs: Any,
+    ) -> WorkflowHandler:
+        """Run the agent, with this turn's tool calls scheduled concurrently."""
+        return self._workflow(**workflow_kwargs).run(
+            user_msg=user_msg,
+            chat_history=chat_history,
+            memory=memory,
+            ctx=ctx,
+            stepwise=stepwise,
+            checkpoint_callback=checkpoint_callback,
+        )
+
+    async def handle_tool_call_results(
+        self, ctx: Context, results: List[ToolCallResult], memory: BaseMemory
+    ) -> None:
+        # Results arrive in completion order; give them back in call order
+        order = {tool_id: index for index, tool_id in enumerate(await ctx.get(_ORDER_KEY, default=[]))}
+        results = sorted(results, key=lambda result: order.get(result.tool_id, len(order)))
+        await super().handle_tool_call_results(ctx, results, memory)
@@ -0,0 +1,157 @@
+"""
+Structured People Queries
+
+Compiles typed query arguments (filters, projection, ordering, limit) into a
+parameterized SELECT on the people table, so agents do not have to write
+SQL. Column names and operators are checked against fixed whitelists and
+values are always bound as parameters, so the same query shape always
+compiles to the same SQL text and reuses its compiled statement.
+
+    sql, params, columns = compile_query(
+        filters=[["age", ">", 25], {"column": "profession", "op": "=", "value": "Engineer"}],
+        columns=["name", "age"],
+        order_by=["-age"],
+        limit=10,
+    )
+    # SELECT name, age FROM people WHERE age > ? AND profession = ? ORDER BY age DESC LIMIT ?
+    # (25, 'Engineer', 10), ['name', 'age']
+"""
+
+import os
+from typing import Any, List, Tuple
+
+__all__ = [
+    "COLUMNS",
+    "MAX_QUERY_ROWS",
+    "OPERATORS",
+    "compile_count",
+    "compile_query",
+]
+
+COLUMNS = ("id", "name", "age", "profession")
+
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "in", "not in", "between", "like")
+
+# Upper bound on the rows returned by one structured query
+MAX_QUERY_ROWS = int(os.getenv("MAX_QUERY_ROWS", "1000"))
+
+_OPERATOR_ALIASES = {
+    "==": "=", "eq": "=", "<>": "!=", "ne": "!=", "lt": "<", "le": "<=", "lte": "<=",
+    "gt": ">", "ge": ">=", "gte": ">=", "not_in": "not in", "nin": "not in",
+}
+
+
+def _column(name: Any) -> str:
+    column = str(name).strip().lower()
+    if column not in COLUMNS:
+        raise ValueError(f"Unknown column '{name}'. Choose one of: {', '.join(COLUMNS)}")
+    return column
+
+
+def _predicate(item: Any) -> Tuple[str, list]:
+    """Compile one filter into a SQL predicate and its parameters."""
+    if isinstance(item, dict):
+        missing = [key for key in ("column", "op", "value") if key not in item]
+        if missing:
+            raise ValueError(f"Filter {item} is missing: {', '.join(missing)}")
+        column, op, value = item["column"], item["op"], item["value"]
+    elif isinstance(item, (list, tuple)) and len(item) == 3:
+        column, op, value = item
+    else:
+        raise ValueError(f"Filter {item!r} must be [column, op, value] or an object with those keys")
+
+    column = _column(column)
+    op = str(op).strip().lower()
+    op = _OPERATOR_ALIASES.get(op, op)
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown operator '{op}'. Choose one of: {', '.join(OPERATORS)}")
+
+    if op in ("in", "not in"):
+        if not isinstance(value, (list, tuple)) or not value:
+            raise ValueError(f"'{op}' on {column} needs a non-empty list of values")
+        return f"{column} {op.upper()} ({', '.join('?' * len(value))})", list(value)
+    if op == "between":
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            raise ValueError(f"'between' on {column} needs [low, high]")
+        return f"{column} BETWEEN ? AND ?", list(value)
+    if isinstance(value, (list, tuple, dict)):
+        raise ValueError(f"'{op}' on {column} needs a single value")
+    return f"{column} {op.upper()} ?", [value]
+
+
+def _where(filters: List[Any]) -> Tuple[str, list]:
+    predicates, params = [], []
+    for item in filters:
+        predicate, values = _predicate(item)
+        predicates.append(predicate)
+        params.extend(values)
+    return (f" WHERE {' AND '.join(predicates)}" if predicates else ""), params
+
+
+def _order_term(term: Any) -> str:
+    """Compile "age", "-age" or "age desc" into an ORDER BY term."""
+    text = str(term).strip()
+    words = text.lstrip("-").split()
+    direction = "DESC" if text.startswith("-") else "ASC"
+    if len(words) == 2 and words[1].lower() in ("asc", "desc"):
+        direction = words[1].upper()
+    elif len(words) != 1:
+        raise ValueError(f"Order term '{term}' must be a column, '-column' or 'column desc'")
+    return f"{_column(words[0])} {direction}"
+
+
+def compile_query(
+    filters: List[Any] = (),
+    columns: List[str] = (),
+    order_by: List[str] = (),
+    limit: int = 100,
+) -> Tuple[str, tuple, List[str]]:
+    """
+    Compile structured arguments into a parameterized SELECT on people.
+
+    Args:
+        filters (list): Predicates combined with AND, each `[column, op, value]`
+            or `{"column", "op", "value"}`; `in`/`not in` take a list and
+            `between` takes `[low, high]`
+        columns (list): Columns to return; all columns if empty
+        order_by (list): Sort terms such as `"age"`, `"-age"` or `"age desc"`
+        limit (int): Maximum number of rows, capped by MAX_QUERY_ROWS
+
+    Returns:
+        tuple: `(sql, params, column_names)`
+
+    Raises:
+        ValueError: If a column, operator or value is not valid
+    """
+    names = list(dict.fromkeys(_column(column) for column in columns)) or list(COLUMNS)
+    where, params = _where(filters)
+    order = ", ".join(_order_term(term) for term in order_by)
+    limit = max(1, min(int(limit), MAX_QUERY_ROWS))
+
+    sql = f"SELECT {', '.join(names)} FROM people{where}"
+    if order:
+        sql += f" ORDER BY {order}"
+    sql += " LIMIT ?"
+    return sql, tuple(params) + (limit,), names
+
+
+def compile_count(filters: List[Any] = (), group_by: str = "") -> Tuple[str, tuple, List[str]]:
+    """
+    Compile a COUNT(*) over people, optionally per value of one column.
+
+    Returns:
+        tuple: `(sql, params, column_names)`
+
+    Raises:
+        ValueError: If a column, operator or value is not valid
+    """
+    where, params = _where(filters)
+    if not group_by:
+        return f"SELECT COUNT(*) AS count FROM people{where}", tuple(params), ["count"]
+    column = _column(group_by)
+    return (
+        f"SELECT {column}, COUNT(*) AS count FROM people{where} "
+        f"GROUP BY {column} ORDER BY count DESC",
+        tuple(params),
+        [column, "count"],
+    )
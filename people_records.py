@@ -0,0 +1,114 @@
+"""
+People Records
+
+Parsing and validation of structured people records for bulk ingestion.
+Records can be given as dictionaries, as `[name, age, profession]` lists, or
+as a CSV / JSONL text payload.
+
+    rows = parse_payload("name,age,profession\\nAlice,25,Developer", "csv")
+    values, error = validate_record(rows[0])
+"""
+
+import csv
+import io
+import json
+from typing import Any, List, Optional, Tuple
+
+__all__ = [
+    "INSERT_PERSON",
+    "PAYLOAD_FORMATS",
+    "parse_payload",
+    "validate_record",
+]
+
+INSERT_PERSON = "INSERT INTO people (name, age, profession) VALUES (?, ?, ?)"
+
+PAYLOAD_FORMATS = ("jsonl", "csv")
+
+_FIELDS = ("name", "age", "profession")
+
+# SQLite integers are signed 64-bit; larger ages cannot be bound
+_MAX_AGE = 2 ** 63 - 1
+
+
+def parse_payload(payload: str, payload_format: str = "jsonl") -> List[Any]:
+    """
+    Split a text payload into raw records.
+
+    Args:
+        payload (str): JSONL (one JSON object or array per line) or CSV with
+            a `name,age,profession` header row
+        payload_format (str): `jsonl` or `csv`
+
+    Returns:
+        list: Raw records; lines that are not valid JSON are returned as
+            strings so they are reported as invalid rows
+
+    Raises:
+        ValueError: If the format is unknown or the CSV header is missing
+    """
+    if payload_format == "jsonl":
+        records = []
+        for line in payload.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                records.append(line)
+        return records
+
+    if payload_format == "csv":
+        reader = csv.DictReader(io.StringIO(payload.strip()))
+        missing = set(_FIELDS) - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+        return list(reader)
+
+    raise ValueError(
+        f"Unknown payload format '{payload_format}'. Choose one of: {', '.join(PAYLOAD_FORMATS)}"
+    )
+
+
+def validate_record(record: Any) -> Tuple[Optional[tuple], Optional[str]]:
+    """
+    Check one record and convert it to an `(name, age, profession)` tuple.
+
+    Args:
+        record: A dict with name/age/profession keys or a 3-item list
+
+    Returns:
+        tuple: `(values, None)` for a valid record or `(None, error)` otherwise
+    """
+    if isinstance(record, dict):
+        missing = [key for key in _FIELDS if key not in record]
+        if missing:
+            return None, f"missing fields: {', '.join(missing)}"
+        name, age, profession = (record[key] for key in _FIELDS)
+    elif isinstance(record, (list, tuple)):
+        if len(record) != 3:
+            return None, "expected [name, age, profession]"
+        name, age, profession = record
+    else:
+        return None, "expected an object with name, age and profession"
+
+    if not isinstance(name, str) or not name.strip():
+        return None, "name must be a non-empty string"
+    if not isinstance(profession, str) or not profession.strip():
+        return None, "profession must be a non-empty string"
+
+    if isinstance(age, bool):
+        return None, "age must be an integer"
+    if isinstance(age, str):
+        try:
+            age = int(age.strip())
+        except ValueError:
+            return None, "age must be an integer"
+    if isinstance(age, float) and age.is_integer():
+        age = int(age)
+    if not isinstance(age, int) or age < 0:
+        return None, "age must be a non-negative integer"
+    if age > _MAX_AGE:
+        return None, f"age must be at most {_MAX_AGE}"
+
+    return (name.strip(), age, profession.strip()), None
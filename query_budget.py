@@ -0,0 +1,173 @@
+"""
+Query Budgets
+
+Bounds what a single read may cost. While a query runs, SQLite calls a
+progress handler every `check_interval` virtual machine instructions; the
+handler interrupts the query once it has run longer than `timeout`, executed
+more than `max_steps` instructions, or its caller has gone away. Fetching
+more than `max_rows` rows stops the query as well.
+
+    budget = QueryBudget(timeout=5.0, max_steps=50_000_000, max_rows=10_000)
+    cancelled = threading.Event()
+    with budget.enforce(conn, cancelled) as call:
+        rows = call.fetchall(conn.execute(query))
+
+The interrupted query raises `BudgetExceeded`, which names the budget that
+tripped; counts per budget are kept for the stats resource.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator, Optional
+
+__all__ = [
+    "BUDGETS",
+    "DEFAULT_QUERY_MAX_ROWS",
+    "DEFAULT_QUERY_MAX_STEPS",
+    "DEFAULT_QUERY_TIMEOUT",
+    "BudgetExceeded",
+    "BudgetStats",
+    "QueryBudget",
+]
+
+# 0 disables the corresponding budget
+DEFAULT_QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT_MS", "5000")) / 1000
+DEFAULT_QUERY_MAX_STEPS = int(os.getenv("QUERY_MAX_STEPS", "100000000"))
+DEFAULT_QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", "10000"))
+
+# Names reported when a budget trips
+BUDGETS = ("timeout", "max_steps", "max_rows", "cancelled")
+
+_MESSAGES = {
+    "timeout": "Query ran longer than {limit}s",
+    "max_steps": "Query exceeded {limit} SQLite VM steps",
+    "max_rows": "Query returned more than {limit} rows; add a LIMIT or use read_page",
+    "cancelled": "Query cancelled because the client went away",
+}
+
+
+class BudgetExceeded(Exception):
+    """Raised when a query is stopped by one of its budgets."""
+
+    def __init__(self, budget: str, limit=None):
+        self.budget = budget
+        self.limit = limit
+        super().__init__(_MESSAGES[budget].format(limit=limit))
+
+
+@dataclass
+class BudgetStats:
+    """How many calls ran under a budget and which budgets tripped."""
+
+    calls: int = 0
+    timeout: int = 0
+    max_steps: int = 0
+    max_rows: int = 0
+    cancelled: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class _BudgetedCall:
+    """Progress handler and row counter for one query."""
+
+    def __init__(self, budget: "QueryBudget", cancelled: Optional[threading.Event]):
+        self.budget = budget
+        self.cancelled = cancelled
+        self.deadline = time.monotonic() + budget.timeout if budget.timeout else None
+        self.steps = 0
+        self.tripped: Optional[str] = None
+
+    def progress(self) -> int:
+        """Called by SQLite; a non-zero return interrupts the query."""
+        self.steps += self.budget.check_interval
+        if self.cancelled is not None and self.cancelled.is_set():
+            self.tripped = "cancelled"
+        elif self.deadline is not None and time.monotonic() > self.deadline:
+            self.tripped = "timeout"
+        elif self.budget.max_steps and self.steps > self.budget.max_steps:
+            self.tripped = "max_steps"
+        return 1 if self.tripped else 0
+
+    def fetchall(self, cursor: sqlite3.Cursor) -> list:
+        """Fetch every row of `cursor`, stopping once the row budget is exceeded."""
+        max_rows = self.budget.max_rows
+        if not max_rows:
+            return cursor.fetchall()
+        rows = cursor.fetchmany(max_rows + 1)
+        if len(rows) > max_rows:
+            cursor.close()
+            self.tripped = "max_rows"
+            raise BudgetExceeded("max_rows", max_rows)
+        return rows
+
+
+class QueryBudget:
+    """
+    Per-call limits for read queries.
+
+    Args:
+        timeout (float): Wall-clock seconds a query may run (0 disables)
+        max_steps (int): SQLite VM instructions a query may execute (0 disables)
+        max_rows (int): Rows a query may return (0 disables)
+        check_interval (int): VM instructions between progress handler calls
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_QUERY_TIMEOUT,
+        max_steps: int = DEFAULT_QUERY_MAX_STEPS,
+        max_rows: int = DEFAULT_QUERY_MAX_ROWS,
+        check_interval: int = 1000,
+    ):
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.max_rows = max_rows
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stats = BudgetStats()
+
+    def _limit(self, budget: str):
+        return {"timeout": self.timeout, "max_steps": self.max_steps, "max_rows": self.max_rows}.get(budget)
+
+    @contextmanager
+    def enforce(
+        self,
+        conn: sqlite3.Connection,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Iterator[_BudgetedCall]:
+        """
+        Run the enclosed queries on `conn` under this budget.
+
+        Args:
+            conn (sqlite3.Connection): Connection the queries run on
+            cancelled (threading.Event, optional): Set by the caller to stop
+                the query, e.g. when the client disconnects
+
+        Raises:
+            BudgetExceeded: If a budget trips while the block runs
+        """
+        call = _BudgetedCall(self, cancelled)
+        conn.set_progress_handler(call.progress, self.check_interval)
+        try:
+            yield call
+        except sqlite3.OperationalError as e:
+            if call.tripped is None:
+                raise
+            raise BudgetExceeded(call.tripped, self._limit(call.tripped)) from e
+        finally:
+            conn.set_progress_handler(None, 0)
+            with self._lock:
+                self._stats.calls += 1
+                if call.tripped:
+                    setattr(self._stats, call.tripped, getattr(self._stats, call.tripped) + 1)
+
+    def stats(self) -> BudgetStats:
+        """Return a snapshot of the budget counters."""
+        with self._lock:
+            return BudgetStats(**self._stats.as_dict())
@@ -0,0 +1,236 @@
+"""
+Query Result Cache
+
+Agents tend to repeat the same read within a conversation ("show all
+people", "what is the latest record"). Results of `read_data` are kept in an
+in-process LRU keyed on the normalized SQL text and its literal values, so
+queries that differ only in whitespace between tokens or in parameter style
+share an entry. Strings and quoted identifiers are compared as written.
+
+Every committed write clears the cache. A read that was already running when
+a write committed does not store its (possibly stale) rows: entries are only
+stored if no invalidation happened since the read started.
+
+Statements whose result can change without a write are never cached: those
+calling `random()`, `randomblob()`, `changes()`, `total_changes()`,
+`last_insert_rowid()` or any date and time function (`date`, `time`,
+`datetime`, `julianday`, `unixepoch`, `strftime`, `timediff`), or reading
+`CURRENT_DATE`, `CURRENT_TIME` or `CURRENT_TIMESTAMP`. `key()` returns None
+for them, which `get` treats as a miss and `put` skips.
+
+    cache = ResultCache(capacity=256)
+    key, generation = cache.key(query), cache.generation
+    result = cache.get(key)
+    if result is None:
+        result = execute(query)
+        cache.put(key, result, generation, rows=len(result))
+
+Cached values are shared between callers and must not be modified.
+
+When other processes write to the same database file (several server
+processes, or an external tool), `watch(db_path)` makes `sync()` check
+SQLite's `PRAGMA data_version`, which changes whenever another connection
+commits, and clear the cache when it has.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Hashable, Optional
+
+from statement_cache import normalize_sql
+
+__all__ = [
+    "DEFAULT_RESULT_CACHE_MAX_ROWS",
+    "DEFAULT_RESULT_CACHE_SIZE",
+    "ResultCache",
+    "ResultCacheStats",
+]
+
+DEFAULT_RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+
+# Results with more rows than this are returned but not cached
+DEFAULT_RESULT_CACHE_MAX_ROWS = int(os.getenv("RESULT_CACHE_MAX_ROWS", "10000"))
+
+# A string or quoted identifier (kept as written), or a run of whitespace
+_QUOTED_OR_SPACE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])|\s+""")
+
+# Functions and keywords whose value can change between two identical reads
+_NON_DETERMINISTIC = re.compile(
+    r"""\b(?:
+        (?:random|randomblob|changes|total_changes|last_insert_rowid
+          |date|time|datetime|julianday|unixepoch|strftime|timediff)\s*\(
+      | current_(?:date|time|timestamp)\b
+    )""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+@dataclass
+class ResultCacheStats:
+    """Counters for the result cache."""
+
+    enabled: bool = True
+    capacity: int = 0
+    entries: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    skipped: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        stats["hit_rate"] = round(self.hit_rate, 4)
+        return stats
+
+
+class ResultCache:
+    """
+    Size-bounded LRU of query results, cleared on every committed write.
+
+    Args:
+        capacity (int): Maximum number of cached results. 0 disables the cache.
+        max_rows (int): Results with more rows are not cached
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_RESULT_CACHE_SIZE,
+        max_rows: int = DEFAULT_RESULT_CACHE_MAX_ROWS,
+    ):
+        if capacity < 0:
+            raise ValueError("Result cache capacity cannot be negative")
+
+        self.capacity = capacity
+        self.max_rows = max_rows
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = ResultCacheStats(enabled=capacity > 0, capacity=capacity)
+        self._watch: Optional[sqlite3.Connection] = None
+        self._watch_lock = threading.Lock()
+        self._data_version = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    @property
+    def generation(self) -> int:
+        """Number of invalidations so far; pass it to `put` to detect stale reads."""
+        return self._generation
+
+    @staticmethod
+    def key(query: str, params: tuple = (), normalized: bool = False) -> Optional[Hashable]:
+        """
+        Cache key for `query`: its normalized text plus literal (or bound) values.
+        None if `query` calls a non-deterministic function and must not be cached.
+
+        Literals are taken from the raw text; only then is whitespace between
+        tokens collapsed, so strings and quoted identifiers keep their exact
+        spacing and case. Pass `normalized=True` with the output of
+        `normalize_sql` (e.g. the statement cache's memo) to skip that step.
+
+        Example:
+            >>> ResultCache.key("SELECT * FROM people WHERE name = 'John  Doe'") == ResultCache.key(
+            ...     "SELECT * FROM people WHERE name = 'John Doe'")
+            False
+            >>> ResultCache.key('SELECT * FROM people WHERE name = "Bob"') == ResultCache.key(
+            ...     'SELECT * FROM people WHERE name = "bob"')
+            False
+            >>> ResultCache.key("SELECT *  FROM people   WHERE age > 30;") == ResultCache.key(
+            ...     "SELECT * FROM people WHERE age > 30")
+            True
+            >>> ResultCache.key("SELECT * FROM people ORDER BY random() LIMIT 1") is None
+            True
+        """
+        query = query.strip().rstrip(";")
+        if not params and not normalized:
+            query, params = normalize_sql(query)
+        normalized = _QUOTED_OR_SPACE.sub(lambda match: match.group(1) or " ", query).strip()
+        if _NON_DETERMINISTIC.search(normalized):
+            return None
+        # 1 and 1.0 compare equal but do not return the same rows
+        return normalized, tuple((type(value).__name__, value) for value in params)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached result for `key`, or None on a miss."""
+        if not self.enabled or key is None:
+            return None
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return result
+
+    def put(self, key: Hashable, result: Any, generation: int, rows: int) -> bool:
+        """
+        Cache `result` for `key` if nothing was written since `generation`.
+
+        Args:
+            key (Hashable): Key from `key()`; None is never stored
+            result: The query result
+            generation (int): `generation` read before the query ran
+            rows (int): Number of rows in `result`, checked against max_rows
+
+        Returns:
+            bool: Whether the result was stored
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            if key is None or generation != self._generation or rows > self.max_rows:
+                self._stats.skipped += 1
+                return False
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+            return True
+
+    def watch(self, db_path: str) -> None:
+        """Also clear the cache when another connection commits to `db_path`."""
+        if not self.enabled:
+            return
+        conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        with self._watch_lock:
+            self._watch = conn
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def sync(self) -> None:
+        """Clear the cache if the watched database changed since the last call."""
+        if self._watch is None:
+            return
+        with self._watch_lock:
+            version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            changed, self._data_version = version != self._data_version, version
+        if changed:
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop every cached result; called after each committed write."""
+        with self._lock:
+            self._generation += 1
+            if self._entries:
+                self._entries.clear()
+                self._stats.invalidations += 1
+
+    def stats(self) -> ResultCacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            snapshot = ResultCacheStats(**asdict(self._stats))
+            snapshot.entries = len(self._entries)
+        return snapshot
@@ -0,0 +1,136 @@
+"""
+Result Formats
+
+FastMCP turns a returned list into one text content item per element, so a
+`read_data` result of tuples becomes one stringified item per *cell*. The
+compact formats below return one JSON document instead:
+
+- `rows`: the list of row tuples, as before
+- `columnar`: column names once and one array of values per column
+- `binary`: column names and types in JSON plus the column data as a
+  base64-encoded, zlib-compressed binary payload
+
+Binary payload layout, one block per column in order, all little-endian:
+
+    validity bitmap   ceil(row_count / 8) bytes, bit i set if row i is not NULL
+    int64 / float64   row_count * 8 bytes
+    utf8 / blob       (row_count + 1) int32 offsets, then the concatenated bytes
+
+NULL cells hold 0 or an empty value. `decode_result` in azure_client.py
+reverses both compact formats.
+
+    result = format_result(["id", "name"], [(1, "Alice"), (2, None)], "columnar")
+    # {"format": "columnar", "columns": ["id", "name"], "row_count": 2,
+    #  "data": [[1, 2], ["Alice", None]]}
+"""
+
+import base64
+import struct
+import zlib
+from typing import Any, List, Sequence, Union
+
+__all__ = [
+    "COLUMN_TYPES",
+    "RESULT_FORMATS",
+    "format_result",
+    "to_binary",
+    "to_columnar",
+]
+
+RESULT_FORMATS = ("rows", "columnar", "binary")
+
+COLUMN_TYPES = ("int64", "float64", "utf8", "blob")
+
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def to_columnar(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> dict:
+    """Column names once plus one list of values per column."""
+    data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+    return {"format": "columnar", "columns": list(columns), "row_count": len(rows), "data": data}
+
+
+def _column_type(values: Sequence[Any]) -> str:
+    present = [value for value in values if value is not None]
+    numbers = [value for value in present if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    if len(numbers) == len(present):
+        if all(isinstance(value, int) and _INT64_MIN <= value <= _INT64_MAX for value in numbers):
+            return "int64"
+        return "float64"
+    if present and all(isinstance(value, (bytes, bytearray, memoryview)) for value in present):
+        return "blob"
+    return "utf8"
+
+
+def _validity(values: Sequence[Any]) -> bytes:
+    bitmap = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if value is not None:
+            bitmap[index >> 3] |= 1 << (index & 7)
+    return bytes(bitmap)
+
+
+def _encode_column(values: Sequence[Any], column_type: str) -> bytes:
+    count = len(values)
+    if column_type == "int64":
+        data = struct.pack(f"<{count}q", *(0 if value is None else value for value in values))
+    elif column_type == "float64":
+        data = struct.pack(f"<{count}d", *(0.0 if value is None else float(value) for value in values))
+    else:
+        if column_type == "blob":
+            chunks = [b"" if value is None else bytes(value) for value in values]
+        else:
+            chunks = [b"" if value is None else str(value).encode("utf-8") for value in values]
+        offsets = [0]
+        for chunk in chunks:
+            offsets.append(offsets[-1] + len(chunk))
+        data = struct.pack(f"<{count + 1}i", *offsets) + b"".join(chunks)
+    return _validity(values) + data
+
+
+def to_binary(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> dict:
+    """Column names and types plus a base64 binary columnar payload."""
+    values_by_column = list(zip(*rows)) if rows else [() for _ in columns]
+    types = [_column_type(values) for values in values_by_column]
+    payload = b"".join(
+        _encode_column(values, column_type)
+        for values, column_type in zip(values_by_column, types)
+    )
+    return {
+        "format": "binary",
+        "columns": list(columns),
+        "types": types,
+        "row_count": len(rows),
+        "compression": "zlib",
+        "payload": base64.b64encode(zlib.compress(payload, 1)).decode("ascii"),
+    }
+
+
+def format_result(
+    columns: Sequence[str],
+    rows: List[Sequence[Any]],
+    result_format: str = "rows",
+) -> Union[list, dict]:
+    """
+    Shape query results for a tool response.
+
+    Args:
+        columns (list): Column names, in row order
+        rows (list): Result rows
+        result_format (str): `rows`, `columnar` or `binary`
+
+    Returns:
+        list | dict: The rows unchanged, or a columnar document
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if result_format == "rows":
+        return rows
+    if result_format == "columnar":
+        return to_columnar(columns, rows)
+    if result_format == "binary":
+        return to_binary(columns, rows)
+    raise ValueError(
+        f"Unknown result format '{result_format}'. Choose one of: {', '.join(RESULT_FORMATS)}"
+    )
@@ -0,0 +1,195 @@
+"""
+Result Summaries
+
+Large query results are expensive to hand to an LLM: every row is sent back
+into the conversation as tokens. A summary describes the result instead:
+
+- `row_count`
+- per-column stats: type, NULL count, distinct values, min/max/mean for
+  numbers, min/max length for text, and up to `top_k` most common values
+  (values that occur more than once)
+- `sample_rows` rows spread evenly over the result
+
+`read_data` returns a summary when asked for `result_format="summary"` and,
+automatically, when the full result would be larger than `threshold_bytes`
+of JSON. Sizing stops as soon as the threshold is crossed, so checking a
+huge result costs about as much as serializing `threshold_bytes` of it.
+`summarize` walks every row, so `read_data` calls it on the query executor,
+in the same job as the fetch, never on the event loop.
+
+    summarizer = ResultSummarizer(threshold_bytes=32768)
+    if summarizer.exceeds(result):
+        result = summarizer.summarize(columns, rows, auto=True)
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, List, Sequence
+
+__all__ = [
+    "DEFAULT_SUMMARY_SAMPLE_ROWS",
+    "DEFAULT_SUMMARY_THRESHOLD_BYTES",
+    "DEFAULT_SUMMARY_TOP_K",
+    "ResultSummarizer",
+    "SummaryStats",
+    "summarize",
+]
+
+# Results larger than this many bytes of JSON are summarized (0 disables)
+DEFAULT_SUMMARY_THRESHOLD_BYTES = int(os.getenv("SUMMARY_THRESHOLD_BYTES", "32768"))
+DEFAULT_SUMMARY_TOP_K = int(os.getenv("SUMMARY_TOP_K", "5"))
+DEFAULT_SUMMARY_SAMPLE_ROWS = int(os.getenv("SUMMARY_SAMPLE_ROWS", "5"))
+
+
+def _display(value: Any) -> Any:
+    """Cell value as it appears in a summary; blobs are shown by size only."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+def _column_summary(name: str, values: Sequence[Any], top_k: int) -> dict:
+    present = [value for value in values if value is not None]
+    kinds = {
+        "blob" if isinstance(value, (bytes, bytearray, memoryview))
+        else "integer" if isinstance(value, int)
+        else "real" if isinstance(value, float)
+        else "text"
+        for value in present
+    }
+    if kinds == {"integer", "real"}:
+        kinds = {"real"}
+    summary = {
+        "name": name,
+        "type": kinds.pop() if len(kinds) == 1 else ("mixed" if kinds else "null"),
+        "nulls": len(values) - len(present),
+    }
+    hashable = [bytes(value) if isinstance(value, memoryview) else value for value in present]
+    counts = Counter(hashable)
+    summary["distinct"] = len(counts)
+
+    if summary["type"] in ("integer", "real"):
+        summary["min"] = min(present)
+        summary["max"] = max(present)
+        summary["mean"] = round(sum(present) / len(present), 4)
+    elif summary["type"] == "text":
+        lengths = [len(value) for value in present]
+        summary["min_length"] = min(lengths)
+        summary["max_length"] = max(lengths)
+
+    # Values that occur once are not "common"; unique columns get no top list
+    top = [[_display(value), count] for value, count in counts.most_common(top_k) if count > 1]
+    if top_k and top:
+        summary["top"] = top
+    return summary
+
+
+def summarize(
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    top_k: int = DEFAULT_SUMMARY_TOP_K,
+    sample_rows: int = DEFAULT_SUMMARY_SAMPLE_ROWS,
+) -> dict:
+    """
+    Describe a query result without returning all of its rows.
+
+    Args:
+        columns (list): Column names, in row order
+        rows (list): Result rows
+        top_k (int): Most common values listed per column (0 omits them)
+        sample_rows (int): Rows included as a sample, spread over the result
+
+    Returns:
+        dict: `format`, `row_count`, `columns` (one stats dict per column)
+            and `sample`
+    """
+    values_by_column = list(zip(*rows)) if rows else [() for _ in columns]
+    if sample_rows and rows:
+        step = max(1, len(rows) // sample_rows)
+        sample = [[_display(value) for value in row] for row in rows[::step][:sample_rows]]
+    else:
+        sample = []
+    return {
+        "format": "summary",
+        "row_count": len(rows),
+        "columns": [
+            _column_summary(name, values, top_k)
+            for name, values in zip(columns, values_by_column)
+        ],
+        "sample": sample,
+    }
+
+
+@dataclass
+class SummaryStats:
+    """How many results were summarized, on request or automatically."""
+
+    requested: int = 0
+    automatic: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class ResultSummarizer:
+    """
+    Summarizes results on request and cuts over to a summary for large ones.
+
+    Args:
+        threshold_bytes (int): JSON size above which results are summarized
+            automatically (0 disables the cutover)
+        top_k (int): Most common values listed per column
+        sample_rows (int): Rows included as a sample
+    """
+
+    def __init__(
+        self,
+        threshold_bytes: int = DEFAULT_SUMMARY_THRESHOLD_BYTES,
+        top_k: int = DEFAULT_SUMMARY_TOP_K,
+        sample_rows: int = DEFAULT_SUMMARY_SAMPLE_ROWS,
+    ):
+        self.threshold_bytes = threshold_bytes
+        self.top_k = top_k
+        self.sample_rows = sample_rows
+        self._lock = threading.Lock()
+        self._stats = SummaryStats()
+
+    def exceeds(self, result: Any) -> bool:
+        """Whether `result` (rows, or a columnar dict) is over the threshold."""
+        if not self.threshold_bytes:
+            return False
+        items = result.get("data", [result]) if isinstance(result, dict) else result
+        size = 0
+        for item in items:
+            size += len(json.dumps(item, default=str)) + 2
+            if size > self.threshold_bytes:
+                return True
+        return False
+
+    def summarize(self, columns: Sequence[str], rows: List[Sequence[Any]], auto: bool = False) -> dict:
+        """
+        Summarize a result; `auto` marks summaries that replaced the full rows.
+
+        Automatic summaries carry a `note` telling the agent how to get rows.
+        """
+        summary = summarize(columns, rows, top_k=self.top_k, sample_rows=self.sample_rows)
+        summary["auto"] = auto
+        if auto:
+            summary["note"] = (
+                f"The full result is over {self.threshold_bytes} bytes, so it was summarized. "
+                "Narrow the query with WHERE/LIMIT, aggregate it, or page through it with read_page."
+            )
+        with self._lock:
+            if auto:
+                self._stats.automatic += 1
+            else:
+                self._stats.requested += 1
+        return summary
+
+    def stats(self) -> SummaryStats:
+        """Return a snapshot of the summary counters."""
+        with self._lock:
+            return SummaryStats(**self._stats.as_dict())
@@ -1,43 +1,552 @@
 import sqlite3
 import argparse
+import asyncio
+import json
+import logging
 import os
-from mcp.server.fastmcp import FastMCP
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
 
-mcp = FastMCP('sqlite-demo')
+import uvicorn
+from mcp.server.fastmcp import Context
+from mcp.server.fastmcp.exceptions import ToolError
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
 
-def init_db():
-    """Initialize the database with proper error handling."""
+from index_advisor import DEFAULT_INDEX_ADVISOR_MIN_ROWS, DEFAULT_INDEX_ADVISOR_SIZE, IndexAdvisor
+from metrics import InstrumentedFastMCP, add_phase, add_rows, phase, record_error
+from pagination import (
+    MAX_PAGE_BYTES,
+    MAX_STREAM_BYTES,
+    MAX_STREAM_ROWS,
+    decode_cursor,
+    encode_cursor,
+    fetch_page,
+)
+from people_query import compile_count, compile_query
+from people_records import INSERT_PERSON, PAYLOAD_FORMATS, parse_payload, validate_record
+from query_budget import (
+    DEFAULT_QUERY_MAX_ROWS,
+    DEFAULT_QUERY_MAX_STEPS,
+    DEFAULT_QUERY_TIMEOUT,
+    BudgetExceeded,
+    QueryBudget,
+)
+from result_cache import DEFAULT_RESULT_CACHE_SIZE, ResultCache
+from result_format import RESULT_FORMATS, format_result
+from result_summary import (
+    DEFAULT_SUMMARY_SAMPLE_ROWS,
+    DEFAULT_SUMMARY_THRESHOLD_BYTES,
+    DEFAULT_SUMMARY_TOP_K,
+    ResultSummarizer,
+)
+from sqlite_executor import DEFAULT_WORKERS, QueryExecutor
+from sqlite_pool import (
+    DEFAULT_DB_PATH,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_READ_POOL_MODE,
+    DEFAULT_READ_POOL_SIZE,
+    READ_POOL_MODES,
+    SQLitePool,
+)
+from sqlite_writer import DEFAULT_COMMIT_WINDOW, DEFAULT_MAX_BATCH, SQLiteWriter
+from server_logging import (
+    DEFAULT_LOG_FORMAT,
+    DEFAULT_LOG_LEVEL,
+    DEFAULT_LOG_QUERY_MAX_CHARS,
+    DEFAULT_LOG_SAMPLE_RATE,
+    LOG_FORMATS,
+    SAMPLED,
+    QueryText,
+    configure_logging,
+    logging_stats,
+)
+from slow_query_log import (
+    DEFAULT_QUERY_STATS_SIZE,
+    DEFAULT_SLOW_QUERY_LOG,
+    DEFAULT_SLOW_QUERY_MS,
+    REPORT_ORDERS,
+    SlowQueryLog,
+)
+from sse_router import DEFAULT_PROCESSES, SSERouter, spawn_workers
+from streamable_http import DEFAULT_HTTP_PATH, streamable_http_app
+from statement_cache import DEFAULT_STATEMENT_CACHE_SIZE, StatementCache
+from storage_profiles import DEFAULT_STORAGE_PROFILE, PROFILES, get_profile
+
+mcp = InstrumentedFastMCP('sqlite-demo')
+
+# Queue-backed once configure_logging() has run (see server_logging.py)
+logger = logging.getLogger("server")
+
+# Shared connection pool, created once by init_db()
+_pool = None
+
+# Connections used by the read tools, created once by init_read_pool()
+_read_pool = None
+
+# Worker threads that keep blocking SQLite calls off the event loop
+_executor = None
+
+# Dedicated thread that serializes all writes
+_writer = None
+
+# read_data results, cleared by the writer after every commit
+_result_cache = None
+
+# Query plans of read_data queries and the indexes they would need
+_index_advisor = None
+
+# Timeout, VM step and row limits applied to every read
+_budget = None
+
+# Summaries of read_data results, requested or above the size threshold
+_summarizer = None
+
+# Latency and row statistics per query fingerprint, and the slow query log
+_query_log = None
+
+# result_format values accepted by read_data
+READ_DATA_FORMATS = RESULT_FORMATS + ("summary",)
+
+# Upper bound on the number of rows accepted by one add_records call
+MAX_BULK_ROWS = int(os.getenv("MAX_BULK_ROWS", "10000"))
+
+# Statements add_data queues; transaction control and schema changes would
+# break the writer's group-commit transaction
+ADD_DATA_STATEMENTS = ("INSERT", "REPLACE", "UPDATE", "DELETE", "WITH")
+
+# First keyword of a statement, after leading whitespace and comments
+_LEADING_KEYWORD = re.compile(r"(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*([A-Za-z]*)", re.DOTALL)
+
+# Read at startup on every read connection to fill its page cache; ";"-separated
+DEFAULT_WARMUP_QUERIES = [
+    query.strip() for query in os.getenv(
+        "WARMUP_QUERIES",
+        "SELECT count(*) FROM people;"
+        "SELECT max(age), max(length(name)), max(length(profession)) FROM people",
+    ).split(";")
+    if query.strip()
+]
+
+# Set by startup() and served by /health
+_startup = {"status": "starting"}
+
+def init_db(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    storage_profile: str = DEFAULT_STORAGE_PROFILE,
+    statement_cache_size: int = DEFAULT_STATEMENT_CACHE_SIZE,
+) -> SQLitePool:
+    """Initialize the database and its connection pool once.
+
+    The data directory and the people table are created when the pool is
+    opened, so later calls simply return the existing pool. Reads only go
+    through this pool with the "shared" read pool mode, and writes go through
+    the writer's own connection, so in the other modes it is only used to
+    bootstrap the schema.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections
+        storage_profile (str): Name of the storage profile (see storage_profiles.py)
+        statement_cache_size (int): Compiled statements cached per connection (0 disables)
+
+    Returns:
+        SQLitePool: The shared connection pool
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
     try:
-        # Use absolute path for database file
-        db_dir = os.path.join(os.getcwd(), 'data')
-        os.makedirs(db_dir, exist_ok=True)
-        db_path = os.path.join(db_dir, 'demo.db')
-        
-        print(f"Attempting to connect to database at: {db_path}")
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Create the table if it doesn't exist
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS people (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                age INTEGER NOT NULL,
-                profession TEXT NOT NULL
-            )
-        ''')
-        conn.commit()
-        print(f"Database initialization Successfully completed")
-        return conn, cursor
+        profile = get_profile(storage_profile)
+        logger.info("Attempting to connect to database at: %s (profile: %s)", DEFAULT_DB_PATH, profile.name)
+        _pool = SQLitePool(
+            DEFAULT_DB_PATH,
+            size=pool_size,
+            profile=profile,
+            statement_cache=StatementCache(capacity=statement_cache_size),
+        )
+        logger.info("Database initialization Successfully completed")
+        return _pool
     except sqlite3.Error as e:
-        print(f"Database initialization error: {e}")
+        logger.error("Database initialization error: %s", e)
         raise
     except Exception as e:
-        print(f"Unexpected error during database initialization: {e}")
+        logger.exception("Unexpected error during database initialization: %s", e)
         raise
 
+def init_read_pool(
+    mode: str = DEFAULT_READ_POOL_MODE,
+    size: int = DEFAULT_READ_POOL_SIZE,
+    db_path: str = "",
+) -> SQLitePool:
+    """Open the pool used by the read tools once.
+
+    In "ro" mode reads get their own pool of mode=ro connections, sized
+    independently of the writer and unable to take write locks. "immutable"
+    connections skip locking altogether and only see data that has been
+    checkpointed into the database file, so they are meant for a snapshot
+    copy given as `db_path`. "shared" reads through the read-write pool.
+
+    Args:
+        mode (str): "shared", "ro" or "immutable"
+        size (int): Maximum number of read connections
+        db_path (str, optional): Database file to read; defaults to the main database
+
+    Returns:
+        SQLitePool: The pool used by read tools
+    """
+    global _read_pool
+    if _read_pool is not None:
+        return _read_pool
+    pool = init_db()
+    if mode not in READ_POOL_MODES:
+        raise ValueError(f"Unknown read pool mode '{mode}'. Choose one of: {', '.join(READ_POOL_MODES)}")
+    if mode == "shared":
+        _read_pool = pool
+        return _read_pool
+    db_path = db_path or pool.db_path
+    logger.info("Opening %s read pool on: %s", mode, db_path)
+    if mode == "immutable" and db_path == pool.db_path:
+        logger.warning("Immutable reads of the live database only see checkpointed data")
+    _read_pool = SQLitePool(
+        db_path,
+        size=size,
+        profile=pool.profile,
+        statement_cache=pool.statement_cache,
+        read_only=True,
+        immutable=mode == "immutable",
+    )
+    return _read_pool
+
+def init_executor(workers: int = DEFAULT_WORKERS) -> QueryExecutor:
+    """Create the shared query executor once.
+
+    Args:
+        workers (int): Number of worker threads running SQLite calls
+
+    Returns:
+        QueryExecutor: The shared executor
+    """
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor(workers=workers)
+    return _executor
+
+def init_result_cache(capacity: int = DEFAULT_RESULT_CACHE_SIZE, shared_db: bool = False) -> ResultCache:
+    """Create the shared read_data result cache once.
+
+    Args:
+        capacity (int): Maximum number of cached results (0 disables the cache)
+        shared_db (bool): Other processes write to the database too, so
+            check for their commits before serving cached results
+
+    Returns:
+        ResultCache: The shared result cache
+    """
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(capacity=capacity)
+        if shared_db:
+            _result_cache.watch(init_db().db_path)
+    return _result_cache
+
+def init_index_advisor(
+    min_rows: int = DEFAULT_INDEX_ADVISOR_MIN_ROWS,
+    capacity: int = DEFAULT_INDEX_ADVISOR_SIZE,
+) -> IndexAdvisor:
+    """Create the shared index advisor once.
+
+    Args:
+        min_rows (int): Smallest table size at which full scans are flagged
+        capacity (int): Number of query shapes tracked (0 disables the advisor)
+
+    Returns:
+        IndexAdvisor: The shared index advisor
+    """
+    global _index_advisor
+    if _index_advisor is None:
+        _index_advisor = IndexAdvisor(min_rows=min_rows, capacity=capacity)
+    return _index_advisor
+
+def init_budget(
+    timeout: float = DEFAULT_QUERY_TIMEOUT,
+    max_steps: int = DEFAULT_QUERY_MAX_STEPS,
+    max_rows: int = DEFAULT_QUERY_MAX_ROWS,
+) -> QueryBudget:
+    """Create the shared per-call query budget once.
+
+    Args:
+        timeout (float): Seconds a read may run (0 disables)
+        max_steps (int): SQLite VM instructions a read may execute (0 disables)
+        max_rows (int): Rows read_data may return (0 disables)
+
+    Returns:
+        QueryBudget: The shared budget
+    """
+    global _budget
+    if _budget is None:
+        _budget = QueryBudget(timeout=timeout, max_steps=max_steps, max_rows=max_rows)
+    return _budget
+
+def init_summarizer(
+    threshold_bytes: int = DEFAULT_SUMMARY_THRESHOLD_BYTES,
+    top_k: int = DEFAULT_SUMMARY_TOP_K,
+    sample_rows: int = DEFAULT_SUMMARY_SAMPLE_ROWS,
+) -> ResultSummarizer:
+    """Create the shared result summarizer once.
+
+    Args:
+        threshold_bytes (int): JSON size above which read_data results are
+            summarized automatically (0 disables)
+        top_k (int): Most common values listed per column
+        sample_rows (int): Sample rows included in a summary
+
+    Returns:
+        ResultSummarizer: The shared summarizer
+    """
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = ResultSummarizer(
+            threshold_bytes=threshold_bytes, top_k=top_k, sample_rows=sample_rows
+        )
+    return _summarizer
+
+def init_query_log(
+    threshold_ms: float = DEFAULT_SLOW_QUERY_MS,
+    path: str = DEFAULT_SLOW_QUERY_LOG,
+    capacity: int = DEFAULT_QUERY_STATS_SIZE,
+) -> SlowQueryLog:
+    """Create the shared query statistics and slow query log once.
+
+    Args:
+        threshold_ms (float): Milliseconds at or above which an execution is logged as slow
+        path (str): JSONL file slow executions are appended to ("" for none)
+        capacity (int): Query fingerprints tracked (0 disables the statistics)
+
+    Returns:
+        SlowQueryLog: The shared slow query log
+    """
+    global _query_log
+    if _query_log is None:
+        _query_log = SlowQueryLog(threshold=threshold_ms / 1000, path=path, capacity=capacity)
+    return _query_log
+
+def startup(warmup_queries: list = DEFAULT_WARMUP_QUERIES) -> dict:
+    """Get the database ready before the server accepts requests.
+
+    Bootstraps the schema (through init_db), opens every connection of the
+    pool that serves reads, and runs `warmup_queries` on each of them so the
+    first requests find warm page and statement caches. In "ro" and
+    "immutable" modes that is the read pool; the writer opens its
+    connections on demand.
+
+    Args:
+        warmup_queries (list): Read statements run on every read connection
+
+    Returns:
+        dict: The startup report served by /health
+    """
+    started = time.perf_counter()
+    init_db()
+    read_pool = init_read_pool()
+    read_pool.prefill()
+    warmup = read_pool.warm_up(warmup_queries) if warmup_queries else {"connections": 0, "queries": {}}
+    for query, result in warmup["queries"].items():
+        if "error" in result:
+            logger.warning("Warmup query failed: %s (%s)", QueryText(query), result["error"])
+    _startup.update(
+        status="ready",
+        startup_ms=round((time.perf_counter() - started) * 1000, 3),
+        pool_connections=read_pool.stats().open_connections,
+        warmup=warmup,
+    )
+    logger.info(
+        "Ready in %.1f ms: %d warmup queries on %d read connections",
+        _startup["startup_ms"], len(warmup["queries"]), warmup["connections"],
+    )
+    return _startup
+
+def _shape_result(columns: list, rows: list, result_format: str):
+    """Format read_data rows, summarizing them if asked or if they are too large.
+
+    Encoding and summarizing walk every row, so this runs on the executor.
+    """
+    summarizer = init_summarizer()
+    with phase("serialize"):
+        if result_format == "summary":
+            return summarizer.summarize(columns, rows)
+        result = format_result(columns, rows, result_format)
+        # binary is meant for programs, not the LLM context, and is never cut over
+        if result_format != "binary" and summarizer.exceeds(result):
+            logger.info(
+                "Result of %d rows is over %d bytes; summarizing", len(rows), summarizer.threshold_bytes
+            )
+            return summarizer.summarize(columns, rows, auto=True)
+        return result
+
+def init_writer(
+    commit_window: float = DEFAULT_COMMIT_WINDOW,
+    max_batch: int = DEFAULT_MAX_BATCH,
+) -> SQLiteWriter:
+    """Start the single writer thread once, using the pool's database and profile.
+
+    Args:
+        commit_window (float): Seconds to coalesce writes into one commit
+        max_batch (int): Maximum number of writes per commit
+
+    Returns:
+        SQLiteWriter: The shared writer
+    """
+    global _writer
+    if _writer is None:
+        pool = init_db()
+        _writer = SQLiteWriter(
+            pool.db_path,
+            profile=pool.profile,
+            commit_window=commit_window,
+            max_batch=max_batch,
+            on_commit=init_result_cache().invalidate,
+        )
+    return _writer
+
+def _write_statement_error(query: str):
+    """Why add_data must not queue `query`, or None if it is a data change."""
+    keyword = _LEADING_KEYWORD.match(query).group(1).upper()
+    if keyword not in ADD_DATA_STATEMENTS:
+        return f"add_data only runs {', '.join(ADD_DATA_STATEMENTS)} statements, not {keyword or 'an empty query'}"
+    return None
+
+def _execute_write(conn: sqlite3.Connection, query: str) -> int:
+    """Run a write statement on the writer connection; the writer group-commits it."""
+    return conn.execute(query).rowcount
+
+@contextmanager
+def _read_connection():
+    """Borrow a read connection, timing the wait as the tool call's connect phase."""
+    started = time.perf_counter()
+    with init_read_pool().connection() as conn:
+        add_phase("connect", time.perf_counter() - started)
+        yield conn
+
+def _execute_read(query: str, cancelled: threading.Event = None) -> tuple:
+    """Run a read statement on a pooled connection and fetch all rows.
+
+    Literals are turned into parameters so repeated query shapes reuse the
+    connection's compiled statement. The query runs under the query budget
+    and its plan is then handed to the index advisor; its timing, rows and
+    full scans go to the query statistics.
+
+    Returns:
+        tuple: `(column_names, rows)`
+    """
+    pool = init_read_pool()
+    # Normalized once; the statement cache, advisor and statistics share it
+    normalized, params = pool.statement_cache.normalize(query)
+    with _read_connection() as conn:
+        started = time.perf_counter()
+        try:
+            with init_budget().enforce(conn, cancelled) as call:
+                with phase("execute"):
+                    cursor = pool.statement_cache.execute(conn, query)
+                with phase("fetch"):
+                    rows = call.fetchall(cursor)
+        except Exception as e:
+            init_query_log().record(normalized, time.perf_counter() - started, error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - started
+        columns = [column[0] for column in cursor.description or ()]
+        plan = init_index_advisor().record(conn, normalized, params, normalized=True)
+        init_query_log().record(
+            normalized, elapsed, rows=len(rows), full_scans=plan.full_scans if plan else None
+        )
+        return columns, rows
+
+def _execute_query(sql: str, params: tuple, cancelled: threading.Event = None) -> list:
+    """Run a compiled, parameterized query on a pooled connection.
+
+    Compiled queries carry their own LIMIT, so only the time, step and
+    cancellation budgets apply.
+    """
+    pool = init_read_pool()
+    with _read_connection() as conn:
+        started = time.perf_counter()
+        try:
+            with init_budget().enforce(conn, cancelled):
+                with phase("execute"):
+                    cursor = pool.statement_cache.execute(conn, sql, params)
+                with phase("fetch"):
+                    rows = cursor.fetchall()
+        except Exception as e:
+            init_query_log().record(sql, time.perf_counter() - started, error=type(e).__name__)
+            raise
+        elapsed = time.perf_counter() - started
+        # Compiled queries bind every value, so there is nothing to normalize
+        plan = init_index_advisor().record(conn, sql, params, normalized=True)
+        init_query_log().record(
+            sql, elapsed, rows=len(rows), full_scans=plan.full_scans if plan else None
+        )
+        return [list(row) for row in rows]
+
+def _execute_shaped_read(query: str, result_format: str, cancelled: threading.Event = None) -> tuple:
+    """_execute_read and _shape_result in one executor job.
+
+    Returns:
+        tuple: `(column_names, rows, shaped_result)`
+    """
+    columns, rows = _execute_read(query, cancelled)
+    return columns, rows, _shape_result(columns, rows, result_format)
+
+async def _run_read(fn, *args):
+    """Run a read on the executor and stop it if the calling request is cancelled.
+
+    MCP cancels the tool call when the client sends a cancellation or
+    disconnects; the worker thread keeps running, so it is told to interrupt
+    the query through the budget's cancellation event.
+    """
+    cancelled = threading.Event()
+    try:
+        return await init_executor().run(fn, *args, cancelled)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+    except Exception as e:
+        # Counts BudgetExceeded rather than the interrupt it wraps
+        record_error(e)
+        raise
+
+async def _run_compiled(sql: str, params: tuple) -> list:
+    """Execute a compiled query through the result cache."""
+    cache = init_result_cache()
+    cache.sync()
+    key, generation = cache.key(sql, params, normalized=True), cache.generation
+    rows = cache.get(key)
+    if rows is None:
+        rows = await _run_read(_execute_query, sql, params)
+        cache.put(key, rows, generation, rows=len(rows))
+    add_rows(len(rows))
+    return rows
+
+def _index_report(min_rows: int) -> dict:
+    """Flagged query shapes and the indexes recommended for them."""
+    advisor = init_index_advisor()
+    with _read_connection() as conn:
+        return {
+            "queries": advisor.report(conn, min_rows=min_rows),
+            "recommendations": advisor.recommendations(conn, min_rows=min_rows),
+        }
+
+def _execute_page(query: str, after_id, max_rows: int, max_bytes: int, cancelled: threading.Event = None):
+    """Fetch one keyset page on a pooled connection, under the query budget."""
+    with _read_connection() as conn:
+        with init_budget().enforce(conn, cancelled):
+            # fetch_page executes and reads in one step
+            with phase("fetch"):
+                return fetch_page(conn, query, after_id, max_rows=max_rows, max_bytes=max_bytes)
+
 @mcp.tool()
-def add_data(query: str) -> bool:
+async def add_data(query: str) -> bool:
     """Add new data to the people table using a SQL INSERT query.
 
     Args:
@@ -50,6 +559,8 @@ def add_data(query: str) -> bool:
         - age: Integer field (required)
         - profession: Text field (required)
         Note: 'id' field is auto-generated
+        Transaction control (BEGIN, COMMIT, ROLLBACK) and schema changes
+        are rejected.
     
     Returns:
         bool: True if data was added successfully, False otherwise
@@ -59,28 +570,104 @@ def add_data(query: str) -> bool:
         ... INSERT INTO people (name, age, profession)
         ... VALUES ('Alice Smith', 25, 'Developer')
         ... '''
-        >>> add_data(query)
+        >>> await add_data(query)
         True
     """
     try:
-        print(f"Attempting to add data with query: {query}")
-        conn, cursor = init_db()
-        cursor.execute(query)
-        conn.commit()
-        print(f"Successfully added record")
+        logger.debug("Attempting to add data with query: %s", QueryText(query))
+        rejected = _write_statement_error(query)
+        if rejected is not None:
+            logger.warning("Rejected add_data query: %s (query: %s)", rejected, QueryText(query))
+            return False
+        started, rows, error = time.perf_counter(), 0, None
+        try:
+            with phase("execute"):
+                rows = await init_writer().run(lambda conn: _execute_write(conn, query))
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            # Includes the wait for the group commit
+            init_query_log().record(
+                query, time.perf_counter() - started, rows=rows, kind="write", error=error
+            )
+        logger.info("Successfully added record: %s", QueryText(query), extra=SAMPLED)
         return True
     except sqlite3.Error as e:
-        print(f"Error adding data: {e}")
+        logger.warning("Error adding data: %s (query: %s)", e, QueryText(query))
         return False
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return False
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 @mcp.tool()
-def read_data(query: str = "SELECT * FROM people") -> list:
+async def add_records(
+    records: list = [],
+    payload: str = "",
+    payload_format: str = "jsonl",
+) -> dict:
+    """Add many people to the people table in a single call and transaction.
+
+    Prefer this over repeated add_data calls when adding more than one person.
+    Each row is validated on its own; invalid rows are reported and skipped
+    while the valid ones are inserted together.
+
+    Args:
+        records (list, optional): Records as objects or [name, age, profession] lists:
+            [{"name": "Alice Smith", "age": 25, "profession": "Developer"},
+             ["John Doe", 30, "Engineer"]]
+        payload (str, optional): The same records as text, either JSONL (one
+            record per line) or CSV with a "name,age,profession" header
+        payload_format (str, optional): "jsonl" or "csv". Defaults to "jsonl".
+
+    Schema:
+        - name: Text field (required)
+        - age: Integer field (required)
+        - profession: Text field (required)
+        Note: 'id' field is auto-generated
+
+    Returns:
+        dict: {"inserted": int, "failed": int,
+               "rows": [{"index": int, "status": "ok" | "error", "error": str}]}
+            Rows are numbered in input order, records first and then payload.
+
+    Example:
+        >>> await add_records(records=[{"name": "Alice Smith", "age": 25, "profession": "Developer"}])
+        {'inserted': 1, 'failed': 0, 'rows': [{'index': 0, 'status': 'ok'}]}
+    """
+    try:
+        raw = list(records)
+        if payload:
+            if payload_format not in PAYLOAD_FORMATS:
+                raise ValueError(f"payload_format must be one of: {', '.join(PAYLOAD_FORMATS)}")
+            raw.extend(parse_payload(payload, payload_format))
+        if len(raw) > MAX_BULK_ROWS:
+            raise ValueError(f"Too many records: {len(raw)} (limit {MAX_BULK_ROWS})")
+        logger.debug("Attempting to add %d records", len(raw))
+
+        statuses, values = [], []
+        for index, record in enumerate(raw):
+            row, error = validate_record(record)
+            if error:
+                statuses.append({"index": index, "status": "error", "error": error})
+            else:
+                statuses.append({"index": index, "status": "ok"})
+                values.append(row)
+
+        if values:
+            with phase("execute"):
+                await init_writer().run(lambda conn: conn.executemany(INSERT_PERSON, values))
+        logger.info("Successfully added %d records", len(values), extra=SAMPLED)
+        return {"inserted": len(values), "failed": len(raw) - len(values), "rows": statuses}
+    except sqlite3.Error as e:
+        logger.warning("Error adding records: %s", e)
+        return {"inserted": 0, "failed": len(raw), "error": str(e), "rows": []}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"inserted": 0, "failed": 0, "error": str(e), "rows": []}
+
+@mcp.tool()
+async def read_data(query: str = "SELECT * FROM people", result_format: str = "rows") -> list | dict:
     """Read data from the people table using a SQL SELECT query.
 
     Args:
@@ -89,41 +676,426 @@ def read_data(query: str = "SELECT * FROM people") -> list:
             - "SELECT * FROM people"
             - "SELECT name, age FROM people WHERE age > 25"
             - "SELECT * FROM people ORDER BY age DESC"
+        result_format (str, optional): "rows" (default), "columnar" for
+            {"columns": [...], "data": [[column values], ...]} which is much
+            smaller for large results, "binary" for programmatic clients, or
+            "summary" for the row count, per-column stats (nulls, distinct,
+            min/max/mean, most common values) and a few sample rows.
+            Results too large for the conversation are summarized automatically.
     
     Returns:
         list: List of tuples containing the query results.
               For default query, tuple format is (id, name, age, profession)
+        dict: For "columnar" and "binary", the columnar document (see result_format.py);
+              for "summary" or a large result, the summary (see result_summary.py);
+              {"columns": [], "rows": [], "error": str, "budget": str} if a query
+              budget stopped the query, as for the other read tools
     
     Example:
         >>> # Read all records
-        >>> read_data()
+        >>> await read_data()
         [(1, 'John Doe', 30, 'Engineer'), (2, 'Alice Smith', 25, 'Developer')]
         
         >>> # Read with custom query
-        >>> read_data("SELECT name, profession FROM people WHERE age < 30")
+        >>> await read_data("SELECT name, profession FROM people WHERE age < 30")
         [('Alice Smith', 'Developer')]
     """
+    if result_format not in READ_DATA_FORMATS:
+        raise ToolError(f"result_format must be one of: {', '.join(READ_DATA_FORMATS)}")
     try:
-        print(f"Attempting to read data with query: {query}")
-        conn, cursor = init_db()
-        cursor.execute(query)
-        results = cursor.fetchall()
-        print(f"Successfully retrieved {len(results)} records")
-        return results
+        logger.debug("Attempting to read data with query: %s", QueryText(query))
+        cache = init_result_cache()
+        cache.sync()
+        # Memoized, so _execute_read reuses this normalization
+        normalized, params = init_read_pool().statement_cache.normalize(query)
+        key, generation = cache.key(normalized, params, normalized=True), cache.generation
+        result = cache.get(key)
+        if result is not None:
+            columns, results = result
+            logger.info(
+                "Successfully retrieved %d cached records: %s", len(results), QueryText(query), extra=SAMPLED
+            )
+            add_rows(len(results))
+            return await init_executor().run(_shape_result, columns, results, result_format)
+        columns, results, shaped = await _run_read(_execute_shaped_read, query, result_format)
+        cache.put(key, (columns, results), generation, rows=len(results))
+        logger.info("Successfully retrieved %d records: %s", len(results), QueryText(query), extra=SAMPLED)
+        add_rows(len(results))
+        return shaped
+    except BudgetExceeded as e:
+        logger.warning("Query budget exceeded (%s): %s", e.budget, e)
+        return {"columns": [], "rows": [], "error": str(e), "budget": e.budget}
     except sqlite3.Error as e:
-        print(f"Error reading data: {e}")
+        logger.warning("Error reading data: %s (query: %s)", e, QueryText(query))
         return []
     except Exception as e:
-        print(f"Unexpected error: {e}")
+        logger.error("Unexpected error: %s", e)
         return []
-    finally:
-        if 'conn' in locals():
-            conn.close()
+
+@mcp.tool()
+async def find_people(
+    filters: list = [],
+    columns: list = [],
+    order_by: list = [],
+    limit: int = 100,
+) -> dict:
+    """Find people by structured filters, without writing SQL.
+
+    Prefer this over read_data. Filters are combined with AND.
+
+    Args:
+        filters (list, optional): Conditions as [column, op, value], e.g.
+            [["age", ">", 25], ["profession", "=", "Engineer"]].
+            Columns: id, name, age, profession.
+            Ops: =, !=, <, <=, >, >=, in, not in, between, like.
+            "in"/"not in" take a list of values, "between" takes [low, high],
+            "like" takes a pattern with % wildcards.
+        columns (list, optional): Columns to return, e.g. ["name", "age"]. All if empty.
+        order_by (list, optional): Sort columns; prefix with "-" for descending, e.g. ["-age"].
+        limit (int, optional): Maximum rows (server limit applies). Defaults to 100.
+
+    Returns:
+        dict: {"columns": [...], "rows": [[...], ...]}
+
+    Example:
+        >>> await find_people([["age", ">", 25]], ["name", "age"], ["-age"], 2)
+        {'columns': ['name', 'age'], 'rows': [['John Doe', 30], ['Jane Roe', 28]]}
+    """
+    try:
+        sql, params, names = compile_query(filters, columns, order_by, limit)
+        logger.debug("Attempting to find people with query: %s %s", QueryText(sql), params)
+        rows = await _run_compiled(sql, params)
+        logger.info("Successfully found %d people: %s", len(rows), QueryText(sql), extra=SAMPLED)
+        return {"columns": names, "rows": rows}
+    except BudgetExceeded as e:
+        logger.warning("Query budget exceeded (%s): %s", e.budget, e)
+        return {"columns": [], "rows": [], "error": str(e), "budget": e.budget}
+    except sqlite3.Error as e:
+        logger.warning("Error finding people: %s", e)
+        return {"columns": [], "rows": [], "error": str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"columns": [], "rows": [], "error": str(e)}
+
+@mcp.tool()
+async def count_people(filters: list = [], group_by: str = "") -> dict:
+    """Count people matching structured filters, optionally per value of one column.
+
+    Args:
+        filters (list, optional): Conditions as [column, op, value], as in find_people.
+        group_by (str, optional): Column to count per value, e.g. "profession".
+
+    Returns:
+        dict: {"columns": [...], "rows": [[...], ...]}
+
+    Example:
+        >>> await count_people([["age", ">", 25]], "profession")
+        {'columns': ['profession', 'count'], 'rows': [['Engineer', 3], ['Developer', 1]]}
+    """
+    try:
+        sql, params, names = compile_count(filters, group_by)
+        logger.debug("Attempting to count people with query: %s %s", QueryText(sql), params)
+        rows = await _run_compiled(sql, params)
+        logger.info("Successfully counted %d groups: %s", len(rows), QueryText(sql), extra=SAMPLED)
+        return {"columns": names, "rows": rows}
+    except BudgetExceeded as e:
+        logger.warning("Query budget exceeded (%s): %s", e.budget, e)
+        return {"columns": [], "rows": [], "error": str(e), "budget": e.budget}
+    except sqlite3.Error as e:
+        logger.warning("Error counting people: %s", e)
+        return {"columns": [], "rows": [], "error": str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"columns": [], "rows": [], "error": str(e)}
+
+@mcp.tool()
+async def read_page(
+    query: str = "SELECT * FROM people",
+    page_size: int = 100,
+    cursor: str = "",
+) -> dict:
+    """Read one bounded page of a SQL SELECT query, ordered by id.
+
+    Use this instead of read_data when the table may be large. Pass the
+    returned next_cursor back (with the same query) to get the following page.
+    Rows always come in id order; a query with its own top-level ORDER BY,
+    LIMIT or OFFSET is rejected with an error.
+
+    Args:
+        query (str, optional): SQL SELECT query that selects the id column.
+            Defaults to "SELECT * FROM people".
+        page_size (int, optional): Rows per page (server limit applies). Defaults to 100.
+        cursor (str, optional): next_cursor from the previous page. Empty for the first page.
+
+    Returns:
+        dict: {"columns": [...], "rows": [[...], ...], "next_cursor": str | None,
+               "truncated_by": "rows" | "bytes" | None}
+            next_cursor is None on the last page.
+
+    Example:
+        >>> page = await read_page("SELECT id, name FROM people WHERE age > 25", page_size=2)
+        >>> page["rows"], page["next_cursor"]
+        ([[1, 'John Doe'], [4, 'Jane Roe']], 'eyJxIjoiN2Y...')
+        >>> await read_page("SELECT id, name FROM people WHERE age > 25", 2, page["next_cursor"])
+    """
+    try:
+        logger.debug("Attempting to read page with query: %s", QueryText(query))
+        after_id = decode_cursor(cursor, query) if cursor else None
+        page = await _run_read(_execute_page, query, after_id, page_size, MAX_PAGE_BYTES)
+        logger.info(
+            "Successfully retrieved page of %d records: %s", len(page.rows), QueryText(query), extra=SAMPLED
+        )
+        add_rows(len(page.rows))
+        return page.as_dict()
+    except BudgetExceeded as e:
+        logger.warning("Query budget exceeded (%s): %s", e.budget, e)
+        return {"columns": [], "rows": [], "next_cursor": None, "error": str(e), "budget": e.budget}
+    except sqlite3.Error as e:
+        logger.warning("Error reading page: %s (query: %s)", e, QueryText(query))
+        return {"columns": [], "rows": [], "next_cursor": None, "error": str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"columns": [], "rows": [], "next_cursor": None, "error": str(e)}
+
+@mcp.tool()
+async def stream_data(
+    ctx: Context,
+    query: str = "SELECT * FROM people",
+    chunk_size: int = 100,
+    max_rows: int = MAX_STREAM_ROWS,
+    cursor: str = "",
+) -> dict:
+    """Stream the rows of a SQL SELECT query to the client in chunks, ordered by id.
+
+    Each chunk is sent as it is read, as a log notification from logger
+    "stream_data" with data {"columns": [...], "rows": [[...], ...]}. The
+    tool result only summarizes the stream. A stream stops after max_rows
+    rows or the server's byte limit; pass next_cursor back to continue.
+    Rows always come in id order; a query with its own top-level ORDER BY,
+    LIMIT or OFFSET is rejected with an error.
+
+    Args:
+        query (str, optional): SQL SELECT query that selects the id column.
+            Defaults to "SELECT * FROM people".
+        chunk_size (int, optional): Rows per notification. Defaults to 100.
+        max_rows (int, optional): Rows to stream before stopping (server limit applies).
+        cursor (str, optional): next_cursor of a previous stream or page.
+
+    Returns:
+        dict: {"rows_streamed": int, "chunks": int, "next_cursor": str | None,
+               "truncated_by": "rows" | "bytes" | None}
+    """
+    max_rows = max(1, min(max_rows, MAX_STREAM_ROWS))
+    streamed = chunks = size = 0
+    truncated_by = None
+    try:
+        logger.debug("Attempting to stream data with query: %s", QueryText(query))
+        after_id = decode_cursor(cursor, query) if cursor else None
+        while True:
+            if streamed >= max_rows:
+                truncated_by = "rows"
+                break
+            if size >= MAX_STREAM_BYTES:
+                truncated_by = "bytes"
+                break
+            page = await _run_read(
+                _execute_page,
+                query,
+                after_id,
+                min(chunk_size, max_rows - streamed),
+                min(MAX_PAGE_BYTES, MAX_STREAM_BYTES - size),
+            )
+            if page.rows:
+                await ctx.request_context.session.send_log_message(
+                    level="info",
+                    data={"columns": page.columns, "rows": page.rows},
+                    logger="stream_data",
+                )
+                await ctx.report_progress(streamed + len(page.rows))
+                streamed += len(page.rows)
+                size += page.size_bytes
+                chunks += 1
+                after_id = page.last_id
+            if page.next_cursor is None:
+                break
+
+        logger.info(
+            "Successfully streamed %d records in %d chunks: %s", streamed, chunks, QueryText(query), extra=SAMPLED
+        )
+        add_rows(streamed)
+        return {
+            "rows_streamed": streamed,
+            "chunks": chunks,
+            "next_cursor": encode_cursor(query, after_id) if truncated_by else None,
+            "truncated_by": truncated_by,
+        }
+    except BudgetExceeded as e:
+        logger.warning("Query budget exceeded (%s): %s", e.budget, e)
+        return {
+            "rows_streamed": streamed,
+            "chunks": chunks,
+            "next_cursor": encode_cursor(query, after_id) if after_id is not None else None,
+            "error": str(e),
+            "budget": e.budget,
+        }
+    except sqlite3.Error as e:
+        logger.warning("Error streaming data: %s (query: %s)", e, QueryText(query))
+        return {"rows_streamed": streamed, "chunks": chunks, "next_cursor": None, "error": str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"rows_streamed": streamed, "chunks": chunks, "next_cursor": None, "error": str(e)}
+
+@mcp.tool()
+async def index_advice(min_rows: int = -1) -> dict:
+    """Admin: list read_data queries that scan a whole table and the indexes that would help.
+
+    Args:
+        min_rows (int, optional): Only report full scans of tables with at
+            least this many rows. -1 (the default) uses the server's threshold.
+
+    Returns:
+        dict: {"queries": [{"query": str, "calls": int, "plan": [str, ...],
+                            "full_scans": [str, ...], "table_rows": {table: int},
+                            "recommendation": str | None}, ...],
+               "recommendations": [str, ...]}
+            Queries are normalized (literals replaced by ?) and ordered by calls.
+    """
+    try:
+        if min_rows < 0:
+            min_rows = init_index_advisor().min_rows
+        logger.info("Collecting index advice for full scans of at least %d rows", min_rows)
+        return await init_executor().run(_index_report, min_rows)
+    except sqlite3.Error as e:
+        logger.warning("Error collecting index advice: %s", e)
+        return {"queries": [], "recommendations": [], "error": str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"queries": [], "recommendations": [], "error": str(e)}
+
+@mcp.tool()
+async def create_recommended_indexes(dry_run: bool = False) -> dict:
+    """Admin: create the indexes recommended by index_advice (at the server's threshold).
+
+    Args:
+        dry_run (bool, optional): Only return the CREATE INDEX statements
+            without running them. Defaults to False.
+
+    Returns:
+        dict: {"created": [str, ...], "failed": [{"statement": str, "error": str}],
+               "dry_run": bool}
+    """
+    created, failed = [], []
+    try:
+        report = await init_executor().run(_index_report, init_index_advisor().min_rows)
+        statements = report["recommendations"]
+        if dry_run:
+            return {"created": statements, "failed": failed, "dry_run": True}
+        for statement in statements:
+            logger.info("Creating index: %s", statement)
+            try:
+                with phase("execute"):
+                    await init_writer().run(lambda conn, statement=statement: conn.execute(statement))
+                created.append(statement)
+            except sqlite3.Error as e:
+                failed.append({"statement": statement, "error": str(e)})
+        logger.info("Successfully created %d indexes", len(created))
+        return {"created": created, "failed": failed, "dry_run": False}
+    except sqlite3.Error as e:
+        logger.warning("Error creating indexes: %s", e)
+        return {"created": created, "failed": failed, "dry_run": dry_run, "error": str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"created": created, "failed": failed, "dry_run": dry_run, "error": str(e)}
+
+@mcp.tool()
+async def slow_queries(top_n: int = 10, order_by: str = "total") -> dict:
+    """Admin: the query shapes that cost the database the most.
+
+    Queries from read_data, find_people, count_people and add_data are grouped by fingerprint (the SQL
+    with its literals replaced by ?).
+
+    Args:
+        top_n (int, optional): Number of query shapes returned. Defaults to 10.
+        order_by (str, optional): "total" (time spent, the default), "p50",
+            "p95", "p99", "calls", or "scan_ratio" (rows scanned per row returned).
+
+    Returns:
+        dict: {"queries": [{"fingerprint": str, "query": str, "kind": "read" | "write",
+                            "calls": int, "errors": int, "slow": int,
+                            "total_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms": float,
+                            "rows_returned": float, "rows_scanned": float | None,
+                            "scan_ratio": float | None, "full_scans": [str, ...] | None,
+                            "last_seen": str}, ...],
+               "slow_query_ms": float}
+            rows_returned and rows_scanned are per call; rows_scanned is
+            estimated from the query plan's full table scans.
+    """
+    try:
+        if order_by not in REPORT_ORDERS:
+            raise ValueError(f"order_by must be one of: {', '.join(REPORT_ORDERS)}")
+        logger.info("Collecting the top %d query fingerprints by %s", top_n, order_by)
+
+        def report():
+            with _read_connection() as conn:
+                return init_query_log().report(conn, top_n=top_n, order_by=order_by)
+
+        return {
+            "queries": await init_executor().run(report),
+            "slow_query_ms": init_query_log().threshold * 1000,
+        }
+    except sqlite3.Error as e:
+        logger.warning("Error collecting query statistics: %s", e)
+        return {"queries": [], "error": str(e)}
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return {"queries": [], "error": str(e)}
+
+@mcp.resource("stats://database")
+def database_stats() -> str:
+    """Connection pool, cache, query budget, executor and writer counters."""
+    return json.dumps(
+        {
+            "pool": init_db().stats().as_dict(),
+            "read_pool": init_read_pool().stats().as_dict(),
+            "statement_cache": init_db().statement_cache.stats().as_dict(),
+            "result_cache": init_result_cache().stats().as_dict(),
+            "query_budget": {
+                "timeout": init_budget().timeout,
+                "max_steps": init_budget().max_steps,
+                "max_rows": init_budget().max_rows,
+                "tripped": init_budget().stats().as_dict(),
+            },
+            "summaries": {
+                "threshold_bytes": init_summarizer().threshold_bytes,
+                **init_summarizer().stats().as_dict(),
+            },
+            "executor": init_executor().stats().as_dict(),
+            "logging": logging_stats(),
+            "writer": init_writer().stats().as_dict(),
+            "storage_profile": init_db().profile.as_dict(),
+        },
+        indent=2,
+    )
+
+@mcp.resource("metrics://tools")
+def tool_metrics() -> str:
+    """Per-tool calls, errors, rows returned and latency by phase."""
+    return json.dumps(mcp.metrics.snapshot(), indent=2)
+
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """GET /metrics: the tool metrics in the Prometheus text format."""
+    return PlainTextResponse(mcp.metrics.render(), media_type="text/plain; version=0.0.4")
+
+async def health(request: Request) -> JSONResponse:
+    """GET /health: the startup report.
+
+    The route is only mounted after startup() has run, so it always
+    answers 200; until then the port is closed.
+    """
+    return JSONResponse(_startup)
 
 if __name__ == "__main__":
     # Start the server
-    print("🚀Starting server... ")
-
     # Debug Mode
     #  uv run mcp dev server.py
 
@@ -132,11 +1104,209 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "--server_type", type=str, default="sse", choices=["sse", "stdio"]
+        "--server_type", type=str, default="sse", choices=["sse", "stdio", "streamable-http"],
+        help="streamable-http serves stateless JSON-RPC POSTs on /mcp",
+    )
+    parser.add_argument(
+        "--host", type=str, default=mcp.settings.host,
+        help="Interface the SSE server listens on",
+    )
+    parser.add_argument(
+        "--port", type=int, default=mcp.settings.port,
+        help="Port the SSE server listens on",
+    )
+    parser.add_argument(
+        "--processes", type=int, default=DEFAULT_PROCESSES,
+        help="SSE or streamable HTTP server processes sharing the database behind "
+             "a router (ports --port+1 ... --port+N)",
+    )
+    parser.add_argument(
+        "--shared_db", action="store_true",
+        help="Other processes write to the database too; check for their commits "
+             "before serving cached results",
+    )
+    parser.add_argument(
+        "--storage_profile", type=str, default=DEFAULT_STORAGE_PROFILE,
+        choices=list(PROFILES),
+        help="SQLite journal/sync/cache settings (see storage_profiles.py)",
+    )
+    parser.add_argument(
+        "--pool_size", type=int, default=DEFAULT_POOL_SIZE,
+        help="Maximum number of pooled read-write connections; they only serve reads "
+             "with --read_pool=shared, otherwise they just bootstrap the schema",
+    )
+    parser.add_argument(
+        "--read_pool", type=str, default=DEFAULT_READ_POOL_MODE, choices=list(READ_POOL_MODES),
+        help="Connections used by read tools: the read-write pool, mode=ro, or immutable",
+    )
+    parser.add_argument(
+        "--read_pool_size", type=int, default=DEFAULT_READ_POOL_SIZE,
+        help="Maximum number of read-only connections",
+    )
+    parser.add_argument(
+        "--read_db_path", type=str, default="",
+        help="Database file for the read pool, e.g. an immutable snapshot copy",
+    )
+    parser.add_argument(
+        "--statement_cache_size", type=int, default=DEFAULT_STATEMENT_CACHE_SIZE,
+        help="Compiled statements cached per pooled connection (0 disables)",
+    )
+    parser.add_argument(
+        "--result_cache_size", type=int, default=DEFAULT_RESULT_CACHE_SIZE,
+        help="Maximum number of cached read_data results",
+    )
+    parser.add_argument(
+        "--no_result_cache", action="store_true",
+        help="Disable the read_data result cache",
+    )
+    parser.add_argument(
+        "--index_advisor_min_rows", type=int, default=DEFAULT_INDEX_ADVISOR_MIN_ROWS,
+        help="Smallest table size at which the index advisor flags full scans",
+    )
+    parser.add_argument(
+        "--no_index_advisor", action="store_true",
+        help="Do not record query plans of read_data queries",
+    )
+    parser.add_argument(
+        "--query_timeout_ms", type=float, default=DEFAULT_QUERY_TIMEOUT * 1000,
+        help="Milliseconds a read query may run (0 disables)",
+    )
+    parser.add_argument(
+        "--query_max_steps", type=int, default=DEFAULT_QUERY_MAX_STEPS,
+        help="SQLite VM instructions a read query may execute (0 disables)",
+    )
+    parser.add_argument(
+        "--query_max_rows", type=int, default=DEFAULT_QUERY_MAX_ROWS,
+        help="Rows a read_data call may return (0 disables)",
+    )
+    parser.add_argument(
+        "--summary_threshold_bytes", type=int, default=DEFAULT_SUMMARY_THRESHOLD_BYTES,
+        help="Summarize read_data results larger than this many bytes of JSON (0 disables)",
+    )
+    parser.add_argument(
+        "--summary_top_k", type=int, default=DEFAULT_SUMMARY_TOP_K,
+        help="Most common values listed per column in a summary",
+    )
+    parser.add_argument(
+        "--summary_sample_rows", type=int, default=DEFAULT_SUMMARY_SAMPLE_ROWS,
+        help="Sample rows included in a summary",
+    )
+    parser.add_argument(
+        "--warmup_queries", type=str, nargs="*", default=DEFAULT_WARMUP_QUERIES,
+        help="Queries run on every read connection at startup to fill its page cache",
+    )
+    parser.add_argument(
+        "--no_warmup", action="store_true",
+        help="Skip the warmup queries (connections are still opened at startup)",
+    )
+    parser.add_argument(
+        "--slow_query_ms", type=float, default=DEFAULT_SLOW_QUERY_MS,
+        help="Log read_data/add_data executions at least this slow (0 logs all)",
+    )
+    parser.add_argument(
+        "--slow_query_log", type=str, default=DEFAULT_SLOW_QUERY_LOG,
+        help="JSONL file slow executions are appended to (empty for none); "
+             "report it with `python slow_query_log.py`",
+    )
+    parser.add_argument(
+        "--log_level", type=str.upper, default=DEFAULT_LOG_LEVEL,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Minimum level of server log records; DEBUG also logs every query before it runs",
+    )
+    parser.add_argument(
+        "--log_format", type=str, default=DEFAULT_LOG_FORMAT, choices=list(LOG_FORMATS),
+        help="Server log records as text lines or JSON objects",
+    )
+    parser.add_argument(
+        "--log_sample_rate", type=float, default=DEFAULT_LOG_SAMPLE_RATE,
+        help="Fraction of per-call success messages logged (1 logs all, 0 none)",
+    )
+    parser.add_argument(
+        "--log_query_max_chars", type=int, default=DEFAULT_LOG_QUERY_MAX_CHARS,
+        help="Characters of query text included in log records (0 for whole queries)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help="Number of threads running SQLite queries off the event loop",
+    )
+    parser.add_argument(
+        "--commit_window_ms", type=float, default=DEFAULT_COMMIT_WINDOW * 1000,
+        help="Milliseconds to coalesce concurrent writes into one commit",
+    )
+    parser.add_argument(
+        "--commit_batch_size", type=int, default=DEFAULT_MAX_BATCH,
+        help="Maximum number of writes committed together",
     )
 
     args = parser.parse_args()
-    mcp.run(args.server_type)
+    mcp.settings.host, mcp.settings.port = args.host, args.port
+    configure_logging(
+        level=args.log_level,
+        log_format=args.log_format,
+        sample_rate=args.log_sample_rate,
+        query_max_chars=args.log_query_max_chars,
+    )
+    logger.info("🚀Starting server... ")
+
+    # Open the pool and bootstrap the schema before accepting requests
+    init_db(
+        pool_size=args.pool_size,
+        storage_profile=args.storage_profile,
+        statement_cache_size=args.statement_cache_size,
+    )
+
+    if args.server_type != "stdio" and args.processes > 1:
+        # The schema now exists; each worker opens its own pool, executor and
+        # writer on the shared WAL database and SSE sessions stick to a worker
+        logger.info("Starting %d server processes behind the router", args.processes)
+        command = [sys.executable, os.path.abspath(__file__)] + sys.argv[1:] + [
+            "--processes", "1", "--shared_db",
+        ]
+        workers = spawn_workers(args.processes, command, "127.0.0.1", args.port + 1)
+        SSERouter(
+            workers, mcp.settings.sse_path, mcp.settings.message_path, DEFAULT_HTTP_PATH
+        ).serve(args.host, args.port)
+        sys.exit(0)
+
+    if args.read_pool != "shared" and args.pool_size != DEFAULT_POOL_SIZE:
+        logger.warning(
+            "--pool_size only applies with --read_pool=shared; %s reads use --read_pool_size",
+            args.read_pool,
+        )
+    init_read_pool(mode=args.read_pool, size=args.read_pool_size, db_path=args.read_db_path)
+    init_executor(workers=args.workers)
+    init_budget(
+        timeout=args.query_timeout_ms / 1000,
+        max_steps=args.query_max_steps,
+        max_rows=args.query_max_rows,
+    )
+    init_result_cache(
+        capacity=0 if args.no_result_cache else args.result_cache_size,
+        shared_db=args.shared_db,
+    )
+    init_summarizer(
+        threshold_bytes=args.summary_threshold_bytes,
+        top_k=args.summary_top_k,
+        sample_rows=args.summary_sample_rows,
+    )
+    init_query_log(threshold_ms=args.slow_query_ms, path=args.slow_query_log)
+    init_index_advisor(
+        min_rows=args.index_advisor_min_rows,
+        capacity=0 if args.no_index_advisor else DEFAULT_INDEX_ADVISOR_SIZE,
+    )
+    init_writer(
+        commit_window=args.commit_window_ms / 1000,
+        max_batch=args.commit_batch_size,
+    )
+    # The port only opens once the pools are open and warm
+    startup([] if args.no_warmup else args.warmup_queries)
+    if args.server_type == "stdio":
+        mcp.run(args.server_type)
+    else:
+        app = streamable_http_app(mcp) if args.server_type == "streamable-http" else mcp.sse_app()
+        app.add_route("/metrics", prometheus_metrics)
+        app.add_route("/health", health)
+        uvicorn.run(app, host=args.host, port=args.port, log_level=mcp.settings.log_level.lower())
 
 
 
@@ -0,0 +1,217 @@
+"""
+Server Logging
+
+Non-blocking, structured logging for the MCP server. Tools log through a
+`QueueHandler`, so a call only puts the record on a bounded queue; a
+`QueueListener` thread formats it and writes it to stderr (stdout carries the
+protocol in stdio mode). When the queue is full, records are dropped and
+counted instead of blocking the tool.
+
+Records carry the `flask_logger` fields that make sense outside Flask:
+`trace_id` is the MCP request id, `client_id` the client's name from its
+initialize request, and `func_info` the caller as `module:function:line`.
+`LOG_FORMAT=json` writes one JSON object per line instead of the text format.
+
+Hot success messages are logged with `extra=SAMPLED`; only every Nth record
+of each such message (by its %-format template) is written, per
+`LOG_SAMPLE_RATE`. Queries are wrapped in `QueryText`, which truncates them
+to `LOG_QUERY_MAX_CHARS` only when a record is actually written.
+
+    logger = logging.getLogger("server")
+    configure_logging(level="INFO", sample_rate=0.1)
+    logger.info("Read %d records: %s", len(rows), QueryText(query), extra=SAMPLED)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from mcp.server.lowlevel.server import request_ctx
+
+__all__ = [
+    "DEFAULT_LOG_FORMAT",
+    "DEFAULT_LOG_LEVEL",
+    "DEFAULT_LOG_QUERY_MAX_CHARS",
+    "DEFAULT_LOG_QUEUE_SIZE",
+    "DEFAULT_LOG_SAMPLE_RATE",
+    "LOG_FORMATS",
+    "SAMPLED",
+    "QueryText",
+    "configure_logging",
+    "logging_stats",
+]
+
+LOG_FORMATS = ("text", "json")
+
+DEFAULT_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+DEFAULT_LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+# Fraction of sampled success messages written (1 writes all of them)
+DEFAULT_LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+# Characters of query text written per record (0 writes whole queries)
+DEFAULT_LOG_QUERY_MAX_CHARS = int(os.getenv("LOG_QUERY_MAX_CHARS", "200"))
+DEFAULT_LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Pass as `extra=` to log a hot success message through the sampler
+SAMPLED = {"sampled": True}
+
+# The flask_logger layout without the per-record memory columns
+TEXT_FORMAT = (
+    "%(asctime)s+00:00 | [%(trace_id)s] | %(levelname)s | "
+    "client_id=%(client_id)s | %(func_info)s | %(message)s"
+)
+
+_query_max_chars = DEFAULT_LOG_QUERY_MAX_CHARS
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["_QueueHandler"] = None
+_sampler: Optional["_SamplingFilter"] = None
+
+
+class QueryText:
+    """SQL text for a log message, whitespace-collapsed and truncated when formatted."""
+
+    __slots__ = ("query",)
+
+    def __init__(self, query: str):
+        self.query = query
+
+    def __str__(self) -> str:
+        text = " ".join(str(self.query).split())
+        if _query_max_chars and len(text) > _query_max_chars:
+            return f"{text[:_query_max_chars]}... ({len(text)} chars)"
+        return text
+
+
+class _ContextFilter(logging.Filter):
+    """Adds trace_id, client_id and func_info while still in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        try:
+            context = request_ctx.get()
+        except LookupError:
+            context = None
+        if context is not None:
+            record.trace_id = str(context.request_id)
+            params = getattr(context.session, "client_params", None)
+            record.client_id = params.clientInfo.name if params is not None else "no-client-id"
+        else:
+            record.trace_id = "no-trace-id"
+            record.client_id = "no-client-id"
+        record.func_info = f"{record.module}:{record.funcName}:{record.lineno}"
+        return True
+
+
+class _SamplingFilter(logging.Filter):
+    """Keeps the first and then every Nth record of each sampled message."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.dropped = 0
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        with self._lock:
+            seen = self._seen.get(record.msg, 0)
+            self._seen[record.msg] = seen + 1
+            keep = self.every > 0 and seen % self.every == 0
+            if not keep:
+                self.dropped += 1
+        return keep
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S+00:00"),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": record.trace_id,
+            "client_id": record.client_id,
+            "func_info": record.func_info,
+            # QueueHandler.prepare already appended any traceback
+            "message": record.getMessage(),
+        }
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(
+    level: str = DEFAULT_LOG_LEVEL,
+    log_format: str = DEFAULT_LOG_FORMAT,
+    sample_rate: float = DEFAULT_LOG_SAMPLE_RATE,
+    query_max_chars: int = DEFAULT_LOG_QUERY_MAX_CHARS,
+    queue_size: int = DEFAULT_LOG_QUEUE_SIZE,
+    logger_name: str = "server",
+) -> logging.Logger:
+    """
+    Route `logger_name` through the background queue once.
+
+    Args:
+        level (str): Minimum level written, e.g. "INFO" or "WARNING"
+        log_format (str): "text" or "json"
+        sample_rate (float): Fraction of `SAMPLED` records written per message
+        query_max_chars (int): Characters of `QueryText` written (0 for all)
+        queue_size (int): Records buffered before new ones are dropped
+        logger_name (str): Logger to configure
+
+    Returns:
+        logging.Logger: The configured logger
+    """
+    global _listener, _handler, _sampler, _query_max_chars
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(level.upper())
+    if _listener is not None:
+        return logger
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{log_format}'. Choose one of: {', '.join(LOG_FORMATS)}")
+
+    _query_max_chars = query_max_chars
+    if log_format == "json":
+        formatter = _JSONFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT, datefmt="%Y-%m-%dT%H:%M:%S")
+    formatter.converter = time.gmtime
+    output = logging.StreamHandler()
+    output.setFormatter(formatter)
+
+    _sampler = _SamplingFilter(sample_rate)
+    _handler = _QueueHandler(queue.Queue(maxsize=queue_size))
+    _handler.addFilter(_sampler)
+    _handler.addFilter(_ContextFilter())
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return logger
+
+
+def logging_stats() -> dict:
+    """Records dropped by sampling and by a full queue."""
+    return {
+        "sampled_out": _sampler.dropped if _sampler is not None else 0,
+        "queue_full": _handler.dropped if _handler is not None else 0,
+    }
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Slow Query Log
+
+Rolling statistics per query fingerprint, plus a JSONL log of the slow
+executions. A fingerprint is the statement with every string, number and
+blob literal replaced by `?` (the result column list included, unlike
+`normalize_sql`, which keeps it to name the columns), comments dropped and
+`IN (?, ?, ...)` lists collapsed, so every query of the same shape shares one
+entry whatever its values; logged text never contains the literals.
+
+Each fingerprint keeps its call and error counts, the latencies of its last
+`QUERY_STATS_WINDOW` executions (for p50/p95/p99), rows returned and the
+tables its `EXPLAIN QUERY PLAN` reads in full (from the index advisor). The
+report estimates rows scanned per call as the size of those tables, or the
+rows returned when the plan only searches indexes, so a high scanned/returned
+ratio points at a missing index.
+
+Executions slower than `SLOW_QUERY_MS` are logged as a warning and appended
+to `SLOW_QUERY_LOG` (one JSON object per line) by a background thread.
+
+    log = SlowQueryLog(threshold=0.1, path="data/slow_queries.jsonl")
+    log.record("SELECT * FROM people WHERE age > 30", 0.25, rows=120, full_scans=["people"])
+    log.report(conn, top_n=5, order_by="p95")
+
+A report of the same shape can be built from the JSONL file of a running or
+past server. The file only holds the slow executions, so its counts, totals
+and percentiles cover executions at or above the threshold, not every call
+as the in-process report does:
+
+    python slow_query_log.py --top 10 --order_by p95
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Optional
+
+from statement_cache import _TOKEN
+
+__all__ = [
+    "DEFAULT_QUERY_STATS_SIZE",
+    "DEFAULT_QUERY_STATS_WINDOW",
+    "DEFAULT_SLOW_QUERY_LOG",
+    "DEFAULT_SLOW_QUERY_MS",
+    "REPORT_ORDERS",
+    "SlowQueryLog",
+    "fingerprint",
+]
+
+# Executions at least this slow are logged (0 logs every execution)
+DEFAULT_SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+# JSONL file of slow executions; empty disables the file
+DEFAULT_SLOW_QUERY_LOG = os.getenv(
+    "SLOW_QUERY_LOG", os.path.join(os.getcwd(), "data", "slow_queries.jsonl")
+)
+
+# Fingerprints tracked, least recently seen evicted first (0 disables the stats)
+DEFAULT_QUERY_STATS_SIZE = int(os.getenv("QUERY_STATS_SIZE", "500"))
+
+# Latest executions per fingerprint used for the percentiles
+DEFAULT_QUERY_STATS_WINDOW = int(os.getenv("QUERY_STATS_WINDOW", "1000"))
+
+# Report orderings: total time, latency percentiles, calls, scanned/returned
+REPORT_ORDERS = ("total", "p50", "p95", "p99", "calls", "scan_ratio")
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+logger = logging.getLogger("server.slow_queries")
+
+
+def _strip_literal(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind in ("string", "number", "blob"):
+        return "?"
+    if kind in ("space", "comment"):
+        return " "
+    return match.group()
+
+
+def fingerprint(sql: str) -> tuple:
+    """
+    Shape of a statement and a short id for it.
+
+    Args:
+        sql (str): The statement, raw or already normalized
+
+    Returns:
+        tuple: `(fingerprint_id, normalized_sql)`
+
+    Example:
+        >>> fingerprint("SELECT * FROM people WHERE id IN (1, 2, 3)")
+        ('7eeb90bc82b7', 'SELECT * FROM people WHERE id IN (?...)')
+        >>> fingerprint("SELECT 'x' AS tag, age + 1 FROM people WHERE name = 'Ann'")[1]
+        'SELECT ? AS tag, age + ? FROM people WHERE name = ?'
+        >>> fingerprint("REPLACE INTO people (name, age) VALUES ('X', 3)")[1]
+        'REPLACE INTO people (name, age) VALUES (?...)'
+    """
+    shape = " ".join(_TOKEN.sub(_strip_literal, sql).split())
+    shape = _IN_LIST.sub("(?...)", shape)
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12], shape
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class _QueryStats:
+    """Rolling aggregates of one fingerprint."""
+
+    def __init__(self, fingerprint_id: str, query: str, kind: str, window: int):
+        self.fingerprint = fingerprint_id
+        self.query = query
+        self.kind = kind
+        self.calls = 0
+        self.errors = 0
+        self.slow = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.full_scans: Optional[List[str]] = None
+        self.last_seen = 0.0
+        self.latencies: deque = deque(maxlen=window)
+
+    def as_dict(self, table_rows: Optional[dict] = None) -> dict:
+        ordered = sorted(self.latencies)
+        returned = self.rows / self.calls if self.calls else 0.0
+        entry = {
+            "fingerprint": self.fingerprint,
+            "query": self.query,
+            "kind": self.kind,
+            "calls": self.calls,
+            "errors": self.errors,
+            "slow": self.slow,
+            "total_ms": round(self.total * 1000, 3),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "rows_returned": round(returned, 1),
+            "full_scans": self.full_scans,
+            "rows_scanned": None,
+            "scan_ratio": None,
+            "last_seen": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(self.last_seen)),
+        }
+        if table_rows is not None and self.full_scans is not None:
+            scanned = sum(table_rows.get(table, 0) for table in self.full_scans) or returned
+            entry["rows_scanned"] = round(scanned, 1)
+            entry["scan_ratio"] = round(scanned / max(returned, 1.0), 1)
+        return entry
+
+
+class SlowQueryLog:
+    """
+    Per-fingerprint query statistics and a log of slow executions.
+
+    Args:
+        threshold (float): Seconds at or above which an execution is slow
+        path (str): JSONL file slow executions are appended to ("" for none)
+        capacity (int): Fingerprints tracked. 0 disables the log.
+        window (int): Latest latencies kept per fingerprint
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_SLOW_QUERY_MS / 1000,
+        path: str = DEFAULT_SLOW_QUERY_LOG,
+        capacity: int = DEFAULT_QUERY_STATS_SIZE,
+        window: int = DEFAULT_QUERY_STATS_WINDOW,
+    ):
+        self.threshold = threshold
+        self.path = path
+        self.capacity = capacity
+        self.window = window
+        self._stats: "OrderedDict[str, _QueryStats]" = OrderedDict()
+        # fingerprint() by statement text; callers pass normalized text, so
+        # the same few texts come back over and over
+        self._shapes: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+        self._output = None
+        self._listener = None
+        if path and capacity:
+            # The file is written on a listener thread so callers never wait on disk
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = logging.Logger(f"slow_query_log:{path}")
+            self._output = logging.FileHandler(path, encoding="utf-8", delay=True)
+            self._output.setFormatter(logging.Formatter("%(message)s"))
+            records = queue.Queue()
+            self._file.addHandler(logging.handlers.QueueHandler(records))
+            self._listener = logging.handlers.QueueListener(records, self._output)
+            self._listener.start()
+            atexit.register(self.close)
+
+    def record(
+        self,
+        sql: str,
+        seconds: float,
+        rows: int = 0,
+        kind: str = "read",
+        error: Optional[str] = None,
+        full_scans: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Add one execution of `sql` to its fingerprint's statistics.
+
+        Args:
+            sql (str): The statement as executed; literals are stripped
+            seconds (float): Time the database spent on it
+            rows (int): Rows returned (or written)
+            kind (str): "read" or "write"
+            error (str, optional): Exception class name if it failed
+            full_scans (list, optional): Tables its plan reads in full, if known
+        """
+        if self.capacity == 0:
+            return
+        with self._lock:
+            shape = self._shapes.get(sql)
+            if shape is not None:
+                self._shapes.move_to_end(sql)
+        if shape is None:
+            shape = fingerprint(sql)
+        fingerprint_id, normalized = shape
+        slow = seconds >= self.threshold
+        with self._lock:
+            self._shapes[sql] = shape
+            if len(self._shapes) > self.capacity:
+                self._shapes.popitem(last=False)
+            stats = self._stats.get(fingerprint_id)
+            if stats is None:
+                stats = self._stats[fingerprint_id] = _QueryStats(
+                    fingerprint_id, normalized, kind, self.window
+                )
+                if len(self._stats) > self.capacity:
+                    self._stats.popitem(last=False)
+            self._stats.move_to_end(fingerprint_id)
+            stats.calls += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.rows += rows
+            stats.latencies.append(seconds)
+            stats.last_seen = time.time()
+            if error:
+                stats.errors += 1
+            if slow:
+                stats.slow += 1
+            if full_scans is not None:
+                stats.full_scans = list(full_scans)
+        if not slow:
+            return
+
+        logger.warning(
+            "Slow %s (%.1f ms, %d rows%s) [%s]: %s",
+            kind, seconds * 1000, rows, f", {error}" if error else "", fingerprint_id, normalized,
+        )
+        if self._file is not None:
+            self._file.info(json.dumps({
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+                "fingerprint": fingerprint_id,
+                "query": normalized,
+                "kind": kind,
+                "ms": round(seconds * 1000, 3),
+                "rows": rows,
+                "error": error,
+                "full_scans": full_scans,
+            }))
+
+    def report(
+        self,
+        conn: Optional[sqlite3.Connection] = None,
+        top_n: int = 10,
+        order_by: str = "total",
+    ) -> List[dict]:
+        """
+        The `top_n` fingerprints by `order_by`.
+
+        Args:
+            conn (sqlite3.Connection, optional): Connection used to size the
+                fully scanned tables; without it rows_scanned is None
+            top_n (int): Number of fingerprints returned
+            order_by (str): One of REPORT_ORDERS
+
+        Returns:
+            list: Dicts with fingerprint, query, kind, calls, errors, slow,
+                total/p50/p95/p99/max_ms, rows_returned (per call), full_scans,
+                rows_scanned (estimated per call), scan_ratio and last_seen
+
+        Raises:
+            ValueError: If `order_by` is unknown
+        """
+        if order_by not in REPORT_ORDERS:
+            raise ValueError(f"order_by must be one of: {', '.join(REPORT_ORDERS)}")
+        with self._lock:
+            stats = list(self._stats.values())
+
+        table_rows = None
+        if conn is not None:
+            table_rows = {}
+            for table in {table for entry in stats for table in entry.full_scans or ()}:
+                try:
+                    # max(rowid) is an O(log n) estimate of the table size
+                    table_rows[table] = conn.execute(f'SELECT max(rowid) FROM "{table}"').fetchone()[0] or 0
+                except sqlite3.Error:
+                    table_rows[table] = 0
+
+        entries = [entry.as_dict(table_rows) for entry in stats]
+        key = "calls" if order_by == "calls" else "scan_ratio" if order_by == "scan_ratio" else f"{order_by}_ms"
+        entries.sort(key=lambda entry: entry[key] or 0, reverse=True)
+        return entries[:max(0, top_n)]
+
+    def close(self) -> None:
+        """Flush and close the JSONL file."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._output.close()
+
+
+def _load(path: str, window: int) -> SlowQueryLog:
+    """A log without a file, filled from the (slow only) entries of a JSONL slow query log."""
+    log = SlowQueryLog(threshold=float("inf"), path="", window=window)
+    with open(path, encoding="utf-8") as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            log.record(
+                entry["query"],
+                entry["ms"] / 1000,
+                rows=entry.get("rows", 0),
+                kind=entry.get("kind", "read"),
+                error=entry.get("error"),
+                full_scans=entry.get("full_scans"),
+            )
+    return log
+
+
+def main() -> None:
+    from sqlite_pool import DEFAULT_DB_PATH
+
+    parser = argparse.ArgumentParser(
+        description="Top query fingerprints of a slow query log, over its slow executions only"
+    )
+    parser.add_argument("--path", default=DEFAULT_SLOW_QUERY_LOG, help="JSONL slow query log")
+    parser.add_argument("--top", type=int, default=10, help="Fingerprints listed")
+    parser.add_argument("--order_by", default="total", choices=list(REPORT_ORDERS))
+    parser.add_argument(
+        "--db", default=DEFAULT_DB_PATH,
+        help="Database used to estimate rows scanned (skipped if it does not exist)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    log = _load(args.path, DEFAULT_QUERY_STATS_WINDOW)
+    conn = None
+    if os.path.exists(args.db):
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        entries = log.report(conn, top_n=args.top, order_by=args.order_by)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    if args.json:
+        print(json.dumps({"executions": "slow", "queries": entries}, indent=2))
+        return
+    # Faster executions never reach the file; the slow_queries tool covers all
+    print(f"Slow executions only, from {args.path}")
+    print(f"{'fingerprint':<13} {'slow':>6} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'returned':>9} {'scanned':>9}  query")
+    for entry in entries:
+        scanned = "-" if entry["rows_scanned"] is None else f"{entry['rows_scanned']:.0f}"
+        print(
+            f"{entry['fingerprint']:<13} {entry['calls']:>6} {entry['total_ms']:>10.1f} "
+            f"{entry['p50_ms']:>9.1f} {entry['p95_ms']:>9.1f} {entry['p99_ms']:>9.1f} "
+            f"{entry['rows_returned']:>9.0f} {scanned:>9}  {entry['query']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+SQLite Query Executor
+
+Runs blocking `sqlite3` work on a dedicated thread pool so that async MCP
+tools never block the FastMCP event loop. `sqlite3` releases the GIL while a
+statement is stepping, so queries on different pooled connections run in
+parallel. Calls run in a copy of the caller's context, so context variables
+(e.g. the tool call metrics track) are visible on the worker thread.
+
+    executor = QueryExecutor(workers=4)
+    rows = await executor.run(fetch_rows, "SELECT * FROM people")
+
+    print(executor.stats())
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+from sqlite_pool import DEFAULT_POOL_SIZE
+
+__all__ = ["DEFAULT_WORKERS", "ExecutorStats", "QueryExecutor"]
+
+DEFAULT_WORKERS = int(os.getenv("SQLITE_WORKERS", str(DEFAULT_POOL_SIZE)))
+
+
+@dataclass
+class ExecutorStats:
+    """Counters describing the executor queue."""
+
+    workers: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    active: int = 0
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    queue_wait_seconds_total: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class QueryExecutor:
+    """
+    Thread pool that offloads blocking database calls from the event loop.
+
+    The queue depth is the number of submitted calls that are still waiting
+    for a free worker thread. A call whose caller is cancelled while it waits
+    never runs; it leaves the queue and counts as completed and cancelled.
+
+    Args:
+        workers (int): Number of worker threads. Keeping this at or below the
+            connection pool size means workers never wait for a connection.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        if workers < 1:
+            raise ValueError("Executor needs at least one worker")
+
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="sqlite-worker"
+        )
+        self._lock = threading.Lock()
+        self._stats = ExecutorStats(workers=workers)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` on a worker thread and await its result.
+
+        Args:
+            fn (Callable): Blocking function to run
+            *args: Positional arguments for `fn`
+
+        Returns:
+            Any: Whatever `fn` returns; exceptions are re-raised in the caller
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        submitted_at = time.monotonic()
+        with self._lock:
+            self._stats.submitted += 1
+            self._stats.queue_depth += 1
+            self._stats.max_queue_depth = max(
+                self._stats.max_queue_depth, self._stats.queue_depth
+            )
+
+        def job() -> Any:
+            with self._lock:
+                self._stats.queue_depth -= 1
+                self._stats.active += 1
+                self._stats.queue_wait_seconds_total += time.monotonic() - submitted_at
+            failed = True
+            try:
+                result = context.run(fn, *args)
+                failed = False
+                return result
+            finally:
+                with self._lock:
+                    self._stats.active -= 1
+                    self._stats.completed += 1
+                    if failed:
+                        self._stats.failed += 1
+
+        def settle(future) -> None:
+            # job() never ran, so account for it here
+            if future.cancelled():
+                with self._lock:
+                    self._stats.queue_depth -= 1
+                    self._stats.completed += 1
+                    self._stats.cancelled += 1
+
+        future = self._executor.submit(job)
+        future.add_done_callback(settle)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def stats(self) -> ExecutorStats:
+        """Return a snapshot of the executor counters."""
+        with self._lock:
+            return ExecutorStats(**self._stats.as_dict())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and optionally wait for running calls."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,422 @@
+"""
+SQLite Connection Pool
+
+Keeps a bounded set of open `sqlite3` connections to the people database so
+that MCP tool calls borrow an already initialised connection instead of
+creating the data directory, connecting and re-running the schema bootstrap
+on every call.
+
+    pool = SQLitePool(DEFAULT_DB_PATH, size=4, profile=get_profile("wal"))
+    with pool.connection() as conn:
+        conn.execute("SELECT * FROM people").fetchall()
+
+    print(pool.stats())
+
+A pool opened with `read_only=True` connects through a `mode=ro` URI, so its
+connections can never write or take a write lock; with `immutable=True`
+SQLite additionally skips all locking and change detection, which is only
+correct for a database file that nothing writes to (e.g. a snapshot copy).
+
+`warm_up()` opens every connection ahead of the first request and runs
+queries on each, so their page caches and compiled statements are ready:
+
+    pool.warm_up(["SELECT count(*) FROM people"])
+"""
+
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator, Optional
+
+from statement_cache import StatementCache
+from storage_profiles import StorageProfile
+
+__all__ = [
+    "DEFAULT_DB_PATH",
+    "DEFAULT_POOL_SIZE",
+    "DEFAULT_READ_POOL_MODE",
+    "DEFAULT_READ_POOL_SIZE",
+    "PEOPLE_INDEXES",
+    "PEOPLE_SCHEMA",
+    "READ_POOL_MODES",
+    "PoolStats",
+    "SQLitePool",
+    "connect",
+]
+
+DEFAULT_DB_PATH = os.path.join(os.getcwd(), 'data', 'demo.db')
+DEFAULT_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+
+# How read tools connect: through the read-write pool ("shared"), a separate
+# mode=ro pool ("ro"), or a separate pool of immutable snapshot connections
+READ_POOL_MODES = ("shared", "ro", "immutable")
+DEFAULT_READ_POOL_MODE = os.getenv("SQLITE_READ_POOL_MODE", "ro")
+DEFAULT_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", str(DEFAULT_POOL_SIZE)))
+
+PEOPLE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS people (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        profession TEXT NOT NULL
+    )
+'''
+
+# Secondary indexes for the documented filters and sort orders
+PEOPLE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_people_age ON people (age)",
+    "CREATE INDEX IF NOT EXISTS idx_people_profession ON people (profession)",
+    "CREATE INDEX IF NOT EXISTS idx_people_name ON people (name)",
+)
+
+
+def connect(
+    db_path: str,
+    profile: Optional[StorageProfile] = None,
+    statement_cache: Optional[StatementCache] = None,
+    read_only: bool = False,
+    immutable: bool = False,
+) -> sqlite3.Connection:
+    """
+    Open a connection that may be shared across threads.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        profile (StorageProfile, optional): PRAGMAs to apply to the connection
+        statement_cache (StatementCache, optional): Sizes the connection's
+            compiled statement cache and lets the cache track it
+        read_only (bool): Open the file with `mode=ro`
+        immutable (bool): Also open it with `immutable=1` (implies read_only)
+
+    Returns:
+        sqlite3.Connection: The configured connection
+    """
+    kwargs = statement_cache.connect_kwargs() if statement_cache is not None else {}
+    read_only = read_only or immutable
+    if read_only:
+        uri = pathlib.Path(db_path).absolute().as_uri() + "?mode=ro"
+        if immutable:
+            uri += "&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, **kwargs)
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=False, **kwargs)
+    if profile is not None:
+        try:
+            profile.apply(conn, read_only=read_only)
+        except sqlite3.Error:
+            conn.close()
+            raise
+    return conn
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how the pool has been used."""
+
+    size: int = 0
+    open_connections: int = 0
+    idle_connections: int = 0
+    hits: int = 0
+    misses: int = 0
+    waits: int = 0
+    wait_seconds_total: float = 0.0
+    connections_opened: int = 0
+    connections_closed: int = 0
+    connections_recycled: int = 0
+    lifetime_seconds_total: float = 0.0
+    lifetime_seconds_max: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class _PooledConnection:
+    """A pooled `sqlite3.Connection` together with its creation time."""
+
+    __slots__ = ("conn", "created_at")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.created_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class SQLitePool:
+    """
+    Bounded pool of SQLite connections shared by all tool calls.
+
+    Connections are opened lazily up to `size`. A borrow that finds an idle
+    connection counts as a hit, a borrow that has to open a new connection
+    counts as a miss and a borrow that has to wait for another caller to
+    return a connection counts as a wait.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        size (int): Maximum number of open connections
+        timeout (float): Seconds to wait for a free connection before failing
+        max_lifetime (float, optional): Close and replace connections older
+            than this many seconds when they are returned to the pool
+        profile (StorageProfile, optional): PRAGMAs applied to every
+            connection the pool opens
+        statement_cache (StatementCache, optional): Compiled statement cache
+            shared by the pool's connections
+        read_only (bool): Open read-only connections; the database and its
+            schema must already exist
+        immutable (bool): Open read-only connections that assume the file
+            never changes
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = 30.0,
+        max_lifetime: Optional[float] = None,
+        profile: Optional[StorageProfile] = None,
+        statement_cache: Optional[StatementCache] = None,
+        read_only: bool = False,
+        immutable: bool = False,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.profile = profile
+        self.statement_cache = statement_cache
+        self.read_only = read_only or immutable
+        self.immutable = immutable
+
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self._stats = PoolStats(size=size)
+
+        if self.read_only:
+            # Fail now rather than on the first borrow if the file is missing
+            self._idle.put(self._open_connection())
+        else:
+            self._bootstrap()
+
+    def _bootstrap(self) -> None:
+        """Create the data directory, the schema and its indexes exactly once."""
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        pooled = self._open_connection()
+        try:
+            pooled.conn.execute(PEOPLE_SCHEMA)
+            for index in PEOPLE_INDEXES:
+                pooled.conn.execute(index)
+            pooled.conn.commit()
+        except sqlite3.Error:
+            self._close_connection(pooled)
+            raise
+        self._idle.put(pooled)
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect(
+            self.db_path,
+            self.profile,
+            self.statement_cache,
+            read_only=self.read_only,
+            immutable=self.immutable,
+        )
+
+    def _open_connection(self) -> _PooledConnection:
+        conn = self._connect()
+        with self._lock:
+            self._open += 1
+            self._stats.connections_opened += 1
+        return _PooledConnection(conn)
+
+    def _close_connection(self, pooled: _PooledConnection) -> None:
+        age = pooled.age
+        try:
+            pooled.conn.close()
+        finally:
+            with self._lock:
+                self._open -= 1
+                self._stats.connections_closed += 1
+                self._stats.lifetime_seconds_total += age
+                self._stats.lifetime_seconds_max = max(
+                    self._stats.lifetime_seconds_max, age
+                )
+
+    def _acquire(self) -> _PooledConnection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            pooled = self._idle.get_nowait()
+            with self._lock:
+                self._stats.hits += 1
+            return pooled
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._open < self.size
+            if can_open:
+                # Reserve the slot before connecting so concurrent callers
+                # cannot overshoot the pool size.
+                self._open += 1
+                self._stats.misses += 1
+        if can_open:
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._open -= 1
+                raise
+            with self._lock:
+                self._stats.connections_opened += 1
+            return _PooledConnection(conn)
+
+        started = time.monotonic()
+        try:
+            pooled = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"Timed out after {self.timeout}s waiting for a database connection"
+            )
+        with self._lock:
+            self._stats.waits += 1
+            self._stats.wait_seconds_total += time.monotonic() - started
+        return pooled
+
+    def _release(self, pooled: _PooledConnection) -> None:
+        try:
+            if pooled.conn.in_transaction:
+                pooled.conn.rollback()
+        except sqlite3.Error:
+            # A connection that cannot roll back is not safe to hand out again.
+            self._close_connection(pooled)
+            return
+
+        if self._closed:
+            self._close_connection(pooled)
+            return
+
+        if self.max_lifetime is not None and pooled.age > self.max_lifetime:
+            self._close_connection(pooled)
+            with self._lock:
+                self._stats.connections_recycled += 1
+            return
+
+        self._idle.put(pooled)
+
+    def prefill(self) -> int:
+        """
+        Open connections until the pool holds `size` of them.
+
+        Returns:
+            int: Number of connections opened
+        """
+        opened = 0
+        while True:
+            with self._lock:
+                if self._closed or self._open >= self.size:
+                    return opened
+                # Reserve the slot before connecting, as in _acquire
+                self._open += 1
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._open -= 1
+                raise
+            with self._lock:
+                self._stats.connections_opened += 1
+            self._idle.put(_PooledConnection(conn))
+            opened += 1
+
+    def warm_up(self, queries: Iterable[str]) -> dict:
+        """
+        Open every connection and run `queries` on each of them.
+
+        Reading the rows fills each connection's page cache and compiles
+        the statements into the statement cache. Rows are read and dropped.
+        Idle connections are used directly, so warmup does not count as
+        pool traffic; call it before serving requests.
+
+        Args:
+            queries (Iterable[str]): Read statements to run
+
+        Returns:
+            dict: {"connections": int, "queries": {query: {"ms": float, "error": str}}}
+                with the total time each query took over all connections
+        """
+        queries = list(queries)
+        self.prefill()
+        borrowed = []
+        while True:
+            try:
+                borrowed.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        results = {query: {"ms": 0.0} for query in queries}
+        try:
+            for pooled in borrowed:
+                for query in queries:
+                    started = time.perf_counter()
+                    try:
+                        if self.statement_cache is not None:
+                            cursor = self.statement_cache.execute(pooled.conn, query)
+                        else:
+                            cursor = pooled.conn.execute(query)
+                        for _ in cursor:
+                            pass
+                    except sqlite3.Error as e:
+                        results[query]["error"] = str(e)
+                    results[query]["ms"] += (time.perf_counter() - started) * 1000
+        finally:
+            for pooled in borrowed:
+                self._release(pooled)
+        for result in results.values():
+            result["ms"] = round(result["ms"], 3)
+        return {"connections": len(borrowed), "queries": results}
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for the duration of a `with` block.
+
+        Any transaction left open when the block exits is rolled back, so a
+        failed statement never leaks into the next borrower.
+
+        Yields:
+            sqlite3.Connection: A connection with the schema already in place
+        """
+        pooled = self._acquire()
+        try:
+            yield pooled.conn
+        finally:
+            self._release(pooled)
+
+    def stats(self) -> PoolStats:
+        """Return a snapshot of the pool counters."""
+        with self._lock:
+            snapshot = PoolStats(**self._stats.as_dict())
+            snapshot.open_connections = self._open
+        snapshot.idle_connections = self._idle.qsize()
+        return snapshot
+
+    def close(self) -> None:
+        """Close all idle connections; borrowed ones are closed on return."""
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_connection(pooled)
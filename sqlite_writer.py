@@ -0,0 +1,297 @@
+"""
+SQLite Single-Writer Queue
+
+SQLite allows one writer at a time. Instead of letting every tool call race
+for the write lock, all writes are queued to one dedicated thread that owns
+the only write connection. Readers keep using the connection pool and, in
+WAL mode, are never blocked by the writer.
+
+Writes that arrive close together are group-committed: the writer collects
+jobs for up to `commit_window` seconds (or `max_batch` jobs), runs each one
+inside its own SAVEPOINT and commits the whole batch with a single sync.
+A failing job only rolls back its own savepoint, so every caller still gets
+its own result. Jobs may not end the batch transaction: BEGIN, COMMIT,
+ROLLBACK and SAVEPOINT statements are refused while a job runs, and fail
+only that job.
+
+    writer = SQLiteWriter(DEFAULT_DB_PATH, profile=get_profile("wal"))
+    await writer.run(lambda conn: conn.execute("INSERT INTO people ..."))
+
+`on_commit` is called on the writer thread after every commit that wrote
+something, before the callers' futures resolve, so caches derived from the
+database can be invalidated before a caller observes its write as done.
+
+    print(writer.stats())
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Optional
+
+from sqlite_pool import connect
+from storage_profiles import StorageProfile
+
+__all__ = [
+    "BATCH_SIZE_BUCKETS",
+    "DEFAULT_COMMIT_WINDOW",
+    "DEFAULT_MAX_BATCH",
+    "SQLiteWriter",
+    "WriterStats",
+]
+
+DEFAULT_COMMIT_WINDOW = float(os.getenv("SQLITE_COMMIT_WINDOW_MS", "2")) / 1000
+DEFAULT_MAX_BATCH = int(os.getenv("SQLITE_COMMIT_BATCH_SIZE", "64"))
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Sentinel that tells the writer thread to exit
+_STOP = object()
+
+
+def _empty_histogram() -> dict:
+    histogram = {str(bound): 0 for bound in BATCH_SIZE_BUCKETS}
+    histogram["+Inf"] = 0
+    return histogram
+
+
+@dataclass
+class WriterStats:
+    """Counters describing the write queue."""
+
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    writes: int = 0
+    failed: int = 0
+    commits: int = 0
+    max_batch_size: int = 0
+    batch_size_histogram: dict = field(default_factory=_empty_histogram)
+    queue_wait_seconds_total: float = 0.0
+    commit_seconds_total: float = 0.0
+
+    def observe_batch(self, size: int) -> None:
+        """Count one committed batch in the size histogram."""
+        self.max_batch_size = max(self.max_batch_size, size)
+        for bound in BATCH_SIZE_BUCKETS:
+            if size <= bound:
+                self.batch_size_histogram[str(bound)] += 1
+                return
+        self.batch_size_histogram["+Inf"] += 1
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class _WriteJob:
+    """A queued write together with the future its caller waits on."""
+
+    __slots__ = ("fn", "future", "queued_at")
+
+    def __init__(self, fn: Callable[[sqlite3.Connection], Any]):
+        self.fn = fn
+        self.future: Future = Future()
+        self.queued_at = time.monotonic()
+
+
+class SQLiteWriter:
+    """
+    Dedicated writer thread that serializes all database writes.
+
+    Each submitted function receives the writer's connection and runs inside
+    its own savepoint of a group-commit transaction; transaction control
+    statements it executes are refused. If the function raises, only its
+    savepoint is rolled back and the exception is delivered to that caller. Results are delivered after the
+    batch has been committed.
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        profile (StorageProfile, optional): PRAGMAs for the write connection
+        commit_window (float): Seconds to keep collecting writes after the
+            first one of a batch arrives. 0 only batches writes that are
+            already queued.
+        max_batch (int): Maximum number of writes committed together
+        on_commit (Callable, optional): Called after each commit that wrote
+            at least one successful job
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        profile: Optional[StorageProfile] = None,
+        commit_window: float = DEFAULT_COMMIT_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        on_commit: Optional[Callable[[], None]] = None,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.db_path = db_path
+        self.profile = profile
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+
+        self._conn = connect(db_path, profile)
+        self._in_job = False
+        self._conn.set_authorizer(self._authorize)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = WriterStats()
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="sqlite-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        Queue a write and return a future for its result.
+
+        Args:
+            fn (Callable): Function called with the write connection
+
+        Returns:
+            Future: Resolves to `fn`'s return value once committed
+        """
+        if self._closed:
+            raise RuntimeError("Writer is closed")
+
+        job = _WriteJob(fn)
+        self._queue.put(job)
+        with self._lock:
+            self._stats.max_queue_depth = max(
+                self._stats.max_queue_depth, self._queue.qsize()
+            )
+        return job.future
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Queue a write and await its committed result."""
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            batch, stop = self._collect(job)
+            self._execute_batch(batch)
+            if stop:
+                break
+
+    def _collect(self, first: _WriteJob) -> tuple:
+        """Gather queued jobs for one batch; returns (jobs, stop_requested)."""
+        batch = [first]
+        deadline = time.monotonic() + self.commit_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    job = self._queue.get(timeout=remaining)
+                else:
+                    job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _execute_batch(self, batch: list) -> None:
+        started = time.monotonic()
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        outcomes = []
+        try:
+            # Take the write lock up front: with several server processes a
+            # deferred transaction could fail to upgrade instead of waiting
+            self._conn.execute("BEGIN IMMEDIATE")
+            for job in batch:
+                outcomes.append(self._execute_job(job))
+            self._conn.commit()
+        except BaseException as e:
+            # The batch transaction itself failed, so nothing was written
+            try:
+                self._conn.rollback()
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                self._stats.failed += len(batch)
+            for job in batch:
+                job.future.set_exception(e)
+            return
+
+        finished = time.monotonic()
+        with self._lock:
+            self._stats.commits += 1
+            self._stats.observe_batch(len(batch))
+            self._stats.commit_seconds_total += finished - started
+            for job, (ok, _) in zip(batch, outcomes):
+                self._stats.queue_wait_seconds_total += started - job.queued_at
+                if ok:
+                    self._stats.writes += 1
+                else:
+                    self._stats.failed += 1
+        if self.on_commit is not None and any(ok for ok, _ in outcomes):
+            try:
+                self.on_commit()
+            except Exception:
+                pass
+        for job, (ok, value) in zip(batch, outcomes):
+            if ok:
+                job.future.set_result(value)
+            else:
+                job.future.set_exception(value)
+
+    def _authorize(self, action: int, *args) -> int:
+        # A job ending the batch transaction would take the other jobs'
+        # savepoints, and their outcome, with it
+        if self._in_job and action in (sqlite3.SQLITE_TRANSACTION, sqlite3.SQLITE_SAVEPOINT):
+            return sqlite3.SQLITE_DENY
+        return sqlite3.SQLITE_OK
+
+    def _execute_job(self, job: _WriteJob) -> tuple:
+        """Run one job inside its own savepoint; returns (ok, result_or_error)."""
+        self._conn.execute("SAVEPOINT write_job")
+        self._in_job = True
+        try:
+            outcome = True, job.fn(self._conn)
+        except Exception as e:
+            outcome = False, e
+        finally:
+            self._in_job = False
+        try:
+            if not outcome[0]:
+                self._conn.execute("ROLLBACK TO write_job")
+            self._conn.execute("RELEASE write_job")
+        except sqlite3.Error as e:
+            # The savepoint is gone, so the job ended the transaction after
+            # all: fail only this job and run the rest in a new transaction
+            if not self._conn.in_transaction:
+                self._conn.execute("BEGIN IMMEDIATE")
+            return False, e
+        return outcome
+
+    def stats(self) -> WriterStats:
+        """Return a snapshot of the writer counters."""
+        with self._lock:
+            snapshot = WriterStats(**self._stats.as_dict())
+        snapshot.queue_depth = self._queue.qsize()
+        return snapshot
+
+    def close(self) -> None:
+        """Finish queued writes, stop the thread and close the connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._conn.close()
@@ -0,0 +1,387 @@
+"""
+SSE Session Router
+
+An MCP SSE session lives in the process that opened it: the client keeps a
+`GET /sse` stream open and POSTs its requests to the `/messages/?session_id=`
+endpoint announced on that stream. With several server processes, every POST
+has to reach the process that owns its session, so plain load balancing
+(e.g. `uvicorn --workers`) breaks sessions.
+
+The router is a small front end on the public port. It starts the worker
+processes, sends each new SSE stream to the worker with the fewest open
+streams, reads the session id from the stream's `endpoint` event and
+forwards every POST for that session to the same worker. Workers are plain
+`server.py --server_type=sse` processes on local ports that share the
+WAL-mode database file; each keeps its own pool, executor, writer and caches.
+
+Stateless streamable HTTP requests (`POST /mcp`) belong to no session, so
+each one goes to the worker with the fewest requests in flight. `GET
+/metrics` merges the workers' Prometheus metrics, labelled by `process`, and
+`GET /health` is ready while at least one worker reports ready.
+
+    workers = spawn_workers(4, ["python", "server.py", "--server_type=sse"], "127.0.0.1", 8001)
+    SSERouter(workers).serve("0.0.0.0", 8000)
+"""
+
+import asyncio
+import logging
+import os
+import re
+import socket
+import subprocess
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+__all__ = [
+    "DEFAULT_PROCESSES",
+    "SSERouter",
+    "Worker",
+    "spawn_workers",
+]
+
+# A child of the "server" logger, so it goes through configure_logging()'s queue
+logger = logging.getLogger("server.router")
+
+# Server processes behind the router; 1 serves directly without a router
+DEFAULT_PROCESSES = int(os.getenv("SERVER_PROCESSES", "1"))
+
+# The endpoint event carries "/messages/?session_id=<hex>"
+_SESSION_ID = re.compile(rb"session_id=([0-9a-fA-F]+)")
+
+
+@dataclass
+class Worker:
+    """One server process behind the router."""
+
+    url: str
+    process: Optional[subprocess.Popen] = None
+    streams: int = 0
+    sessions: int = 0
+    requests: int = 0
+    alive: bool = True
+
+    def as_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.alive,
+            "streams": self.streams,
+            "sessions": self.sessions,
+            "requests": self.requests,
+        }
+
+
+def _wait_ready(worker: Worker, host: str, port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        if worker.process is not None and worker.process.poll() is not None:
+            raise RuntimeError(f"Worker {worker.url} exited with code {worker.process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Worker {worker.url} did not start within {timeout}s")
+            time.sleep(0.1)
+
+
+def spawn_workers(
+    count: int,
+    command: List[str],
+    host: str = "127.0.0.1",
+    base_port: int = 8001,
+    timeout: float = 30.0,
+) -> List[Worker]:
+    """
+    Start `count` server processes on consecutive ports and wait until they listen.
+
+    Args:
+        count (int): Number of worker processes
+        command (list): Server command line; `--host`/`--port` are appended
+        host (str): Interface the workers listen on
+        base_port (int): Port of the first worker
+        timeout (float): Seconds to wait for each worker to accept connections
+
+    Returns:
+        list: The started workers
+
+    Raises:
+        RuntimeError: If a worker exits or does not listen in time
+    """
+    workers = []
+    try:
+        for index in range(count):
+            port = base_port + index
+            process = subprocess.Popen(command + ["--host", host, "--port", str(port)])
+            workers.append(Worker(url=f"http://{host}:{port}", process=process))
+        for worker in workers:
+            _, port = worker.url.rsplit(":", 1)
+            _wait_ready(worker, host, int(port), timeout)
+    except BaseException:
+        for worker in workers:
+            worker.process.terminate()
+        raise
+    return workers
+
+
+class SSERouter:
+    """
+    Front end that pins each SSE session to one worker process.
+
+    Args:
+        workers (list): Workers to route to
+        sse_path (str): Path of the SSE stream on the router and the workers
+        message_path (str): Path the clients POST their messages to
+        http_path (str): Path of the stateless streamable HTTP endpoint
+    """
+
+    def __init__(
+        self,
+        workers: List[Worker],
+        sse_path: str = "/sse",
+        message_path: str = "/messages/",
+        http_path: str = "/mcp",
+    ):
+        if not workers:
+            raise ValueError("The router needs at least one worker")
+        self.workers = workers
+        self.sse_path = sse_path
+        self.message_path = message_path
+        self.http_path = http_path
+        self._sessions: Dict[str, Worker] = {}
+        self._next = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _pick(self, load: str = "streams") -> Optional[Worker]:
+        """The live worker with the lowest `load` attribute, rotating among ties."""
+        alive = [worker for worker in self.workers if worker.alive]
+        if not alive:
+            return None
+        self._next += 1
+        rotated = alive[self._next % len(alive):] + alive[: self._next % len(alive)]
+        return min(rotated, key=lambda worker: getattr(worker, load))
+
+    async def _sse(self, request: Request) -> Response:
+        worker = self._pick()
+        if worker is None:
+            return Response("No server process available", status_code=503)
+        # Count the stream now so concurrent connects spread over the workers
+        worker.streams += 1
+        try:
+            upstream = await self._client.send(
+                self._client.build_request("GET", worker.url + self.sse_path, params=request.query_params),
+                stream=True,
+            )
+        except BaseException:
+            worker.streams -= 1
+            raise
+        if upstream.status_code != 200:
+            worker.streams -= 1
+            body = await upstream.aread()
+            await upstream.aclose()
+            return Response(body, status_code=upstream.status_code)
+
+        async def relay():
+            session_id, head = None, b""
+            try:
+                async for chunk in upstream.aiter_raw():
+                    if session_id is None:
+                        head += chunk
+                        match = _SESSION_ID.search(head)
+                        if match:
+                            session_id = match.group(1).decode("ascii")
+                            self._sessions[session_id] = worker
+                            worker.sessions += 1
+                    yield chunk
+            finally:
+                worker.streams -= 1
+                if session_id is not None and self._sessions.pop(session_id, None) is not None:
+                    worker.sessions -= 1
+                await upstream.aclose()
+
+        return StreamingResponse(
+            relay(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+        )
+
+    async def _message(self, request: Request) -> Response:
+        worker = self._sessions.get(request.query_params.get("session_id", ""))
+        if worker is None:
+            return Response("Could not find session", status_code=404)
+        upstream = await self._client.post(
+            worker.url + self.message_path,
+            params=request.query_params,
+            content=await request.body(),
+            headers={"content-type": request.headers.get("content-type", "application/json")},
+        )
+        return Response(
+            upstream.content,
+            status_code=upstream.status_code,
+            media_type=upstream.headers.get("content-type"),
+        )
+
+    async def _http(self, request: Request) -> Response:
+        worker = self._pick("requests")
+        if worker is None:
+            return Response("No server process available", status_code=503)
+        worker.requests += 1
+        try:
+            upstream = await self._client.send(
+                self._client.build_request(
+                    request.method,
+                    worker.url + self.http_path,
+                    content=await request.body(),
+                    headers={
+                        name: value for name, value in request.headers.items()
+                        if name in ("accept", "content-type", "mcp-protocol-version")
+                    },
+                ),
+                stream=True,
+            )
+        except BaseException:
+            worker.requests -= 1
+            raise
+
+        async def relay():
+            try:
+                async for chunk in upstream.aiter_raw():
+                    yield chunk
+            finally:
+                worker.requests -= 1
+                await upstream.aclose()
+
+        return StreamingResponse(
+            relay(),
+            status_code=upstream.status_code,
+            media_type=upstream.headers.get("content-type"),
+        )
+
+    async def _status(self, request: Request) -> Response:
+        return JSONResponse({"workers": [worker.as_dict() for worker in self.workers]})
+
+    async def _metrics(self, request: Request) -> Response:
+        async def scrape(worker: Worker) -> str:
+            try:
+                response = await self._client.get(worker.url + "/metrics", timeout=5.0)
+                response.raise_for_status()
+                return response.text
+            except httpx.HTTPError:
+                return ""
+
+        alive = [(index, worker) for index, worker in enumerate(self.workers) if worker.alive]
+        texts = await asyncio.gather(*(scrape(worker) for _, worker in alive))
+        headers, samples = [], {}
+        for (index, _), text in zip(alive, texts):
+            for line in text.splitlines():
+                if not line:
+                    continue
+                if line.startswith("#"):
+                    if line not in headers:
+                        headers.append(line)
+                    continue
+                # Samples go under the HELP/TYPE lines of their metric
+                series, _, value = line.rpartition(" ")
+                name, brace, labels = series.partition("{")
+                label = f'process="{index}"'
+                series = f"{name}{{{label},{labels}" if brace else f"{name}{{{label}}}"
+                samples.setdefault(name, []).append(f"{series} {value}")
+        lines = []
+        for header in headers:
+            lines.append(header)
+            if header.startswith("# TYPE "):
+                metric = header.split()[2]
+                for name in (metric, metric + "_bucket", metric + "_sum", metric + "_count"):
+                    lines.extend(samples.pop(name, []))
+        for rest in samples.values():
+            lines.extend(rest)
+        return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+    async def _health(self, request: Request) -> Response:
+        async def check(worker: Worker) -> dict:
+            try:
+                response = await self._client.get(worker.url + "/health", timeout=5.0)
+                return {"url": worker.url, "ready": response.status_code == 200}
+            except httpx.HTTPError:
+                return {"url": worker.url, "ready": False}
+
+        workers = await asyncio.gather(
+            *(check(worker) for worker in self.workers if worker.alive)
+        )
+        ready = any(worker["ready"] for worker in workers)
+        return JSONResponse(
+            {"status": "ready" if ready else "starting", "workers": list(workers)},
+            status_code=200 if ready else 503,
+        )
+
+    async def _watch_workers(self) -> None:
+        """Take workers that exited out of rotation; their sessions end with them."""
+        while True:
+            for worker in self.workers:
+                if worker.alive and worker.process is not None and worker.process.poll() is not None:
+                    worker.alive = False
+                    logger.warning("Worker %s exited with code %s", worker.url, worker.process.returncode)
+            await asyncio.sleep(1)
+
+    @asynccontextmanager
+    async def _lifespan(self, app):
+        # SSE streams hold their upstream connection open, so do not cap them
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(None, connect=10.0),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=64),
+        )
+        watcher = asyncio.create_task(self._watch_workers())
+        try:
+            yield
+        finally:
+            watcher.cancel()
+            await self._client.aclose()
+
+    def app(self) -> Starlette:
+        """The router's ASGI app."""
+        return Starlette(
+            routes=[
+                Route(self.sse_path, endpoint=self._sse),
+                Route(self.message_path, endpoint=self._message, methods=["POST"]),
+                Route(self.http_path, endpoint=self._http, methods=["GET", "POST", "DELETE"]),
+                Route("/router", endpoint=self._status),
+                Route("/metrics", endpoint=self._metrics),
+                Route("/health", endpoint=self._health),
+            ],
+            lifespan=self._lifespan,
+        )
+
+    def stop_workers(self, grace: float = 5.0) -> None:
+        """Terminate the workers, killing those still running after `grace` seconds.
+
+        A worker waits for its open SSE sessions on shutdown, and sessions
+        whose client went away may never finish, hence the deadline.
+        """
+        processes = [worker.process for worker in self.workers if worker.process is not None]
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + grace
+        for process in processes:
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    def serve(self, host: str = "0.0.0.0", port: int = 8000) -> None:
+        """Run the router until interrupted, then stop the workers."""
+        try:
+            uvicorn.run(
+                self.app(), host=host, port=port, log_level="warning", timeout_graceful_shutdown=5
+            )
+        finally:
+            self.stop_workers()
@@ -0,0 +1,364 @@
+"""
+Prepared Statement Cache
+
+Agents send the same few query shapes over and over with different literal
+values. `normalize_sql` rewrites string and numeric literals into `?`
+parameters so all of those queries share one SQL text, and therefore one
+compiled statement in the per-connection statement cache that `sqlite3`
+keeps (`cached_statements`, evicted least-recently-used). Literals in the
+result column list (and in RETURNING) are kept, because SQLite names result
+columns after their text: `SELECT age + 1` must still return a column named
+"age + 1", not "age + ?".
+
+`sqlite3` does not report hits on that cache, so every pooled connection
+mirrors it with its own LRU of normalized SQL texts of the same capacity,
+from which hit, miss and eviction counters are kept. Normalizing a statement
+in Python costs about as much as SQLite compiling a short one, so the result
+of normalizing each raw SQL text is memoized as well.
+
+    cache = StatementCache(capacity=128)
+    conn = connect(db_path, statement_cache=cache)
+    rows = cache.execute(conn, "SELECT * FROM people WHERE age > 25").fetchall()
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Optional, Tuple
+
+__all__ = [
+    "DEFAULT_STATEMENT_CACHE_SIZE",
+    "CachingConnection",
+    "StatementCache",
+    "StatementCacheStats",
+    "normalize_sql",
+]
+
+DEFAULT_STATEMENT_CACHE_SIZE = int(os.getenv("SQLITE_STATEMENT_CACHE_SIZE", "128"))
+
+# Only plain DML can take bound parameters; everything else is left alone
+_PARAMETERIZABLE = ("SELECT", "WITH", "INSERT", "REPLACE", "UPDATE", "DELETE", "VALUES")
+
+_TOKEN = re.compile(
+    r"""
+      (?P<space>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?(?:\*/|$))
+    | (?P<blob>[xX]'[0-9a-fA-F]*')
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<quoted>"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])
+    | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<param>[?:@$][\w]*)
+    | (?P<word>[A-Za-z_][\w$]*)
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Fast path for statements without ORDER BY / GROUP BY. Only tokens that can
+# contain or be a literal are matched; the leading lookahead lets the regex
+# engine skip everything else quickly, and `\b` keeps digits inside names
+# such as `t1` untouched.
+_LITERAL = re.compile(
+    r"""
+    (?=['\d\-/"`\[?:@$])
+    (?:
+      (?P<string>'(?:[^']|'')*')
+    | (?P<number>\b(?<!\.)(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d*)?(?:[eE][+-]?\d+)?))
+    | (?P<comment>--[^\n]*|/\*.*?(?:\*/|$))
+    | (?P<quoted>"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])
+    | (?P<param>[?:@$]\w*)
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_ORDER_OR_GROUP_BY = re.compile(r"\b(?:ORDER|GROUP)\s+BY\b", re.IGNORECASE)
+
+_INTEGER = re.compile(r"\d+")
+
+# Keywords that end an ORDER BY / GROUP BY list, where numbers are column positions
+_BY_CLAUSE_END = {"LIMIT", "HAVING", "WINDOW", "UNION", "EXCEPT", "INTERSECT", "WHERE", "FROM"}
+
+# Keywords that end the result column list of a SELECT
+_COLUMNS_END = {"FROM", "WHERE", "GROUP", "HAVING", "WINDOW", "ORDER", "LIMIT", "UNION", "EXCEPT", "INTERSECT"}
+
+
+def _literal_value(kind: str, text: str) -> Any:
+    if kind == "string":
+        return text[1:-1].replace("''", "'")
+    if text[:2].lower() == "0x":
+        return int(text, 16)
+    if _INTEGER.fullmatch(text):
+        return int(text)
+    return float(text)
+
+
+def _result_columns(sql: str, upper: str) -> Tuple[int, int]:
+    """
+    Character span of the result column list of `sql`, whose text names the
+    result columns: the first top-level SELECT list, or the RETURNING list
+    of a write. `(0, 0)` if there is none.
+    """
+    if upper.startswith(("SELECT", "WITH")):
+        keyword = "SELECT"
+    elif "RETURNING" in upper:
+        keyword = "RETURNING"
+    else:
+        return 0, 0
+    start = None
+    depth = 0
+    for match in _TOKEN.finditer(sql):
+        kind, text = match.lastgroup, match.group()
+        if kind == "other":
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+            elif text == ";" and start is not None:
+                return start, match.start()
+        elif kind == "word" and depth == 0:
+            word = text.upper()
+            if start is None:
+                if word == keyword:
+                    start = match.end()
+            elif word in _COLUMNS_END:
+                return start, match.start()
+    return (start, len(sql)) if start is not None else (0, 0)
+
+
+def _normalize_fast(sql: str, columns: Tuple[int, int]) -> Optional[Tuple[str, tuple]]:
+    """Single-pass normalization; None if the statement already has parameters."""
+    parts, params = [], []
+    position = 0
+    for match in _LITERAL.finditer(sql):
+        kind = match.lastgroup
+        if kind == "param":
+            return None
+        if kind == "quoted" or columns[0] <= match.start() < columns[1]:
+            continue
+        start = match.start()
+        if kind == "string" and start and sql[start - 1] in "xX" and (
+            start == 1 or not (sql[start - 2].isalnum() or sql[start - 2] == "_")
+        ):
+            # x'...' blob literal
+            continue
+        parts.append(sql[position:start])
+        if kind == "comment":
+            parts.append(" ")
+        else:
+            parts.append("?")
+            params.append(_literal_value(kind, match.group()))
+        position = match.end()
+    parts.append(sql[position:])
+    return "".join(parts), tuple(params)
+
+
+def normalize_sql(sql: str) -> Tuple[str, tuple]:
+    """
+    Replace literal values in a DML statement with `?` parameters.
+
+    Integers in ORDER BY / GROUP BY lists are kept, because there they refer
+    to result columns, and so are literals in the result column list, whose
+    text names the columns. Statements that are not DML, or that already use
+    parameters, are returned unchanged.
+
+    Args:
+        sql (str): SQL statement with inline literals
+
+    Returns:
+        tuple: `(normalized_sql, params)`
+
+    Example:
+        >>> normalize_sql("SELECT name FROM people WHERE age > 25 AND profession = 'Engineer'")
+        ('SELECT name FROM people WHERE age > ? AND profession = ?', (25, 'Engineer'))
+        >>> normalize_sql("SELECT age + 1, 5 FROM people WHERE id = 7")
+        ('SELECT age + 1, 5 FROM people WHERE id = ?', (7,))
+    """
+    stripped = sql.strip()
+    upper = stripped.upper()
+    if not upper.startswith(_PARAMETERIZABLE):
+        return sql, ()
+    columns = _result_columns(stripped, upper)
+
+    if not (("ORDER" in upper or "GROUP" in upper) and _ORDER_OR_GROUP_BY.search(stripped)):
+        result = _normalize_fast(stripped, columns)
+        return result if result is not None else (sql, ())
+
+    parts, params = [], []
+    previous_word = ""
+    in_by_clause = False
+    depth = 0
+    by_depth = 0
+    for match in _TOKEN.finditer(stripped):
+        kind, text = match.lastgroup, match.group()
+        if kind == "param":
+            return sql, ()
+        if columns[0] <= match.start() < columns[1]:
+            # Kept as written, spacing included
+            parts.append(text)
+            continue
+        if kind == "space":
+            parts.append(" ")
+            continue
+        if kind == "comment":
+            continue
+
+        if kind == "word":
+            upper = text.upper()
+            if upper == "BY" and previous_word in ("ORDER", "GROUP"):
+                in_by_clause, by_depth = True, depth
+            elif upper in _BY_CLAUSE_END and depth <= by_depth:
+                in_by_clause = False
+            previous_word = upper
+        elif kind == "other":
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+                if depth < by_depth:
+                    in_by_clause = False
+            elif text == ";":
+                in_by_clause = False
+            previous_word = ""
+        else:
+            previous_word = ""
+
+        if kind == "string" or (kind == "number" and not (in_by_clause and depth == by_depth)):
+            parts.append("?")
+            params.append(_literal_value(kind, text))
+        else:
+            parts.append(text)
+
+    return "".join(parts).strip(), tuple(params)
+
+
+class CachingConnection(sqlite3.Connection):
+    """`sqlite3.Connection` that remembers which statements it has compiled."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.statement_lru: "OrderedDict[str, None]" = OrderedDict()
+
+
+@dataclass
+class StatementCacheStats:
+    """Counters for the statement cache across all connections."""
+
+    capacity: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    normalized: int = 0
+    fallbacks: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        stats = asdict(self)
+        stats["hit_rate"] = round(self.hit_rate, 4)
+        return stats
+
+
+class StatementCache:
+    """
+    Executes queries through the connection's compiled statement cache.
+
+    Args:
+        capacity (int): Compiled statements kept per connection. 0 disables
+            both normalization and caching.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_STATEMENT_CACHE_SIZE):
+        if capacity < 0:
+            raise ValueError("Statement cache capacity cannot be negative")
+
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._stats = StatementCacheStats(capacity=capacity)
+        # raw SQL text -> (normalized SQL, params)
+        self._normalized: "OrderedDict[str, Tuple[str, tuple]]" = OrderedDict()
+        self._normalized_capacity = capacity * 8
+
+    def connect_kwargs(self) -> dict:
+        """Keyword arguments for `sqlite3.connect` that size its statement cache."""
+        return {"factory": CachingConnection, "cached_statements": self.capacity}
+
+    def normalize(self, sql: str) -> Tuple[str, tuple]:
+        """`normalize_sql(sql)`, memoized by raw text; reuse it wherever the shape is needed."""
+        with self._lock:
+            cached = self._normalized.get(sql)
+            if cached is not None:
+                self._normalized.move_to_end(sql)
+                return cached
+        result = normalize_sql(sql)
+        with self._lock:
+            self._normalized[sql] = result
+            if len(self._normalized) > self._normalized_capacity:
+                self._normalized.popitem(last=False)
+        return result
+
+    def _touch(self, conn: sqlite3.Connection, sql: str) -> None:
+        lru: Optional[OrderedDict] = getattr(conn, "statement_lru", None)
+        if lru is None:
+            return
+        with self._lock:
+            if sql in lru:
+                lru.move_to_end(sql)
+                self._stats.hits += 1
+                return
+            self._stats.misses += 1
+            lru[sql] = None
+            if len(lru) > self.capacity:
+                lru.popitem(last=False)
+                self._stats.evictions += 1
+
+    def execute(self, conn: sqlite3.Connection, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """
+        Execute `sql`, normalizing its literals so the compiled form is reused.
+
+        If the normalized statement cannot be executed (for example because
+        a literal sits where SQLite does not allow a parameter), the original
+        text is executed instead.
+
+        Args:
+            conn (sqlite3.Connection): Connection to execute on
+            sql (str): SQL statement
+            params (tuple): Parameters for statements that already use them
+
+        Returns:
+            sqlite3.Cursor: The executed cursor
+        """
+        if self.capacity == 0:
+            return conn.execute(sql, params)
+        if params:
+            cursor = conn.execute(sql, params)
+            self._touch(conn, sql)
+            return cursor
+
+        normalized, values = self.normalize(sql)
+        if values:
+            try:
+                cursor = conn.execute(normalized, values)
+            except (sqlite3.OperationalError, sqlite3.ProgrammingError, OverflowError):
+                with self._lock:
+                    self._stats.fallbacks += 1
+                return conn.execute(sql)
+            with self._lock:
+                self._stats.normalized += 1
+            self._touch(conn, normalized)
+            return cursor
+
+        cursor = conn.execute(sql)
+        self._touch(conn, sql)
+        return cursor
+
+    def stats(self) -> StatementCacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return StatementCacheStats(**asdict(self._stats))
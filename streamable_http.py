@@ -0,0 +1,254 @@
+"""
+Stateless Streamable HTTP Transport
+
+A minimal, stateless version of MCP's streamable HTTP transport for the
+FastMCP server: every JSON-RPC message is one `POST /mcp`, and the reply is
+the response body. There is no session and no long-lived stream, so any
+request can go to any server process and clients can reuse keep-alive
+connections.
+
+- Requests are answered with `application/json`.
+- If a tool sends notifications while it runs (`stream_data` chunks,
+  progress) and the client accepts `text/event-stream`, the reply switches
+  to an SSE stream carrying those notifications followed by the response.
+  Clients that only accept JSON get the response without them.
+- Notifications from the client (`notifications/initialized`, ...) are
+  acknowledged with 202 and otherwise ignored.
+- GET and DELETE return 405: there are no server-initiated streams or
+  sessions to end.
+
+Requests are dispatched to the FastMCP server's own request handlers, so
+results and errors are the same as over SSE or stdio.
+
+    app = streamable_http_app(mcp)          # Starlette app serving POST /mcp
+    run_streamable_http(mcp, "0.0.0.0", 8000)
+"""
+
+import asyncio
+import json
+from typing import Any, Optional, get_args
+
+import uvicorn
+from mcp import types
+from mcp.server.fastmcp import FastMCP
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.context import RequestContext
+from mcp.shared.exceptions import McpError
+from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
+from pydantic import ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+__all__ = [
+    "DEFAULT_HTTP_PATH",
+    "run_streamable_http",
+    "streamable_http_app",
+]
+
+DEFAULT_HTTP_PATH = "/mcp"
+
+# Methods a client may call; anything else is "Method not found"
+_CLIENT_METHODS = {
+    get_args(request_type.model_fields["method"].annotation)[0]
+    for request_type in get_args(types.ClientRequest.model_fields["root"].annotation)
+}
+
+
+def _response(request_id, result: Any = None, error: Optional[types.ErrorData] = None) -> dict:
+    message = {"jsonrpc": "2.0", "id": request_id}
+    if error is not None:
+        message["error"] = error.model_dump(mode="json", exclude_none=True)
+    else:
+        message["result"] = result
+    return message
+
+
+def _error(request_id, code: int, message: str) -> dict:
+    return _response(request_id, error=types.ErrorData(code=code, message=message))
+
+
+def _event(message: dict) -> bytes:
+    return f"event: message\ndata: {json.dumps(message)}\n\n".encode("utf-8")
+
+
+class _RequestSession:
+    """
+    Stands in for the MCP ServerSession for the duration of one request.
+
+    Notifications the tool sends are put on `queue` when the client can
+    receive them on an SSE reply, and dropped otherwise.
+    """
+
+    def __init__(self, queue: Optional[asyncio.Queue]):
+        self.queue = queue
+
+    async def send_notification(self, notification: types.ServerNotification) -> None:
+        if self.queue is not None:
+            message = notification.model_dump(by_alias=True, mode="json", exclude_none=True)
+            await self.queue.put({"jsonrpc": "2.0", **message})
+
+    async def send_log_message(self, level, data: Any, logger: Optional[str] = None) -> None:
+        await self.send_notification(
+            types.ServerNotification(
+                types.LoggingMessageNotification(
+                    method="notifications/message",
+                    params=types.LoggingMessageNotificationParams(level=level, data=data, logger=logger),
+                )
+            )
+        )
+
+    async def send_progress_notification(
+        self, progress_token, progress: float, total: Optional[float] = None
+    ) -> None:
+        await self.send_notification(
+            types.ServerNotification(
+                types.ProgressNotification(
+                    method="notifications/progress",
+                    params=types.ProgressNotificationParams(
+                        progressToken=progress_token, progress=progress, total=total
+                    ),
+                )
+            )
+        )
+
+
+class _Handler:
+    """Dispatches JSON-RPC messages to a FastMCP server's request handlers."""
+
+    def __init__(self, mcp: FastMCP):
+        self.server = mcp._mcp_server
+        self.options = self.server.create_initialization_options()
+
+    def _initialize(self, params: dict) -> dict:
+        requested = (params or {}).get("protocolVersion")
+        if requested not in SUPPORTED_PROTOCOL_VERSIONS:
+            requested = types.LATEST_PROTOCOL_VERSION
+        return types.InitializeResult(
+            protocolVersion=requested,
+            capabilities=self.options.capabilities,
+            serverInfo=types.Implementation(
+                name=self.options.server_name, version=self.options.server_version
+            ),
+            instructions=self.options.instructions,
+        ).model_dump(by_alias=True, mode="json", exclude_none=True)
+
+    async def handle(self, message: dict, session: _RequestSession) -> dict:
+        """Run one JSON-RPC request and return its JSON-RPC response."""
+        request_id = message.get("id")
+        method = message.get("method")
+        if method == "initialize":
+            return _response(request_id, self._initialize(message.get("params")))
+        try:
+            request = types.ClientRequest.model_validate(
+                {"method": method, "params": message.get("params")}
+            ).root
+        except ValidationError as e:
+            if method not in _CLIENT_METHODS:
+                return _error(request_id, types.METHOD_NOT_FOUND, "Method not found")
+            return _error(request_id, types.INVALID_PARAMS, str(e))
+        handler = self.server.request_handlers.get(type(request))
+        if handler is None:
+            return _error(request_id, types.METHOD_NOT_FOUND, "Method not found")
+
+        meta = request.params.meta if getattr(request, "params", None) is not None else None
+        token = request_ctx.set(RequestContext(request_id, meta, session, {}))
+        try:
+            result = await handler(request)
+        except McpError as e:
+            return _response(request_id, error=e.error)
+        except Exception as e:
+            return _error(request_id, types.INTERNAL_ERROR, str(e))
+        finally:
+            request_ctx.reset(token)
+        return _response(request_id, result.model_dump(by_alias=True, mode="json", exclude_none=True))
+
+
+async def _stream(first: dict, queue: asyncio.Queue, task: asyncio.Task):
+    """SSE reply: the notifications as they are sent, then the response."""
+    try:
+        yield _event(first)
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait({task, get}, return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                yield _event(get.result())
+                continue
+            get.cancel()
+            while not queue.empty():
+                yield _event(queue.get_nowait())
+            yield _event(task.result())
+            return
+    finally:
+        # The client went away mid-stream; stop the tool (and its query)
+        if not task.done():
+            task.cancel()
+
+
+def streamable_http_app(mcp: FastMCP, path: str = DEFAULT_HTTP_PATH) -> Starlette:
+    """
+    Starlette app serving `mcp` over stateless streamable HTTP at `path`.
+
+    Args:
+        mcp (FastMCP): The server whose tools, resources and prompts are served
+        path (str): Endpoint path
+
+    Returns:
+        Starlette: The ASGI app
+    """
+    handler = _Handler(mcp)
+
+    async def endpoint(request: Request) -> Response:
+        if request.method != "POST":
+            return Response("Method not allowed", status_code=405, headers={"Allow": "POST"})
+        try:
+            body = json.loads(await request.body())
+        except ValueError:
+            return JSONResponse(_error(None, types.PARSE_ERROR, "Parse error"), status_code=400)
+
+        messages = body if isinstance(body, list) else [body]
+        if not messages or not all(
+            isinstance(message, dict) and message.get("jsonrpc") == "2.0" for message in messages
+        ):
+            return JSONResponse(_error(None, types.INVALID_REQUEST, "Invalid request"), status_code=400)
+        requests = [message for message in messages if "method" in message and "id" in message]
+        if not requests:
+            # Only notifications or responses
+            return Response(status_code=202)
+
+        if isinstance(body, list):
+            # Batches are answered together as JSON
+            responses = await asyncio.gather(
+                *(handler.handle(message, _RequestSession(None)) for message in requests)
+            )
+            return JSONResponse(list(responses))
+
+        accepts_sse = "text/event-stream" in request.headers.get("accept", "")
+        queue = asyncio.Queue() if accepts_sse else None
+        task = asyncio.ensure_future(handler.handle(requests[0], _RequestSession(queue)))
+        if queue is not None:
+            first = asyncio.ensure_future(queue.get())
+            await asyncio.wait({task, first}, return_when=asyncio.FIRST_COMPLETED)
+            if first.done():
+                return StreamingResponse(
+                    _stream(first.result(), queue, task),
+                    media_type="text/event-stream",
+                    headers={"Cache-Control": "no-store"},
+                )
+            first.cancel()
+        return JSONResponse(await task)
+
+    return Starlette(routes=[Route(path, endpoint=endpoint, methods=["GET", "POST", "DELETE"])])
+
+
+def run_streamable_http(
+    mcp: FastMCP, host: str = "0.0.0.0", port: int = 8000, path: str = DEFAULT_HTTP_PATH
+) -> None:
+    """Serve `mcp` over stateless streamable HTTP until interrupted."""
+    uvicorn.run(
+        streamable_http_app(mcp, path),
+        host=host,
+        port=port,
+        log_level=mcp.settings.log_level.lower(),
+    )
@@ -4,6 +4,7 @@ import os
 import pathlib
 import sys
 import asyncio
+import uuid
 import nest_asyncio
 import tracemalloc
 from contextlib import asynccontextmanager
@@ -25,9 +26,20 @@ if BASE.as_posix() not in sys.path:
 # Import your existing LLM setup & handler from azure_client.py
 from azure_client import setup_llm, get_agent, handle_user_message, Context
 
-# Get server URL from environment variable or use default
+# Get server URL from environment variable or use default; a URL ending in
+# /mcp (or MCP_TRANSPORT=streamable-http) uses the streamable HTTP transport
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://fastmcp-server:8000/sse")
 
+@st.cache_resource
+def get_mcp_pool():
+    """MCP connection pool shared by every browser session of this process.
+
+    Sized with MCP_POOL_SIZE, MCP_POOL_STREAMS and MCP_POOL_IDLE_TIMEOUT.
+    """
+    from mcp_pool import MCPConnectionPool
+
+    return MCPConnectionPool(MCP_SERVER_URL)
+
 @asynccontextmanager
 async def get_workflow_context():
     """Context manager for workflow operations."""
@@ -49,15 +61,21 @@ async def initialize_agent():
     llm = setup_llm()
 
     # 2) Initialize the MCP client & tool spec
-    from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
+    from tool_catalog import CachedMcpToolSpec
 
-    # Use environment variable for server URL
-    mcp_client = BasicMCPClient(MCP_SERVER_URL)
-    mcp_tool = McpToolSpec(client=mcp_client)
+    # Tool calls of this session go through the process-wide pool, queued
+    # fairly with other sessions; the tool catalog is loaded from
+    # TOOL_CATALOG_PATH when it was listed before
+    mcp_client = get_mcp_pool().client(key=st.session_state.session_key)
+    mcp_tool = CachedMcpToolSpec(client=mcp_client)
 
     # 3) Create the agent
     agent = await get_agent(mcp_tool, llm)
-    return agent, Context(agent)
+    return agent, Context(agent), mcp_tool
+
+# Fairness key of this browser session in the MCP connection pool
+if "session_key" not in st.session_state:
+    st.session_state.session_key = uuid.uuid4().hex
 
 # Ensure a single event loop is used throughout the app
 if "event_loop" not in st.session_state:
@@ -69,9 +87,10 @@ if "agent" not in st.session_state:
     try:
         loop = st.session_state.event_loop
         asyncio.set_event_loop(loop)
-        agent, context = loop.run_until_complete(initialize_agent())
+        agent, context, mcp_tool = loop.run_until_complete(initialize_agent())
         st.session_state.agent = agent
         st.session_state.agent_context = context
+        st.session_state.mcp_tool = mcp_tool
     except Exception as e:
         st.error(f"Failed to initialize agent: {str(e)}")
         st.stop()
@@ -97,6 +116,10 @@ if submit and user_input.strip() != "":
         """Process a message with proper workflow context."""
         async with get_workflow_context():
             try:
+                # The tool catalog changed on the server since the last message
+                updated = await st.session_state.mcp_tool.updated_tools()
+                if updated is not None:
+                    agent.tools = updated
                 return await handle_user_message(message, agent, context, verbose=False)
             except Exception as e:
                 return f"Error: {str(e)}"
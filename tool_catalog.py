@@ -0,0 +1,311 @@
+"""
+Tool Catalog Cache
+
+`CachedMcpToolSpec` is a drop-in `McpToolSpec` that lists the server's tools
+once per client instead of once per `to_tool_list_async()` call, and keeps
+the `FunctionTool` objects it built, so building the agent and printing the
+available tools share one `tools/list` round-trip.
+
+The catalog is also written to `TOOL_CATALOG_PATH` (default
+`data/tool_catalog.json`, empty disables it), keyed by server URL, together
+with a SHA-256 hash of the tool names, descriptions and input schemas. The
+next client start loads the tools from that file without contacting the
+server; an entry whose tools no longer match their hash is ignored.
+
+The hash only proves the file is intact, not that the server still has the
+same tools, and FastMCP does not announce changes. A catalog loaded from the
+file is therefore listed again in the background right after it is first
+served, and any catalog older than `TOOL_CATALOG_TTL` seconds (default 300,
+0 disables it) again on its next use. If the new listing's hash differs, the
+catalog and the file are replaced and `updated_tools()` returns the new
+tools.
+
+The catalog is also listed again when the server says it changed:
+
+- a `notifications/tools/list_changed` notification, received on the open
+  session of a `PersistentMCPClient`, with a tool result over the streamable
+  HTTP transport, or passed to `on_notification()`
+- an "Unknown tool" error from a tool call, i.e. the cached catalog names a
+  tool the server no longer has
+
+Either marks the catalog stale; `updated_tools()` then lists the tools again
+and returns the new `FunctionTool` list if the schema hash changed.
+`refresh()` forces a new listing.
+
+    tools = CachedMcpToolSpec(client=make_mcp_client(url))
+    agent = await get_agent(tools, llm)
+    for tool in await tools.to_tool_list_async():   # no second round-trip
+        print(tool.metadata.name)
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, List, Optional
+
+from llama_index.core.tools.function_tool import FunctionTool
+from llama_index.tools.mcp import McpToolSpec
+from mcp import types
+
+__all__ = [
+    "DEFAULT_TOOL_CATALOG_PATH",
+    "DEFAULT_TOOL_CATALOG_TTL",
+    "TOOLS_LIST_CHANGED",
+    "CachedMcpToolSpec",
+    "schema_hash",
+]
+
+DEFAULT_TOOL_CATALOG_PATH = os.getenv(
+    "TOOL_CATALOG_PATH", os.path.join(os.getcwd(), "data", "tool_catalog.json")
+)
+
+# Seconds before a catalog is listed again in the background (0: never)
+DEFAULT_TOOL_CATALOG_TTL = float(os.getenv("TOOL_CATALOG_TTL", "300"))
+
+TOOLS_LIST_CHANGED = "notifications/tools/list_changed"
+
+# Bumped when the file layout changes; entries of other versions are ignored
+_CATALOG_VERSION = 1
+
+
+def schema_hash(tools: List[types.Tool]) -> str:
+    """SHA-256 of the tools' names, descriptions and input schemas, in name order."""
+    entries = sorted(
+        (tool.model_dump(mode="json", exclude_none=True) for tool in tools),
+        key=lambda entry: entry["name"],
+    )
+    encoded = json.dumps(entries, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _server_key(client: Any) -> str:
+    """The URL or command of the server `client` talks to."""
+    key = getattr(client, "url", None) or getattr(client, "command_or_url", None)
+    if key is None:
+        return type(client).__name__
+    args = getattr(client, "args", None)
+    return " ".join([key, *args]) if args else key
+
+
+class CachedMcpToolSpec(McpToolSpec):
+    """
+    `McpToolSpec` that caches the server's tool catalog in memory and on disk.
+
+    Args:
+        client: MCP client with `list_tools` and `call_tool`
+        allowed_tools (list, optional): Only return tools with these names
+        path (str): Catalog file shared by all servers, "" to keep it in memory only
+        server_key (str, optional): Key of this server in the file; defaults
+            to the client's URL or command
+        ttl (float): Seconds before the catalog is listed again in the
+            background, 0 to keep it until the server reports a change
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        allowed_tools: Optional[List[str]] = None,
+        path: str = DEFAULT_TOOL_CATALOG_PATH,
+        server_key: Optional[str] = None,
+        ttl: float = DEFAULT_TOOL_CATALOG_TTL,
+    ):
+        super().__init__(client, allowed_tools)
+        self.path = path
+        self.server_key = server_key or _server_key(client)
+        self.ttl = ttl
+        self.schema_hash: Optional[str] = None
+        self.stats = {"list_tools": 0, "loaded_from_disk": 0, "invalidations": 0, "revalidations": 0}
+        self._tools: Optional[List[types.Tool]] = None
+        self._function_tools: Optional[List[FunctionTool]] = None
+        self._stale = False
+        # When the server last listed the catalog; None until it has in this process
+        self._listed_at: Optional[float] = None
+        # A revalidation found tools the agent has not been given yet
+        self._changed = False
+        self._revalidation: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        # The streamable HTTP client hands over notifications sent with a
+        # result; a persistent session delivers them whenever they arrive
+        self._forwards_notifications = (
+            "on_notification" in inspect.signature(client.call_tool).parameters
+        )
+        if hasattr(client, "add_notification_handler"):
+            client.add_notification_handler(self.on_notification)
+
+    @property
+    def stale(self) -> bool:
+        """Whether the server reported a change that has not been listed yet."""
+        return self._stale
+
+    def invalidate(self) -> None:
+        """Mark the catalog stale; the next fetch lists the tools again."""
+        if not self._stale:
+            self._stale = True
+            self.stats["invalidations"] += 1
+
+    def on_notification(self, message: dict) -> None:
+        """Handle a server notification; a tool list change invalidates the catalog."""
+        if message.get("method") == TOOLS_LIST_CHANGED:
+            self.invalidate()
+
+    def _load(self) -> Optional[List[types.Tool]]:
+        if not self.path:
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entry = json.load(f).get("servers", {}).get(self.server_key)
+            if entry is None or entry.get("version") != _CATALOG_VERSION:
+                return None
+            tools = [types.Tool.model_validate(tool) for tool in entry["tools"]]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Missing, unreadable or hand-edited file: list from the server
+            return None
+        if schema_hash(tools) != entry.get("schema_hash"):
+            return None
+        return tools
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                catalog = json.load(f)
+            if not isinstance(catalog.get("servers"), dict):
+                raise ValueError
+        except (OSError, ValueError, AttributeError):
+            catalog = {"servers": {}}
+        catalog["servers"][self.server_key] = {
+            "version": _CATALOG_VERSION,
+            "schema_hash": self.schema_hash,
+            "fetched_at": time.time(),
+            "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in self._tools],
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write a temporary file and rename it, so a concurrent client
+            # never reads a half-written catalog
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(catalog, f)
+            os.replace(temporary, self.path)
+        except OSError:
+            # A read-only location only costs the next start a round-trip
+            pass
+
+    def _set(self, tools: List[types.Tool]) -> bool:
+        digest = schema_hash(tools)
+        changed = digest != self.schema_hash
+        if changed:
+            self._function_tools = None
+        self._tools = tools
+        self.schema_hash = digest
+        return changed
+
+    async def _list(self) -> bool:
+        """List the tools from the server; returns whether the catalog changed."""
+        response = await self.client.list_tools()
+        self.stats["list_tools"] += 1
+        self._listed_at = time.monotonic()
+        changed = self._set(list(response.tools if hasattr(response, "tools") else []))
+        self._save()
+        return changed
+
+    async def _revalidate(self) -> None:
+        async with self._lock:
+            try:
+                changed = await self._list()
+            except Exception:
+                # Keep serving the cached catalog; the next use tries again
+                return
+            self.stats["revalidations"] += 1
+            self._changed = self._changed or changed
+
+    def _revalidate_if_due(self) -> None:
+        if self._revalidation is not None and not self._revalidation.done():
+            return
+        if self._listed_at is None or (0 < self.ttl <= time.monotonic() - self._listed_at):
+            # Served from the file or too old: check it against the server
+            # without delaying the caller
+            self._revalidation = asyncio.create_task(self._revalidate())
+
+    async def _catalog(self) -> List[types.Tool]:
+        if self._tools is not None and not self._stale:
+            self._revalidate_if_due()
+            return self._tools
+        async with self._lock:
+            if self._tools is None and not self._stale:
+                tools = self._load()
+                if tools is not None:
+                    self.stats["loaded_from_disk"] += 1
+                    self._set(tools)
+            if self._tools is None or self._stale:
+                self._stale = False
+                await self._list()
+        self._revalidate_if_due()
+        return self._tools
+
+    async def wait_revalidation(self) -> None:
+        """Wait for a background listing in progress, e.g. before closing the client."""
+        if self._revalidation is not None:
+            await asyncio.gather(self._revalidation, return_exceptions=True)
+
+    async def fetch_tools(self) -> List[types.Tool]:
+        """The cached tool list, listed from the server only when missing or stale."""
+        tools = await self._catalog()
+        if self.allowed_tools:
+            tools = [tool for tool in tools if tool.name in self.allowed_tools]
+        return tools
+
+    def _create_tool_fn(self, tool_name: str) -> Callable:
+        async def async_tool_fn(**kwargs):
+            if self._forwards_notifications:
+                result = await self.client.call_tool(
+                    tool_name, kwargs, on_notification=self.on_notification
+                )
+            else:
+                result = await self.client.call_tool(tool_name, kwargs)
+            if getattr(result, "isError", False) and any(
+                getattr(item, "text", "").startswith(f"Unknown tool: {tool_name}")
+                for item in result.content
+            ):
+                self.invalidate()
+            return result
+
+        return async_tool_fn
+
+    async def to_tool_list_async(self) -> List[FunctionTool]:
+        """The `FunctionTool` list, rebuilt only when the schema hash changes."""
+        await self._catalog()
+        if self._function_tools is None:
+            self._function_tools = await super().to_tool_list_async()
+        return list(self._function_tools)
+
+    async def refresh(self) -> bool:
+        """List the tools from the server now; returns whether the catalog changed."""
+        previous = self.schema_hash
+        self.invalidate()
+        await self._catalog()
+        return self.schema_hash != previous
+
+    async def updated_tools(self) -> Optional[List[FunctionTool]]:
+        """
+        New `FunctionTool` list if the catalog was invalidated or revalidated
+        and has changed since the agent got its tools.
+
+        Returns:
+            list | None: The tools to give the agent, or None to keep its tools
+        """
+        if self._stale:
+            self._changed = await self.refresh() or self._changed
+        else:
+            # Starts a background listing if the catalog is due for one
+            await self._catalog()
+        if not self._changed:
+            return None
+        self._changed = False
+        return await self.to_tool_list_async()